@@ -2,57 +2,4769 @@
 # TMP-Networks-Browser-Mini.py
 
 import sys
+import argparse
 import json
 import os
 import re
-import requests
-import vlc
+import sqlite3
+import threading
+import time
+import math
+import bisect
+import heapq
+import datetime
+import hashlib
+import shutil
+import signal
+import email.utils
+import io
+import xml.etree.ElementTree as ET
+
+from collections import OrderedDict, Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from urllib.parse import urljoin, urlsplit
 
-from urllib.parse import urljoin
+# PyQt6
+from PyQt6.QtWidgets import (
+    QApplication, QMainWindow, QVBoxLayout, QLineEdit, QWidget,
+    QTabWidget, QToolBar, QStatusBar, QFileDialog, QMessageBox,
+    QDialog, QPushButton, QLabel, QMenu, QListWidget, QListWidgetItem, QHBoxLayout,
+    QSizePolicy, QFrame, QSlider, QCompleter, QListView,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QTreeWidget, QTreeWidgetItem, QComboBox, QInputDialog
+)
+from PyQt6.QtGui import QAction, QActionGroup, QFont, QStandardItemModel, QStandardItem
+from PyQt6.QtCore import (
+    QUrl, QSize, QObject, QEvent, pyqtSlot, pyqtSignal, Qt, QTimer,
+    QAbstractListModel, QModelIndex, QByteArray, QDataStream, QIODevice, QFile,
+    PYQT_VERSION_STR
+)
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtWebEngineCore import (
+    QWebEngineProfile, QWebEnginePage, QWebEngineScript, QWebEngineDownloadRequest,
+    QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo
+)
+from PyQt6.QtWebChannel import QWebChannel
+
+DATA_FILE = "favoriten_und_passwoerter.json"
+DB_FILE = "browser_profil.sqlite3"
+# Höchstzahl gefundener Videos pro Tab (Videoerkennung)
+MEDIA_MAX_CANDIDATES = 50
+# Ladezeiten: so viele Seitenaufrufe pro Tab behalten, so viele Anfragen pro
+# Aufruf mitschreiben; Größe des Resource-Timing-Puffers der Seiten
+PERF_WINDOW_LOADS = 20
+PERF_MAX_REQUESTS = 2000
+PERF_RESOURCE_BUFFER = 1000
+# Benanntes, dauerhaftes Web-Profil (Cookies, HTTP-Cache) aller Tabs
+WEB_PROFILE_NAME = "tmp-networks"
+WEB_PROFILE_DIR = "webprofil"
+WEB_CACHE_SIZE_MB = 512
+WEB_CACHE_SIZES_MB = (128, 256, 512, 1024, 2048)
+# Vorladen der meistbesuchten Favoriten in den Cache, wenn kein Tab lädt
+CACHE_WARMUP_DELAY_MS = 2 * 60 * 1000
+CACHE_WARMUP_GAP_MS = 5000
+CACHE_WARMUP_TIMEOUT_MS = 30 * 1000
+CACHE_WARMUP_MAX_PAGES = 20
+# Filterlisten im EasyList-Format (*.txt) und ihre kompilierte Fassung
+FILTER_LIST_DIR = "filterlisten"
+FILTER_CACHE_FILE = os.path.join(FILTER_LIST_DIR, "kompiliert.json")
+FILTER_CACHE_VERSION = 2
+# Schlüsselwörter für den Automaten: Mindestlänge, gekürzt auf Höchstlänge
+FILTER_MIN_KEYWORD = 3
+FILTER_KEYWORD_LENGTH = 12
+# Vollständige Public-Suffix-Liste (publicsuffix.org), liegt dem Programm bei
+# (im PyInstaller-Build unter sys._MEIPASS)
+PUBLIC_SUFFIX_FILE = os.path.join(
+    getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))),
+    "assets", "public_suffix_list.dat")
+
+# Chronik: Besuche derselben URL innerhalb dieses Fensters zählen nur einmal
+HISTORY_COALESCE_SECONDS = 30
+# Halbwertszeit der Frecency-Bewertung (Häufigkeit + Aktualität)
+HISTORY_FRECENCY_HALF_LIFE = 30 * 24 * 3600
+# Aufbewahrung: ältere bzw. überzählige (am schlechtesten bewertete) Einträge werden entfernt
+HISTORY_MAX_AGE_DAYS = 180
+HISTORY_MAX_ENTRIES = 50000
+HISTORY_COMPACT_INTERVAL_MS = 10 * 60 * 1000
+HISTORY_FLUSH_DELAY_MS = 2000
+
+# URL-Leisten-Vorschläge
+COMPLETION_MAX_RESULTS = 8
+# Länge der vorberechneten Bestenlisten für häufige Präfixe
+COMPLETION_TOP_K = 50
+# Präfixe mit mehr Treffern bekommen eine vorberechnete Bestenliste
+COMPLETION_CACHE_THRESHOLD = 2000
+# Favoriten werden so bewertet, als wären sie 2^3 = 8 Mal häufiger besucht
+COMPLETION_FAVORITE_BONUS = 3.0
+COMPLETION_IGNORED_TOKENS = frozenset(("http", "https", "www"))
+
+# Chronik-Dialog: Einträge pro nachgeladener Seite, Verzögerung der Suche beim Tippen
+HISTORY_PAGE_SIZE = 200
+HISTORY_FILTER_DELAY_MS = 250
+
+# HLS-Auflösung: parallele Manifest-Abrufe, Zeitlimit pro Abruf und pro Scan
+HLS_RESOLVE_WORKERS = 6
+HLS_REQUEST_TIMEOUT = 5
+HLS_BATCH_DEADLINE_MS = 8000
+HTTP_POOL_SIZE = 16
+
+# Manifest-Cache: Einträge im Speicher und auf der Platte (LRU), Standard-TTLs
+MANIFEST_CACHE_DIR = "manifest_cache"
+MANIFEST_CACHE_MEMORY_ENTRIES = 200
+MANIFEST_CACHE_DISK_ENTRIES = 1000
+# Master-Playlists und VOD ändern sich selten
+MANIFEST_VOD_TTL = 300
+# Live-Playlists: höchstens eine halbe Segmentdauer (vgl. HLS-Spezifikation)
+MANIFEST_LIVE_MIN_TTL = 1
+
+# Variantenwahl: nur so viel Bitrate wählen, wie ein Anteil des gemessenen
+# Durchsatzes trägt; Messung per Probe-Download, falls noch kein Wert vorliegt
+VARIANT_THROUGHPUT_SAFETY = 0.8
+THROUGHPUT_EWMA_ALPHA = 0.3
+THROUGHPUT_MIN_SAMPLE_BYTES = 64 * 1024
+THROUGHPUT_PROBE_BYTES = 1024 * 1024
+THROUGHPUT_PROBE_SECONDS = 3.0
+VIDEO_QUALITY_CAPS = (2160, 1440, 1080, 720, 480, 360)
+
+# HLS-Download: parallele Verbindungen, Wiederholungen pro Segment,
+# Segmente im Voraus (begrenzt den Speicherbedarf), Höchstdauer von Live-Mitschnitten
+HLS_DOWNLOAD_CONNECTIONS = 6
+HLS_SEGMENT_RETRIES = 3
+HLS_SEGMENT_WINDOW = 2 * HLS_DOWNLOAD_CONNECTIONS
+HLS_LIVE_MAX_SECONDS = 4 * 3600
+
+# Beschleunigter Download: parallele Range-Anfragen auf Teilstücke fester Größe
+RANGED_CONNECTIONS = 4
+RANGED_PIECE_SIZE = 8 * 1024 * 1024
+RANGED_CHUNK_SIZE = 256 * 1024
+RANGED_RETRIES = 3
+RANGED_STATE_INTERVAL = 1.0
+
+# Download-Verwaltung: gleichzeitige Downloads insgesamt und pro Host,
+# Aktualisierung von Geschwindigkeit/Restzeit, wählbare Bandbreitengrenzen (Byte/s)
+DOWNLOAD_MAX_ACTIVE = 3
+DOWNLOAD_MAX_PER_HOST = 2
+DOWNLOAD_TICK_MS = 1000
+DOWNLOAD_SPEED_ALPHA = 0.3
+DOWNLOAD_RATE_LIMITS = (256 * 1024, 1024 * 1024, 5 * 1024 * 1024)
+
+# Tab-Lebenszyklus: Hintergrund-Tabs nach so viel Leerlauf einfrieren bzw.
+# verwerfen; Speicherbudget aller Renderer zusammen (MB, 0 = kein Budget)
+TAB_FREEZE_AFTER_SECONDS = 5 * 60
+TAB_DISCARD_AFTER_SECONDS = 60 * 60
+TAB_MEMORY_BUDGET_MB = 2048
+TAB_MEMORY_BUDGETS_MB = (1024, 2048, 4096, 8192)
+TAB_LIFECYCLE_INTERVAL_MS = 30 * 1000
+
+# Task-Manager: Abtastung aller Prozesse (langsamer, solange das Fenster zu
+# ist, aber durchgehend für die Höchstwerte und das Speicherbudget der Tabs)
+# und Protokoll der Höchstwerte
+TASK_SAMPLE_INTERVAL_MS = 10 * 1000
+TASK_MANAGER_INTERVAL_MS = 2000
+TASK_PEAK_LOG = "ressourcen_hoechstwerte.jsonl"
+
+# Stapelbetrieb (--batch): gleichzeitig geladene Seiten, Zeitlimit pro Seite
+# und Wartezeit nach dem Laden für Player, die ihr Manifest erst später holen
+BATCH_POOL_SIZE = 4
+BATCH_PAGE_TIMEOUT_MS = 30 * 1000
+BATCH_SETTLE_MS = 3000
+
+# VLC: gemeinsame Instanz (nach dem Start im Hintergrund vorgeladen) und
+# Vorrat wiederverwendbarer Player; Netzwerkpuffer in ms (kleiner = schnellerer Start)
+VLC_INSTANCE_ARGS = ("--no-video-title-show", "--quiet")
+VLC_PLAYER_POOL_SIZE = 2
+VLC_WARMUP_DELAY_MS = 3000
+VLC_NETWORK_CACHING_MS = 500
+VLC_NETWORK_CACHING_CHOICES = (300, 500, 1000, 3000)
+VLC_PREPARED_MEDIA = 4
+VLC_TTFF_SAMPLES = 20
+# Fehlt libVLC, meldet python-vlc das je nach Version als ImportError,
+# OSError, NotImplementedError oder NameError ("no function 'libvlc_new'")
+VLC_LOAD_ERRORS = (ImportError, OSError, NotImplementedError, NameError)
+
+# Sitzung: Abstand der Sicherungen der Tab-Liste (nur bei Änderungen)
+SESSION_SAVE_INTERVAL_MS = 15 * 1000
+START_PAGE_URL = "https://www.google.com"
+
+# --------------------------------------------------
+#  Startzeit: Phasenmessung und verzögerte Importe
+# --------------------------------------------------
+class StartupProfiler:
+    """
+    Gibt bei --profile-startup für jede Startphase die Zeit seit Beginn
+    und seit der vorigen Phase aus; sonst ohne Wirkung.
+    """
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.seen = set()
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        print(f"[Start] {(now - self.started) * 1000:8.1f} ms  "
+              f"(+{(now - self.last) * 1000:7.1f} ms)  {phase}")
+        self.last = now
+
+    def mark_once(self, phase):
+        if phase not in self.seen:
+            self.seen.add(phase)
+            self.mark(phase)
+
+startup_profiler = StartupProfiler("--profile-startup" in sys.argv)
+
+class _LazyModule:
+    """
+    Stellvertreter für ein Modul, das erst beim ersten Attributzugriff
+    importiert wird. Der Import steht in einer Ladefunktion, damit
+    PyInstaller ihn weiterhin findet.
+    """
+    def __init__(self, name, loader):
+        self._name = name
+        self._loader = loader
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = self._loader()
+                    startup_profiler.mark(f"Modul {self._name} importiert")
+        return getattr(self._module, attr)
+
+def _import_requests():
+    import requests
+    return requests
+
+def _import_vlc():
+    import vlc
+    return vlc
+
+# Netzwerk und Player werden nur für Videos/Downloads gebraucht
+requests = _LazyModule("requests", _import_requests)
+vlc = _LazyModule("vlc", _import_vlc)
+
+def get_emoji_font():
+    """ 
+    Vereinfachtes Fallback: Liefert 'Arial' mit Größe 16 zurück,
+    um Probleme mit QFontDatabase zu vermeiden.
+    """
+    return QFont("Arial", 16)
+
+class ProfileStore:
+    """
+    Profilspeicher auf Basis von SQLite im WAL-Modus.
+
+    Favoriten (mit Ordnern), Zugangsdaten und Chronik liegen in eigenen Tabellen.
+    Jede Änderung ist ein einzelnes INSERT/UPDATE/DELETE, kostet also
+    O(1) statt eines kompletten Neuschreibens der Profildatei.
+    Beim ersten Start wird die alte JSON-Datei (DATA_FILE) übernommen.
+    """
+    SCHEMA_VERSION = 6
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        # isolation_level=None: Autocommit, Transaktionen steuern wir selbst
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # NORMAL ist im WAL-Modus absturzsicher (nur die letzte Transaktion
+        # kann bei Stromausfall verloren gehen, die Datei bleibt konsistent)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.migrated_from_json = False
+        try:
+            self._migrate_schema()
+        except Exception:
+            # Aufrufer legen ggf. die alte JSON-Datei beiseite und öffnen neu
+            self.conn.close()
+            raise
+
+    # ---------- Schema / Migration ----------
+    def _migrate_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS favorites ("
+                    " id INTEGER PRIMARY KEY,"
+                    " title TEXT NOT NULL,"
+                    " url TEXT NOT NULL)"
+                )
+                self.conn.execute("CREATE INDEX IF NOT EXISTS favorites_url ON favorites(url)")
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS credentials ("
+                    " domain TEXT PRIMARY KEY,"
+                    " username TEXT NOT NULL,"
+                    " password TEXT NOT NULL)"
+                )
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS history ("
+                    " id INTEGER PRIMARY KEY,"
+                    " title TEXT NOT NULL,"
+                    " url TEXT NOT NULL,"
+                    " visited_at REAL NOT NULL)"
+                )
+                self.migrated_from_json = self._import_json(DATA_FILE)
+                self.conn.execute("PRAGMA user_version = 1")
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            if self.migrated_from_json:
+                # Alte Datei als Sicherung behalten, aber nicht erneut importieren
+                os.replace(DATA_FILE, DATA_FILE + ".migriert")
+        if version < 2:
+            # Chronik pro URL aggregieren (Besuchszahl, letzter Besuch, Frecency)
+            with self.transaction():
+                self.conn.execute(
+                    "CREATE TABLE history_v2 ("
+                    " url TEXT PRIMARY KEY,"
+                    " title TEXT NOT NULL,"
+                    " visit_count INTEGER NOT NULL,"
+                    " last_visit REAL NOT NULL,"
+                    " frecency REAL NOT NULL,"
+                    " rank REAL NOT NULL)"
+                )
+                # MAX() sorgt dafür, dass der Titel des letzten Besuchs übernommen wird
+                rows = self.conn.execute(
+                    "SELECT url, title, COUNT(*), MAX(visited_at) FROM history GROUP BY url"
+                ).fetchall()
+                self.conn.executemany(
+                    "INSERT INTO history_v2(url, title, visit_count, last_visit, frecency, rank) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(url, title, count, last, count, HistoryRecord.rank_for(count, last))
+                     for url, title, count, last in rows]
+                )
+                self.conn.execute("DROP TABLE history")
+                self.conn.execute("ALTER TABLE history_v2 RENAME TO history")
+                self.conn.execute("CREATE INDEX history_last_visit ON history(last_visit)")
+                self.conn.execute("CREATE INDEX history_rank ON history(rank)")
+                self.conn.execute("PRAGMA user_version = 2")
+        if version < 3:
+            with self.transaction():
+                self.conn.execute(
+                    "CREATE TABLE settings ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT NOT NULL)"
+                )
+                self.conn.execute("PRAGMA user_version = 3")
+        if version < 4:
+            # Download-Warteschlange (überdauert Neustarts)
+            with self.transaction():
+                self.conn.execute(
+                    "CREATE TABLE downloads ("
+                    " id INTEGER PRIMARY KEY,"
+                    " url TEXT NOT NULL,"
+                    " path TEXT NOT NULL,"
+                    " kind TEXT NOT NULL,"
+                    " state TEXT NOT NULL,"
+                    " received INTEGER NOT NULL DEFAULT 0,"
+                    " total INTEGER NOT NULL DEFAULT 0,"
+                    " added_at REAL NOT NULL,"
+                    " error TEXT NOT NULL DEFAULT '')"
+                )
+                self.conn.execute("PRAGMA user_version = 4")
+        if version < 5:
+            # Letzte Sitzung: ein Eintrag pro Tab, history = serialisierte QWebEngineHistory
+            with self.transaction():
+                self.conn.execute(
+                    "CREATE TABLE session_tabs ("
+                    " position INTEGER PRIMARY KEY,"
+                    " url TEXT NOT NULL,"
+                    " title TEXT NOT NULL,"
+                    " pinned INTEGER NOT NULL DEFAULT 0,"
+                    " history BLOB)"
+                )
+                self.conn.execute("PRAGMA user_version = 5")
+        if version < 6:
+            # Favoriten-Ordner: parent_id NULL = oberste Ebene
+            with self.transaction():
+                self.conn.execute("ALTER TABLE favorites ADD COLUMN parent_id INTEGER")
+                self.conn.execute(
+                    "ALTER TABLE favorites ADD COLUMN is_folder INTEGER NOT NULL DEFAULT 0")
+                self.conn.execute("CREATE INDEX favorites_parent ON favorites(parent_id)")
+                self.conn.execute("PRAGMA user_version = 6")
+
+    def _import_json(self, json_path):
+        """
+        Übernimmt Favoriten, Zugangsdaten und Chronik aus der alten JSON-Datei.
+        Läuft innerhalb der Schema-Transaktion; liefert True, wenn etwas importiert wurde.
+        """
+        if not os.path.exists(json_path):
+            return False
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        self.conn.executemany(
+            "INSERT INTO favorites(title, url) VALUES (?, ?)",
+            [(fav.get("title", ""), fav.get("url", "")) for fav in data.get("favorites", [])]
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO credentials(domain, username, password) VALUES (?, ?, ?)",
+            [(domain, creds.get("username", ""), creds.get("password", ""))
+             for domain, creds in data.get("credentials", {}).items()]
+        )
+        # Die alte Chronik hatte keine Zeitstempel: Reihenfolge über
+        # aufsteigende Pseudo-Zeitpunkte erhalten
+        history = data.get("history", [])
+        base = time.time() - len(history)
+        self.conn.executemany(
+            "INSERT INTO history(title, url, visited_at) VALUES (?, ?, ?)",
+            [(entry.get("title", "Ohne Titel"), entry.get("url", ""), base + i)
+             for i, entry in enumerate(history)]
+        )
+        return True
+
+    def transaction(self):
+        return _StoreTransaction(self.conn)
+
+    # ---------- Laden ----------
+    def load_all(self):
+        return self.read_profile(self.conn)
+
+    @staticmethod
+    def read_profile(conn):
+        """
+        Favoriten und Zugangsdaten über conn (auch eine eigene Verbindung
+        eines Hintergrund-Threads, siehe ProfileLoader).
+        """
+        favorites = [
+            Favorite(fav_id, title, url, parent_id, bool(is_folder))
+            for fav_id, title, url, parent_id, is_folder in conn.execute(
+                "SELECT id, title, url, parent_id, is_folder FROM favorites ORDER BY id")
+        ]
+        credentials = {
+            domain: {"username": username, "password": password}
+            for domain, username, password in conn.execute(
+                "SELECT domain, username, password FROM credentials")
+        }
+        return {"favorites": favorites, "credentials": credentials}
+
+    # ---------- Favoriten ----------
+    def add_favorite(self, title, url, parent_id=None, is_folder=False):
+        """
+        Legt einen Favoriten oder Ordner an und liefert seine ID.
+        """
+        cursor = self.conn.execute(
+            "INSERT INTO favorites(title, url, parent_id, is_folder) VALUES (?, ?, ?, ?)",
+            (title, url, parent_id, int(is_folder))
+        )
+        return cursor.lastrowid
+
+    def update_favorite(self, fav_id, title, url, parent_id):
+        self.conn.execute(
+            "UPDATE favorites SET title = ?, url = ?, parent_id = ? WHERE id = ?",
+            (title, url, parent_id, fav_id)
+        )
+        return True
+
+    def delete_favorites(self, ids):
+        with self.transaction():
+            self.conn.executemany("DELETE FROM favorites WHERE id = ?", [(i,) for i in ids])
+        return True
+
+    def replace_favorites(self, favorites):
+        with self.transaction():
+            self.conn.execute("DELETE FROM favorites")
+            self.conn.executemany(
+                "INSERT INTO favorites(id, title, url, parent_id, is_folder) VALUES (?, ?, ?, ?, ?)",
+                [(fav.id, fav.title, fav.url, fav.parent_id, int(fav.is_folder)) for fav in favorites]
+            )
+
+    def most_visited_favorites(self, limit):
+        return [url for (url,) in self.conn.execute(
+            "SELECT f.url FROM favorites f JOIN history h ON h.url = f.url "
+            "WHERE f.is_folder = 0 GROUP BY f.url ORDER BY MAX(h.rank) DESC LIMIT ?", (limit,))]
+
+    # ---------- Zugangsdaten ----------
+    def set_credentials(self, domain, username, password):
+        self.conn.execute(
+            "INSERT INTO credentials(domain, username, password) VALUES (?, ?, ?) "
+            "ON CONFLICT(domain) DO UPDATE SET username=excluded.username, password=excluded.password",
+            (domain, username, password)
+        )
+
+    def replace_credentials(self, credentials):
+        with self.transaction():
+            self.conn.execute("DELETE FROM credentials")
+            self.conn.executemany(
+                "INSERT INTO credentials(domain, username, password) VALUES (?, ?, ?)",
+                [(domain, creds["username"], creds["password"])
+                 for domain, creds in credentials.items()]
+            )
+
+    # ---------- Einstellungen ----------
+    def get_setting(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_setting(self, key, value):
+        self.conn.execute(
+            "INSERT INTO settings(key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+            (key, json.dumps(value))
+        )
+
+    # ---------- Chronik ----------
+    def get_history(self, url):
+        return self.conn.execute(
+            "SELECT title, visit_count, last_visit, frecency FROM history WHERE url = ?",
+            (url,)).fetchone()
+
+    def upsert_history(self, records):
+        """
+        Schreibt die übergebenen HistoryRecords in einer Transaktion
+        (eine Zeile pro URL).
+        """
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT INTO history(url, title, visit_count, last_visit, frecency, rank) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET title=excluded.title, "
+                "visit_count=excluded.visit_count, last_visit=excluded.last_visit, "
+                "frecency=excluded.frecency, rank=excluded.rank",
+                [(r.url, r.title, r.visit_count, r.last_visit, r.frecency, r.rank())
+                 for r in records]
+            )
+
+    # ---------- Downloads ----------
+    def load_downloads(self):
+        return self.conn.execute(
+            "SELECT id, url, path, kind, state, received, total, added_at, error "
+            "FROM downloads ORDER BY id")
+
+    def add_download(self, url, path, kind, state, added_at):
+        return self.conn.execute(
+            "INSERT INTO downloads(url, path, kind, state, added_at) VALUES (?, ?, ?, ?, ?)",
+            (url, path, kind, state, added_at)
+        ).lastrowid
+
+    def update_download(self, download_id, kind, state, received, total, error):
+        self.conn.execute(
+            "UPDATE downloads SET kind = ?, state = ?, received = ?, total = ?, error = ? WHERE id = ?",
+            (kind, state, received, total, error, download_id)
+        )
+
+    def delete_downloads(self, download_ids):
+        with self.transaction():
+            self.conn.executemany("DELETE FROM downloads WHERE id = ?",
+                                  [(download_id,) for download_id in download_ids])
+
+    # ---------- Sitzung ----------
+    def load_session(self):
+        return self.conn.execute(
+            "SELECT url, title, pinned, history FROM session_tabs ORDER BY position").fetchall()
+
+    def save_session(self, tabs, current):
+        """
+        Ersetzt die gesicherte Sitzung in einer Transaktion; nach einem
+        Absturz liegt also immer ein vollständiger Stand vor.
+        """
+        with self.transaction():
+            self.conn.execute("DELETE FROM session_tabs")
+            self.conn.executemany(
+                "INSERT INTO session_tabs(position, url, title, pinned, history) VALUES (?, ?, ?, ?, ?)",
+                [(i, url, title, int(pinned), history)
+                 for i, (url, title, pinned, history) in enumerate(tabs)]
+            )
+            self.set_setting("session_current_tab", current)
+
+    def close(self):
+        self.conn.close()
+
+class _StoreTransaction:
+    """
+    Kontextmanager für eine explizite Transaktion auf einer Autocommit-Verbindung.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+class Favorite:
+    __slots__ = ("id", "title", "url", "parent_id", "is_folder")
+
+    def __init__(self, fav_id, title, url="", parent_id=None, is_folder=False):
+        self.id = fav_id
+        self.title = title
+        self.url = url
+        self.parent_id = parent_id
+        self.is_folder = is_folder
+
+    def sort_key(self):
+        # Ordner zuerst, dann nach Titel; die ID macht den Schlüssel eindeutig
+        return (not self.is_folder, self.title.lower(), self.id)
+
+class FavoriteIndex:
+    """
+    Favoriten und Ordner nach stabiler ID.
+
+    by_url ist ein Hash-Index für die Duplikatprüfung; pro Ordner wird die
+    Kindliste sortiert gehalten (bisect), sodass Menüs ohne Sortieren
+    aufgebaut und einzelne Einträge an der richtigen Stelle eingefügt werden.
+    """
+    def __init__(self, favorites=()):
+        self.entries = {}
+        self.by_url = {}
+        self._children = {}
+        for fav in favorites:
+            self._link(fav, sort=False)
+        for keys in self._children.values():
+            keys.sort()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, fav_id):
+        return self.entries.get(fav_id)
+
+    def all(self):
+        return list(self.entries.values())
+
+    def bookmarks(self):
+        return [fav for fav in self.entries.values() if not fav.is_folder]
+
+    def contains_url(self, url):
+        return bool(self.by_url.get(url))
+
+    def children(self, parent_id):
+        return [self.entries[fav_id] for _, fav_id in self._children.get(parent_id, ())]
+
+    def next_sibling(self, fav):
+        """
+        Der in der Sortierung folgende Eintrag im selben Ordner (oder None).
+        """
+        keys = self._children.get(fav.parent_id, [])
+        i = bisect.bisect_right(keys, (fav.sort_key(), fav.id))
+        return self.entries[keys[i][1]] if i < len(keys) else None
+
+    def descendants(self, fav_id):
+        """
+        fav_id selbst und alle Einträge darunter (Tiefensuche).
+        """
+        result = []
+        stack = [fav_id]
+        while stack:
+            current = stack.pop()
+            result.append(self.entries[current])
+            stack.extend(child_id for _, child_id in self._children.get(current, ()))
+        return result
+
+    def folder_choices(self, exclude=None):
+        """
+        (ID, Pfad) aller Ordner für eine Auswahlliste; exclude samt
+        Unterordnern fehlt (ein Ordner kann nicht in sich selbst liegen).
+        """
+        choices = [(None, "Favoriten")]
+
+        def walk(parent_id, prefix):
+            for fav in self.children(parent_id):
+                if fav.is_folder and fav.id != exclude:
+                    path = f"{prefix} / {fav.title}"
+                    choices.append((fav.id, path))
+                    walk(fav.id, path)
+        walk(None, "Favoriten")
+        return choices
+
+    def add(self, fav):
+        self._link(fav)
+
+    def update(self, fav_id, title, url, parent_id):
+        fav = self.entries[fav_id]
+        self._unlink(fav)
+        fav.title = title
+        fav.url = url
+        fav.parent_id = parent_id
+        self._link(fav)
+        return fav
+
+    def remove(self, fav_id):
+        """
+        Entfernt einen Eintrag samt Inhalt; liefert die entfernten Einträge.
+        """
+        removed = self.descendants(fav_id)
+        for fav in removed:
+            self._unlink(fav)
+            del self.entries[fav.id]
+        return removed
+
+    def _link(self, fav, sort=True):
+        self.entries[fav.id] = fav
+        if not fav.is_folder:
+            self.by_url.setdefault(fav.url, set()).add(fav.id)
+        keys = self._children.setdefault(fav.parent_id, [])
+        if sort:
+            bisect.insort(keys, (fav.sort_key(), fav.id))
+        else:
+            keys.append((fav.sort_key(), fav.id))
+
+    def _unlink(self, fav):
+        if not fav.is_folder:
+            ids = self.by_url.get(fav.url)
+            if ids is not None:
+                ids.discard(fav.id)
+                if not ids:
+                    del self.by_url[fav.url]
+        keys = self._children[fav.parent_id]
+        del keys[bisect.bisect_left(keys, (fav.sort_key(), fav.id))]
+
+class HistoryRecord:
+    """
+    Ein aggregierter Chronik-Eintrag pro URL.
+    __slots__ und internierte Strings halten den Speicherbedarf klein.
+    """
+    __slots__ = ("url", "title", "visit_count", "last_visit", "frecency")
+
+    def __init__(self, url, title, visit_count=0, last_visit=0.0, frecency=0.0):
+        self.url = sys.intern(url)
+        self.title = sys.intern(title)
+        self.visit_count = visit_count
+        self.last_visit = last_visit
+        self.frecency = frecency
+
+    @staticmethod
+    def rank_for(frecency, last_visit):
+        """
+        Zeitunabhängiger Sortierschlüssel: log2 des zum Zeitpunkt last_visit
+        gültigen Frecency-Werts plus die seitdem "verstrichenen Halbwertszeiten".
+        Da alle Einträge gleich schnell zerfallen, bleibt die Reihenfolge
+        ohne Neuberechnung korrekt.
+        """
+        return math.log2(max(frecency, 1e-9)) + last_visit / HISTORY_FRECENCY_HALF_LIFE
+
+    def rank(self):
+        return HistoryRecord.rank_for(self.frecency, self.last_visit)
+
+    def register_visit(self, now):
+        elapsed = max(now - self.last_visit, 0.0)
+        self.frecency = self.frecency * 0.5 ** (elapsed / HISTORY_FRECENCY_HALF_LIFE) + 1.0
+        self.visit_count += 1
+        self.last_visit = now
+
+class HistoryEngine(QObject):
+    """
+    Chronik-Verwaltung: fasst Besuche pro URL zusammen, ignoriert schnelle
+    Wiederholungen (pushState, Reloads) und schreibt geänderte Einträge
+    gesammelt in den ProfileStore. Alte bzw. überzählige Einträge werden
+    regelmäßig in einem Hintergrund-Thread entfernt.
+
+    Einträge werden erst beim ersten Besuch in dieser Sitzung per
+    Primärschlüssel nachgeladen; der Start liest die Chronik nicht ein.
+    """
+    compacted = pyqtSignal(list)
+    records_removed = pyqtSignal(list)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        # Cache der in dieser Sitzung berührten Einträge
+        self.records = {}
+        self._dirty = set()
+        self._compacting = False
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(HISTORY_FLUSH_DELAY_MS)
+        self.flush_timer.timeout.connect(self.flush)
+
+        self.compacted.connect(self._apply_compaction)
+        self.compact_timer = QTimer(self)
+        self.compact_timer.setInterval(HISTORY_COMPACT_INTERVAL_MS)
+        self.compact_timer.timeout.connect(self.compact)
+        self.compact_timer.start()
+
+    def lookup(self, url):
+        record = self.records.get(url)
+        if record is None:
+            try:
+                row = self.store.get_history(url)
+            except sqlite3.Error as e:
+                print("Fehler beim Lesen der Chronik:", e)
+                row = None
+            if row is not None:
+                record = self.records[url] = HistoryRecord(url, *row)
+        return record
+
+    def add_visit(self, title, url, now=None):
+        """
+        Registriert einen Besuch. Liefert den HistoryRecord zurück.
+        """
+        if now is None:
+            now = time.time()
+        record = self.lookup(url)
+        if record is None:
+            record = HistoryRecord(url, title)
+            self.records[record.url] = record
+            record.register_visit(now)
+        elif now - record.last_visit >= HISTORY_COALESCE_SECONDS:
+            record.register_visit(now)
+        if title and record.title != title:
+            record.title = sys.intern(title)
+        self._mark_dirty(record.url)
+        return record
+
+    def update_title(self, url, title):
+        record = self.lookup(url)
+        if record is None or not title or record.title == title:
+            return
+        record.title = sys.intern(title)
+        self._mark_dirty(url)
+
+    def _mark_dirty(self, url):
+        self._dirty.add(url)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        if not self._dirty:
+            return
+        records = [self.records[url] for url in self._dirty if url in self.records]
+        self._dirty.clear()
+        try:
+            self.store.upsert_history(records)
+        except sqlite3.Error as e:
+            print("Fehler beim Speichern der Chronik:", e)
+
+    # ---------- Aufbewahrung ----------
+    def compact(self):
+        if self._compacting:
+            return
+        self.flush()
+        self._compacting = True
+        threading.Thread(target=self._compact_worker, daemon=True).start()
+
+    def _compact_worker(self):
+        # Eigene Verbindung: WAL erlaubt parallele Zugriffe zum GUI-Thread
+        removed = []
+        try:
+            conn = sqlite3.connect(self.store.path, isolation_level=None, timeout=10)
+            try:
+                cutoff = time.time() - HISTORY_MAX_AGE_DAYS * 24 * 3600
+                conn.execute("BEGIN")
+                removed = conn.execute(
+                    "SELECT url, last_visit FROM history WHERE last_visit < ?", (cutoff,)
+                ).fetchall()
+                conn.execute("DELETE FROM history WHERE last_visit < ?", (cutoff,))
+                overflow = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0] - HISTORY_MAX_ENTRIES
+                if overflow > 0:
+                    victims = conn.execute(
+                        "SELECT url, last_visit FROM history ORDER BY rank LIMIT ?", (overflow,)
+                    ).fetchall()
+                    conn.executemany("DELETE FROM history WHERE url = ?", [(url,) for url, _ in victims])
+                    removed.extend(victims)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print("Fehler bei der Chronik-Bereinigung:", e)
+            removed = []
+        self.compacted.emit(removed)
+
+    def _apply_compaction(self, removed):
+        self._compacting = False
+        dropped = []
+        for url, last_visit in removed:
+            record = self.records.get(url)
+            # Zwischenzeitlich erneut besucht? Dann behalten und wieder speichern
+            if record is None:
+                dropped.append(url)
+            elif record.last_visit <= last_visit:
+                del self.records[url]
+                dropped.append(url)
+            else:
+                self._mark_dirty(url)
+        if dropped:
+            self.records_removed.emit(dropped)
+
+class CompletionEntry:
+    __slots__ = ("url", "title", "history_rank", "favorite", "added_rank", "text", "tokens")
+
+    def __init__(self, url, title, history_rank=None, favorite=False):
+        self.url = url
+        self.title = title
+        self.history_rank = history_rank
+        self.favorite = favorite
+        # Nur Favorit, nie besucht: zählt wie ein einzelner Besuch beim Anlegen
+        self.added_rank = HistoryRecord.rank_for(1.0, time.time())
+        self.text = f"{title} {url}".lower()
+        self.tokens = CompletionIndex.tokenize(self.text)
+
+    @property
+    def rank(self):
+        rank = self.history_rank
+        if rank is None:
+            rank = self.added_rank
+        if self.favorite:
+            rank += COMPLETION_FAVORITE_BONUS
+        return rank
+
+class CompletionIndex:
+    """
+    In-Memory-Index für die URL-Leiste über Chronik und Favoriten.
+
+    Jedes Token aus Titel und URL zeigt auf die Menge der passenden URLs;
+    die sortierte Tokenliste liefert per bisect alle Tokens mit einem
+    bestimmten Präfix. Für Präfixe mit sehr vielen Treffern (z. B. "g")
+    wird eine nach Frecency sortierte Bestenliste vorgehalten und bei
+    jeder Änderung punktuell nachgeführt.
+    """
+    TOKEN_RE = re.compile(r"\w+")
+
+    def __init__(self):
+        self.entries = {}
+        self._postings = {}
+        self._tokens = []
+        self._top = {}
+
+    @staticmethod
+    def tokenize(text):
+        return tuple(
+            t for t in dict.fromkeys(CompletionIndex.TOKEN_RE.findall(text.lower()))
+            if t not in COMPLETION_IGNORED_TOKENS
+        )
+
+    @classmethod
+    def build(cls, history_rows, favorites):
+        """
+        Baut einen kompletten Index (läuft im Hintergrund-Thread).
+        history_rows: Iterable aus (url, title, rank), favorites: Liste von Dicts.
+        """
+        index = cls()
+        for url, title, rank in history_rows:
+            index._insert(CompletionEntry(url, title, history_rank=rank))
+        for fav in favorites:
+            index.update(fav["url"], fav["title"], favorite=True)
+        index._tokens = sorted(index._postings)
+        index._precompute_top()
+        return index
+
+    def _insert(self, entry):
+        self.entries[entry.url] = entry
+        for token in entry.tokens:
+            urls = self._postings.get(token)
+            if urls is None:
+                self._postings[token] = {entry.url}
+            else:
+                urls.add(entry.url)
+
+    def _precompute_top(self):
+        # Ein- und Zwei-Zeichen-Präfixe werden garantiert häufig getippt:
+        # in Rangfolge durchlaufen und jede Liste bis COMPLETION_TOP_K füllen
+        ranked = sorted(self.entries.values(), key=lambda e: e.rank, reverse=True)
+        top = {}
+        full = set()
+        for entry in ranked:
+            prefixes = {token[:1] for token in entry.tokens}
+            prefixes.update(token[:2] for token in entry.tokens if len(token) > 1)
+            prefixes -= full
+            for prefix in prefixes:
+                lst = top.get(prefix)
+                if lst is None:
+                    top[prefix] = [entry.url]
+                    continue
+                lst.append(entry.url)
+                if len(lst) >= COMPLETION_TOP_K:
+                    full.add(prefix)
+        self._top = top
+
+    # ---------- Änderungen ----------
+    def update(self, url, title=None, history_rank=None, favorite=None):
+        """
+        Legt einen Eintrag an oder aktualisiert Titel, Chronik-Rang bzw.
+        Favoriten-Status. Kosten: O(Anzahl Tokens des Eintrags).
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            entry = CompletionEntry(url, title or url, history_rank, bool(favorite))
+            self._insert(entry)
+            for token in entry.tokens:
+                if len(self._postings[token]) == 1:
+                    bisect.insort(self._tokens, token)
+            self._patch_top(entry)
+            return
+
+        if title is not None and title != entry.title:
+            self._invalidate_top(entry)
+            self._remove_tokens(entry)
+            entry.title = title
+            entry.text = f"{title} {url}".lower()
+            entry.tokens = CompletionIndex.tokenize(entry.text)
+            self._insert(entry)
+            for token in entry.tokens:
+                if len(self._postings[token]) == 1:
+                    bisect.insort(self._tokens, token)
+        if history_rank is not None:
+            entry.history_rank = history_rank
+        if favorite is not None and favorite != entry.favorite:
+            if not favorite:
+                # Rang sinkt: betroffene Bestenlisten neu berechnen lassen
+                self._invalidate_top(entry)
+            entry.favorite = favorite
+        if entry.history_rank is None and not entry.favorite:
+            self.remove(url)
+            return
+        self._patch_top(entry)
+
+    def remove_history(self, url):
+        """
+        Entfernt den Chronik-Anteil eines Eintrags (z. B. nach der Bereinigung);
+        Favoriten bleiben erhalten.
+        """
+        entry = self.entries.get(url)
+        if entry is None:
+            return
+        if not entry.favorite:
+            self.remove(url)
+            return
+        self._invalidate_top(entry)
+        entry.history_rank = None
+
+    def remove(self, url):
+        entry = self.entries.pop(url, None)
+        if entry is None:
+            return
+        self._remove_tokens(entry)
+        self._invalidate_top(entry)
+
+    def _remove_tokens(self, entry):
+        for token in entry.tokens:
+            urls = self._postings.get(token)
+            if urls is None:
+                continue
+            urls.discard(entry.url)
+            if not urls:
+                del self._postings[token]
+                i = bisect.bisect_left(self._tokens, token)
+                if i < len(self._tokens) and self._tokens[i] == token:
+                    del self._tokens[i]
+
+    def _prefixes(self, entry):
+        for token in entry.tokens:
+            for n in range(1, len(token) + 1):
+                yield token[:n]
+
+    def _patch_top(self, entry):
+        # Ränge steigen bei Besuchen nur an: den Eintrag in jede betroffene
+        # Bestenliste einsortieren und auf COMPLETION_TOP_K kürzen
+        rank = entry.rank
+        for prefix in self._prefixes(entry):
+            lst = self._top.get(prefix)
+            if lst is None:
+                continue
+            if entry.url in lst:
+                lst.remove(entry.url)
+            pos = 0
+            while pos < len(lst) and self.entries[lst[pos]].rank >= rank:
+                pos += 1
+            if pos < COMPLETION_TOP_K:
+                lst.insert(pos, entry.url)
+                del lst[COMPLETION_TOP_K:]
+
+    def _invalidate_top(self, entry):
+        for prefix in self._prefixes(entry):
+            lst = self._top.get(prefix)
+            if lst is not None and entry.url in lst:
+                del self._top[prefix]
+
+    # ---------- Abfrage ----------
+    def _token_range(self, prefix):
+        lo = bisect.bisect_left(self._tokens, prefix)
+        hi = bisect.bisect_left(self._tokens, prefix + "\uffff")
+        return lo, hi
+
+    def _estimate(self, prefix):
+        cached = self._top.get(prefix)
+        if cached is not None and len(cached) >= COMPLETION_TOP_K:
+            # Bestenliste vorhanden: Präfix ist häufig
+            return float("inf")
+        lo, hi = self._token_range(prefix)
+        return sum(len(self._postings[t]) for t in self._tokens[lo:hi])
+
+    def query(self, text, limit=COMPLETION_MAX_RESULTS):
+        """
+        Liefert bis zu limit CompletionEntries, deren Tokens mit den Wörtern
+        der Eingabe beginnen, absteigend nach Frecency sortiert.
+        """
+        words = CompletionIndex.tokenize(text)
+        if not words:
+            return []
+        # Vorberechnete Bestenlisten zuerst: liefert die gefilterte Bestenliste
+        # eines Worts genug Treffer, sind das exakt die bestbewerteten
+        for word in sorted(words, key=len, reverse=True):
+            cached = self._top.get(word)
+            if cached is None:
+                continue
+            others = [w for w in words if w != word]
+            result = [url for url in cached if self._matches(url, others)][:limit]
+            if len(result) == limit or len(cached) < COMPLETION_TOP_K:
+                return [self.entries[url] for url in result]
+
+        # Sonst liefert das selektivste Wort die Kandidaten, die übrigen filtern nur noch
+        key = min(words, key=self._estimate)
+        others = [w for w in words if w != key]
+        candidates = self._candidates(key)
+
+        if len(candidates) > COMPLETION_CACHE_THRESHOLD:
+            # Häufiger Präfix: Bestenliste anlegen, weitere Tastendrücke sind dann billig
+            cached = heapq.nlargest(
+                COMPLETION_TOP_K, candidates, key=lambda u: self.entries[u].rank)
+            self._top[key] = cached
+            result = [url for url in cached if self._matches(url, others)][:limit]
+            if len(result) == limit:
+                return [self.entries[url] for url in result]
+
+        if others:
+            candidates = [url for url in candidates if self._matches(url, others)]
+        best = heapq.nlargest(limit, candidates, key=lambda u: self.entries[u].rank)
+        return [self.entries[url] for url in best]
+
+    def _candidates(self, prefix):
+        lo, hi = self._token_range(prefix)
+        candidates = set()
+        for token in self._tokens[lo:hi]:
+            candidates |= self._postings[token]
+        return candidates
+
+    def _matches(self, url, words):
+        # Dieselbe Regel wie für das Schlüsselwort: ein Token beginnt mit dem Wort
+        tokens = self.entries[url].tokens
+        return all(any(t.startswith(w) for t in tokens) for w in words)
+
+class CompletionIndexBuilder(QObject):
+    """
+    Baut den CompletionIndex in einem Hintergrund-Thread mit eigener
+    SQLite-Verbindung auf, damit der Programmstart nicht blockiert.
+    """
+    finished = pyqtSignal(object)
+
+    def __init__(self, db_path, favorites, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.favorites = [dict(fav) for fav in favorites]
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            try:
+                rows = conn.execute("SELECT url, title, rank FROM history").fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print("Fehler beim Aufbau des Vorschlagsindex:", e)
+            rows = []
+        self.finished.emit(CompletionIndex.build(rows, self.favorites))
+
+class ProfileLoader(QObject):
+    """
+    Liest Favoriten und Zugangsdaten in einem Hintergrund-Thread mit
+    eigener SQLite-Verbindung; finished liefert das Ergebnis von
+    ProfileStore.read_profile (leer bei einem Fehler).
+    """
+    finished = pyqtSignal(object)
+
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            try:
+                data = ProfileStore.read_profile(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print("Fehler beim Laden der Favoriten und Zugangsdaten:", e)
+            data = {"favorites": [], "credentials": {}}
+        try:
+            self.finished.emit(data)
+        except RuntimeError:
+            pass
+
+# --------------------------------------------------
+#  HTTP-Session (gemeinsamer Verbindungspool für alle Worker-Threads)
+# --------------------------------------------------
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    """
+    Liefert eine prozessweit geteilte requests.Session mit Verbindungspool,
+    damit parallele Abrufe Keep-Alive-Verbindungen wiederverwenden.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
+
+# --------------------------------------------------
+#  Manifest-Cache (TTL + bedingte Anfragen)
+# --------------------------------------------------
+class CachedManifest:
+    """
+    Ein gecachtes Manifest samt Validierungsdaten.
+    Das geparste Manifest (HLS oder DASH) wird beim ersten Zugriff
+    berechnet und bleibt im Speicher-Cache erhalten.
+    """
+    __slots__ = ("url", "text", "etag", "last_modified", "expires", "_parsed")
+
+    def __init__(self, url, text, etag=None, last_modified=None, expires=0.0):
+        self.url = url
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+        self._parsed = None
+
+    @property
+    def parsed(self):
+        if self._parsed is None:
+            self._parsed = parse_manifest(self.text, self.url)
+        return self._parsed
+
+    def is_fresh(self, now):
+        return now < self.expires
+
+    def live_reload_interval(self):
+        """
+        Für Live-Manifeste das sinnvolle Neulade-Intervall in Sekunden, sonst None.
+        """
+        parsed = self.parsed
+        if isinstance(parsed, HLSMediaPlaylist) and not parsed.endlist:
+            return max(parsed.target_duration / 2, MANIFEST_LIVE_MIN_TTL)
+        if isinstance(parsed, DashManifest) and parsed.dynamic:
+            return max(parsed.minimum_update_period or 2 * MANIFEST_LIVE_MIN_TTL, MANIFEST_LIVE_MIN_TTL)
+        return None
+
+    def to_json(self):
+        return {"url": self.url, "text": self.text, "etag": self.etag,
+                "last_modified": self.last_modified, "expires": self.expires}
+
+class ManifestCache:
+    """
+    LRU-Cache für Manifeste im Speicher und auf der Platte.
+
+    Frische Einträge werden ohne Netzwerkzugriff geliefert; abgelaufene
+    Einträge mit ETag/Last-Modified werden per bedingter Anfrage
+    revalidiert (304 = nur Header). Cache-Control/Expires werden beachtet,
+    Live-Playlists bekommen eine kurze, VOD- und Master-Playlists eine
+    längere Standard-Lebensdauer. Thread-sicher (Worker-Pool).
+    """
+    def __init__(self, cache_dir=MANIFEST_CACHE_DIR,
+                 memory_entries=MANIFEST_CACHE_MEMORY_ENTRIES,
+                 disk_entries=MANIFEST_CACHE_DISK_ENTRIES):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_count = None
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "errors": 0}
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def fetch(self, url):
+        """
+        Liefert ein CachedManifest für url. Wirft requests.RequestException,
+        wenn weder Netz noch (veralteter) Cache-Eintrag verfügbar sind.
+        """
+        now = time.time()
+        entry = self._lookup(url)
+        if entry is not None and entry.is_fresh(now):
+            self._count("hits")
+            return entry
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        try:
+            r = get_http_session().get(url, headers=headers, timeout=HLS_REQUEST_TIMEOUT)
+            if r.status_code == 304 and entry is not None:
+                entry.expires = self._expiry(r.headers, entry, time.time())
+                self._count("revalidated")
+                self._store(entry)
+                return entry
+            r.raise_for_status()
+        except requests.RequestException:
+            self._count("errors")
+            if entry is not None:
+                # Lieber veraltet als gar nicht
+                return entry
+            raise
+
+        self._count("misses")
+        entry = CachedManifest(url, r.text, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        entry.expires = self._expiry(r.headers, entry, time.time())
+        if "no-store" not in r.headers.get("Cache-Control", "").lower():
+            self._store(entry)
+        return entry
+
+    @staticmethod
+    def _expiry(headers, entry, now):
+        cache_control = headers.get("Cache-Control", "").lower()
+        ttl = None
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            ttl = 0
+        else:
+            match = re.search(r"max-age\s*=\s*(\d+)", cache_control)
+            if match:
+                ttl = int(match.group(1))
+            elif headers.get("Expires"):
+                try:
+                    expires = email.utils.parsedate_to_datetime(headers["Expires"]).timestamp()
+                    ttl = max(expires - now, 0)
+                except (TypeError, ValueError):
+                    ttl = 0
+
+        live_ttl = entry.live_reload_interval()
+        if live_ttl is not None:
+            ttl = live_ttl if ttl is None else min(ttl, live_ttl)
+        elif ttl is None:
+            ttl = MANIFEST_VOD_TTL
+        return now + ttl
+
+    # ---------- Speicher / Platte ----------
+    def _disk_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _lookup(self, url):
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+                return entry
+        path = self._disk_path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            os.utime(path)  # LRU-Reihenfolge auf der Platte
+        except (OSError, ValueError):
+            return None
+        entry = CachedManifest(data["url"], data["text"], data.get("etag"),
+                               data.get("last_modified"), data.get("expires", 0.0))
+        self._remember(entry)
+        return entry
+
+    def _remember(self, entry):
+        with self._lock:
+            self._memory[entry.url] = entry
+            self._memory.move_to_end(entry.url)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, entry):
+        self._remember(entry)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._disk_path(entry.url)
+            is_new = not os.path.exists(path)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry.to_json(), f)
+            os.replace(tmp_path, path)
+            if is_new:
+                self._trim_disk()
+        except OSError as e:
+            print("Fehler beim Schreiben des Manifest-Caches:", e)
+
+    def _trim_disk(self):
+        with self._lock:
+            if self._disk_count is None:
+                self._disk_count = sum(1 for n in os.listdir(self.cache_dir) if n.endswith(".json"))
+            else:
+                self._disk_count += 1
+            if self._disk_count <= self.disk_entries:
+                return
+            files = [os.path.join(self.cache_dir, n) for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+            files.sort(key=lambda p: os.path.getmtime(p))
+            # Auf 90 % kürzen, damit nicht bei jedem Eintrag aufgeräumt wird
+            excess = len(files) - int(self.disk_entries * 0.9)
+            for path in files[:max(excess, 0)]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._disk_count = len(files) - max(excess, 0)
+
+_manifest_cache = None
+_manifest_cache_lock = threading.Lock()
+
+def get_manifest_cache():
+    global _manifest_cache
+    with _manifest_cache_lock:
+        if _manifest_cache is None:
+            _manifest_cache = ManifestCache()
+        return _manifest_cache
+
+# --------------------------------------------------
+#  Manifeste: HLS (Master/Media-Playlist) und DASH (MPD)
+# --------------------------------------------------
+HLS_ATTRIBUTE_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+MANIFEST_URL_RE = re.compile(r'\.(m3u8|m3u|mpd)(?=$|[?#&/;])', re.IGNORECASE)
+
+def manifest_kind(url):
+    """
+    "hls", "dash" oder None – anhand der Dateiendung irgendwo in Pfad
+    oder Query (z. B. "master.m3u8?token=…" oder "play?file=a.mpd").
+    """
+    match = MANIFEST_URL_RE.search(url)
+    if not match:
+        return None
+    return "dash" if match.group(1).lower() == "mpd" else "hls"
+
+def parse_hls_attributes(text):
+    attrs = {}
+    for key, value in HLS_ATTRIBUTE_RE.findall(text):
+        if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+            value = value[1:-1]
+        attrs[key] = value
+    return attrs
+
+def parse_iso_duration(text):
+    """
+    Wandelt eine ISO-8601-Dauer (z. B. "PT1H2M3.5S") in Sekunden um.
+    """
+    match = re.fullmatch(
+        r"P(?:(\d+(?:\.\d+)?)D)?(?:T(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?)?",
+        (text or "").strip())
+    if not match:
+        return None
+    days, hours, minutes, seconds = (float(g) if g else 0.0 for g in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+class StreamVariant:
+    """
+    Eine wählbare Qualitätsstufe (HLS-Variante bzw. DASH-Representation).
+    """
+    __slots__ = ("url", "bandwidth", "average_bandwidth", "width", "height",
+                 "codecs", "frame_rate", "audio_group")
+
+    def __init__(self, url, bandwidth=0, average_bandwidth=0, width=0, height=0,
+                 codecs="", frame_rate=0.0, audio_group=None):
+        self.url = url
+        self.bandwidth = bandwidth
+        self.average_bandwidth = average_bandwidth
+        self.width = width
+        self.height = height
+        self.codecs = codecs
+        self.frame_rate = frame_rate
+        self.audio_group = audio_group
+
+    @property
+    def effective_bandwidth(self):
+        return self.average_bandwidth or self.bandwidth
+
+    def label(self):
+        parts = []
+        if self.height:
+            parts.append(f"{self.width}x{self.height}")
+        if self.frame_rate:
+            parts.append(f"{self.frame_rate:g} fps")
+        if self.effective_bandwidth:
+            parts.append(f"{self.effective_bandwidth / 1e6:.1f} Mbit/s")
+        if self.codecs:
+            parts.append(self.codecs)
+        return " · ".join(parts)
+
+class HLSKey:
+    __slots__ = ("method", "uri", "iv")
+
+    def __init__(self, method, uri=None, iv=None):
+        self.method = method
+        self.uri = uri
+        self.iv = iv
+
+class MediaSegment:
+    """
+    Ein Segment einer HLS-Media-Playlist. byterange ist (Länge, Offset) oder None,
+    init ist das zugehörige #EXT-X-MAP-Segment (ebenfalls ein MediaSegment).
+    """
+    __slots__ = ("url", "duration", "sequence", "byterange", "key", "init", "discontinuity")
+
+    def __init__(self, url, duration=0.0, sequence=0, byterange=None, key=None,
+                 init=None, discontinuity=False):
+        self.url = url
+        self.duration = duration
+        self.sequence = sequence
+        self.byterange = byterange
+        self.key = key
+        self.init = init
+        self.discontinuity = discontinuity
+
+    def range_header(self):
+        if self.byterange is None:
+            return {}
+        length, offset = self.byterange
+        return {"Range": f"bytes={offset}-{offset + length - 1}"}
+
+class HLSMasterPlaylist:
+    def __init__(self, url):
+        self.url = url
+        self.variants = []
+        # GROUP-ID -> Liste der Audio-Renditions (Attribut-Dicts mit absoluter URI)
+        self.audio_groups = {}
+
+    def has_external_audio(self, variant):
+        """
+        True, wenn der Ton der Variante in einer eigenen Playlist liegt –
+        die Sub-Playlist allein wäre dann stumm.
+        """
+        return any(r.get("URI") for r in self.audio_groups.get(variant.audio_group, ()))
+
+class HLSMediaPlaylist:
+    def __init__(self, url):
+        self.url = url
+        self.segments = []
+        self.target_duration = 0
+        self.media_sequence = 0
+        self.endlist = False
+        self.playlist_type = None
+
+class DashManifest:
+    def __init__(self, url):
+        self.url = url
+        self.variants = []
+        self.has_audio = False
+        self.dynamic = False
+        self.minimum_update_period = None
+
+def parse_hls(lines, manifest_url):
+    """
+    Zeilenweiser HLS-Parser für Master- und Media-Playlists.
+    lines kann ein beliebiges Iterable sein (z. B. Response.iter_lines()).
+    """
+    master = HLSMasterPlaylist(manifest_url)
+    media = HLSMediaPlaylist(manifest_url)
+    stream_inf = None
+    duration = None
+    byterange = None
+    discontinuity = False
+    key = None
+    init = None
+    # Ende des letzten Byte-Bereichs je Ressource (für BYTERANGE ohne Offset)
+    range_ends = {}
+    sequence = None
+
+    for raw in lines:
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", "replace")
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            stream_inf = parse_hls_attributes(line[18:])
+        elif line.startswith("#EXT-X-MEDIA:"):
+            attrs = parse_hls_attributes(line[13:])
+            if attrs.get("TYPE") == "AUDIO":
+                if attrs.get("URI"):
+                    attrs["URI"] = urljoin(manifest_url, attrs["URI"])
+                master.audio_groups.setdefault(attrs.get("GROUP-ID"), []).append(attrs)
+        elif line.startswith("#EXT-X-TARGETDURATION:"):
+            media.target_duration = float(line[22:] or 0)
+        elif line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+            media.media_sequence = int(line[22:] or 0)
+        elif line.startswith("#EXT-X-PLAYLIST-TYPE:"):
+            media.playlist_type = line[21:]
+        elif line.startswith("#EXT-X-ENDLIST"):
+            media.endlist = True
+        elif line.startswith("#EXT-X-KEY:"):
+            attrs = parse_hls_attributes(line[11:])
+            method = attrs.get("METHOD", "NONE")
+            if method == "NONE":
+                key = None
+            else:
+                iv = attrs.get("IV")
+                key = HLSKey(
+                    method,
+                    urljoin(manifest_url, attrs["URI"]) if attrs.get("URI") else None,
+                    bytes.fromhex(iv[2:]) if iv and iv[:2].lower() == "0x" else None,
+                )
+        elif line.startswith("#EXT-X-MAP:"):
+            attrs = parse_hls_attributes(line[11:])
+            map_range = None
+            if attrs.get("BYTERANGE"):
+                length, _, offset = attrs["BYTERANGE"].partition("@")
+                map_range = (int(length), int(offset or 0))
+            init = MediaSegment(urljoin(manifest_url, attrs.get("URI", "")), byterange=map_range, key=key)
+        elif line.startswith("#EXTINF:"):
+            duration = float(line[8:].split(",", 1)[0] or 0)
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            length, _, offset = line[17:].partition("@")
+            byterange = (int(length), int(offset) if offset else None)
+        elif line.startswith("#EXT-X-DISCONTINUITY"):
+            discontinuity = True
+        elif line.startswith("#"):
+            continue
+        elif stream_inf is not None:
+            width = height = 0
+            resolution = stream_inf.get("RESOLUTION", "")
+            if "x" in resolution:
+                w, _, h = resolution.lower().partition("x")
+                width, height = int(w or 0), int(h or 0)
+            master.variants.append(StreamVariant(
+                urljoin(manifest_url, line),
+                bandwidth=int(stream_inf.get("BANDWIDTH", 0) or 0),
+                average_bandwidth=int(stream_inf.get("AVERAGE-BANDWIDTH", 0) or 0),
+                width=width, height=height,
+                codecs=stream_inf.get("CODECS", ""),
+                frame_rate=float(stream_inf.get("FRAME-RATE", 0) or 0),
+                audio_group=stream_inf.get("AUDIO"),
+            ))
+            stream_inf = None
+        elif duration is not None:
+            url = urljoin(manifest_url, line)
+            if sequence is None:
+                sequence = media.media_sequence
+            if byterange is not None:
+                length, offset = byterange
+                if offset is None:
+                    offset = range_ends.get(url, 0)
+                range_ends[url] = offset + length
+                byterange = (length, offset)
+            media.segments.append(MediaSegment(
+                url, duration, sequence, byterange, key, init, discontinuity))
+            sequence += 1
+            duration = None
+            byterange = None
+            discontinuity = False
+
+    return master if master.variants else media
+
+def parse_dash_mpd(data, manifest_url):
+    """
+    Streaming-Parser (iterparse) für DASH-MPDs. Liefert die Video-
+    Representations als StreamVariants; verarbeitete Elemente werden
+    sofort freigegeben, damit auch große MPDs wenig Speicher kosten.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    manifest = DashManifest(manifest_url)
+    stack = []
+
+    def local(tag):
+        return tag.rsplit("}", 1)[-1]
+
+    def base_url(element, inherited):
+        for child in element:
+            if local(child.tag) == "BaseURL" and child.text:
+                return urljoin(inherited, child.text.strip())
+        return inherited
+
+    try:
+        for event, element in ET.iterparse(io.BytesIO(data), events=("start", "end")):
+            tag = local(element.tag)
+            if event == "start":
+                stack.append(element)
+                if tag == "MPD":
+                    manifest.dynamic = element.get("type") == "dynamic"
+                    manifest.minimum_update_period = parse_iso_duration(element.get("minimumUpdatePeriod"))
+                continue
+            stack.pop()
+            if tag != "Representation":
+                continue
+
+            adaptation = next((e for e in reversed(stack) if local(e.tag) == "AdaptationSet"), None)
+            adaptation_attrs = adaptation.attrib if adaptation is not None else {}
+            mime = element.get("mimeType") or adaptation_attrs.get("mimeType", "")
+            content_type = adaptation_attrs.get("contentType", "")
+            if mime.startswith("audio") or content_type == "audio":
+                manifest.has_audio = True
+            elif mime.startswith("video") or content_type == "video" or element.get("height"):
+                url = manifest_url
+                for ancestor in stack:
+                    if local(ancestor.tag) in ("MPD", "Period", "AdaptationSet"):
+                        url = base_url(ancestor, url)
+                url = base_url(element, url)
+                frame_rate = element.get("frameRate") or adaptation_attrs.get("frameRate") or "0"
+                num, _, den = frame_rate.partition("/")
+                manifest.variants.append(StreamVariant(
+                    url,
+                    bandwidth=int(element.get("bandwidth", 0) or 0),
+                    width=int(element.get("width") or adaptation_attrs.get("width") or 0),
+                    height=int(element.get("height") or adaptation_attrs.get("height") or 0),
+                    codecs=element.get("codecs") or adaptation_attrs.get("codecs", ""),
+                    frame_rate=float(num or 0) / float(den or 1),
+                ))
+            element.clear()
+    except (ET.ParseError, ValueError) as e:
+        print("Fehler beim Parsen des MPD:", e)
+    return manifest
+
+def parse_manifest(text, manifest_url):
+    """
+    Erkennt das Format am Inhalt: HLSMasterPlaylist, HLSMediaPlaylist,
+    DashManifest oder None.
+    """
+    head = text.lstrip()[:4096]
+    if head.startswith("#EXTM3U"):
+        return parse_hls(text.splitlines(), manifest_url)
+    if "<MPD" in head:
+        return parse_dash_mpd(text, manifest_url)
+    return None
+
+# --------------------------------------------------
+#  Durchsatzmessung und Variantenwahl
+# --------------------------------------------------
+class ThroughputEstimator:
+    """
+    Gleitender Mittelwert (EWMA) der gemessenen Download-Rate in bit/s.
+    Zu kleine Stichproben werden ignoriert, da dort die Latenz dominiert.
+    """
+    def __init__(self, alpha=THROUGHPUT_EWMA_ALPHA, min_bytes=THROUGHPUT_MIN_SAMPLE_BYTES):
+        self.alpha = alpha
+        self.min_bytes = min_bytes
+        self._estimate = None
+        self._lock = threading.Lock()
+
+    def record(self, nbytes, seconds):
+        if nbytes < self.min_bytes or seconds <= 0:
+            return
+        sample = nbytes * 8 / seconds
+        with self._lock:
+            if self._estimate is None:
+                self._estimate = sample
+            else:
+                self._estimate = self.alpha * sample + (1 - self.alpha) * self._estimate
+
+    def estimate(self):
+        with self._lock:
+            return self._estimate
+
+throughput_estimator = ThroughputEstimator()
+
+def probe_throughput(segment):
+    """
+    Misst den Durchsatz anhand der ersten THROUGHPUT_PROBE_BYTES eines Segments.
+    """
+    try:
+        start = time.perf_counter()
+        received = 0
+        with get_http_session().get(segment.url, headers=segment.range_header(), stream=True,
+                                    timeout=HLS_REQUEST_TIMEOUT) as r:
+            r.raise_for_status()
+            for chunk in r.iter_content(64 * 1024):
+                received += len(chunk)
+                if received >= THROUGHPUT_PROBE_BYTES or time.perf_counter() - start > THROUGHPUT_PROBE_SECONDS:
+                    break
+        throughput_estimator.record(received, time.perf_counter() - start)
+    except requests.RequestException as e:
+        print("Fehler bei der Durchsatzmessung:", e)
+
+def select_variant(variants, throughput=None, max_height=0):
+    """
+    Wählt die Variante mit der höchsten Bitrate, die
+    - die Auflösungsgrenze max_height (0 = unbegrenzt) einhält und
+    - mit VARIANT_THROUGHPUT_SAFETY * throughput (bit/s) auskommt.
+    Passt keine, wird die sparsamste Variante innerhalb der Grenze genommen.
+    """
+    capped = [v for v in variants if not max_height or not v.height or v.height <= max_height]
+    if not capped:
+        capped = [min(variants, key=lambda v: (v.height, v.effective_bandwidth))]
+    quality = lambda v: (v.effective_bandwidth, v.height, v.frame_rate)
+    if throughput:
+        budget = throughput * VARIANT_THROUGHPUT_SAFETY
+        fitting = [v for v in capped if v.effective_bandwidth <= budget]
+        if fitting:
+            return max(fitting, key=quality)
+        return min(capped, key=quality)
+    return max(capped, key=quality)
+
+class ResolvedStream:
+    """
+    Ergebnis der Auflösung: abzuspielende URL, zusätzliche VLC-Medienoptionen
+    und eine Beschreibung der gewählten Variante.
+    """
+    __slots__ = ("url", "options", "label")
+
+    def __init__(self, url, options=None, label=""):
+        self.url = url
+        self.options = options or []
+        self.label = label
+
+def adaptive_options(variant):
+    """
+    VLC-Optionen, damit VLCs adaptive Wiedergabe (DASH bzw. HLS mit getrennter
+    Tonspur) höchstens die gewählte Variante verwendet.
+    """
+    if variant.height:
+        return [f":adaptive-maxwidth={variant.width}", f":adaptive-maxheight={variant.height}",
+                ":adaptive-logic=highest"]
+    # Ohne Auflösung: feste Bandbreite in kB/s vorgeben
+    return [":adaptive-logic=fixedrate", f":adaptive-bw={max(variant.effective_bandwidth // 8000, 1)}"]
+
+def resolve_stream(url, max_height=0):
+    """
+    Löst eine Manifest-URL in die passende Variante auf. Läuft in einem
+    Worker-Thread (siehe ManifestResolveBatch). Bei Fehlern oder
+    unbekannten Formaten bleibt die ursprüngliche URL gültig.
+    """
+    if manifest_kind(url) is None:
+        return ResolvedStream(url)
+    try:
+        manifest = get_manifest_cache().fetch(url)
+    except requests.RequestException as e:
+        print("Fehler beim Laden des Manifests:", e)
+        return ResolvedStream(url)
+
+    parsed = manifest.parsed
+    if isinstance(parsed, HLSMasterPlaylist):
+        if throughput_estimator.estimate() is None:
+            # Noch kein Messwert: die ohne Messung gewählte Variante anmessen
+            candidate = select_variant(parsed.variants, None, max_height)
+            try:
+                media = get_manifest_cache().fetch(candidate.url).parsed
+                if isinstance(media, HLSMediaPlaylist) and media.segments:
+                    probe_throughput(media.segments[0])
+            except requests.RequestException as e:
+                print("Fehler beim Laden der Media-Playlist:", e)
+        variant = select_variant(parsed.variants, throughput_estimator.estimate(), max_height)
+        if parsed.has_external_audio(variant):
+            return ResolvedStream(url, adaptive_options(variant), variant.label())
+        return ResolvedStream(variant.url, [], variant.label())
+    if isinstance(parsed, DashManifest) and parsed.variants:
+        variant = select_variant(parsed.variants, throughput_estimator.estimate(), max_height)
+        return ResolvedStream(url, adaptive_options(variant), variant.label())
+    return ResolvedStream(url)
+
+# --------------------------------------------------
+#  Bandbreitenbegrenzung für Downloads
+# --------------------------------------------------
+class TokenBucket:
+    """
+    Token-Bucket, den sich alle Download-Threads teilen.
+
+    consume() blockiert den aufrufenden Worker-Thread, bis genug Guthaben
+    (Byte) angespart ist; Spitzen sind auf eine Sekunde Guthaben begrenzt.
+    Rate 0 bedeutet unbegrenzt.
+    """
+    def __init__(self, rate=0):
+        self._lock = threading.Lock()
+        self.rate = 0
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = max(int(rate or 0), 0)
+            self._tokens = float(self.rate)
+            self._last = time.monotonic()
+
+    @property
+    def active(self):
+        return self.rate > 0
+
+    def consume(self, nbytes):
+        with self._lock:
+            if self.rate <= 0:
+                return
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._last) * self.rate, self.rate)
+            self._last = now
+            self._tokens -= nbytes
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+download_rate_limiter = TokenBucket()
+
+# --------------------------------------------------
+#  HLS-Segment-Download
+# --------------------------------------------------
+class HLSDownloadError(Exception):
+    pass
+
+def aes128_cbc_decrypt(data, key, iv):
+    """
+    Entschlüsselt ein AES-128-CBC-Segment (PKCS7-Padding) gemäß HLS.
+    Das Paket 'cryptography' wird erst bei Bedarf geladen.
+    """
+    try:
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    except ImportError:
+        raise HLSDownloadError("Für verschlüsselte Streams wird das Paket 'cryptography' benötigt.")
+    try:
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+        plain = decryptor.update(data) + decryptor.finalize()
+    except ValueError as e:
+        # Falsche Schlüssel-/IV-Länge (z.B. HTML statt Schlüssel) oder abgeschnittenes Segment
+        raise HLSDownloadError(f"Segment konnte nicht entschlüsselt werden: {e}")
+    padding = plain[-1] if plain else 0
+    if 1 <= padding <= 16:
+        plain = plain[:-padding]
+    return plain
+
+class HLSDownloadWorker(QObject):
+    """
+    Lädt einen HLS-Stream segmentweise in eine einzelne Datei.
+
+    Segmente werden über den gemeinsamen Verbindungspool parallel geladen
+    (HLS_DOWNLOAD_CONNECTIONS), aber strikt in Playlist-Reihenfolge
+    geschrieben; höchstens HLS_SEGMENT_WINDOW Segmente liegen gleichzeitig
+    im Speicher. Unterstützt AES-128, Byte-Ranges, #EXT-X-MAP (fMP4) und
+    fortlaufende Mitschnitte von Live-Playlists bis stop() aufgerufen wird.
+    """
+    # Bytes geschrieben, geschätzte Gesamtgröße (0 = unbekannt/live)
+    progress = pyqtSignal('qint64', 'qint64')
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, url, path, max_height=0, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.path = path
+        self.max_height = max_height
+        self.is_live = False
+        self.segments_written = 0
+        self.note = ""
+        self._stop = threading.Event()
+        self._cancel = threading.Event()
+        self._keys = {}
+        self._keys_lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        """
+        Beendet einen Live-Mitschnitt; das bisher Geladene bleibt erhalten.
+        """
+        self._stop.set()
+
+    def cancel(self):
+        """
+        Bricht ab und verwirft die unvollständige Datei.
+        """
+        self._cancel.set()
+        self._stop.set()
+
+    # ---------- Ablauf (Worker-Thread) ----------
+    def _run(self):
+        part_path = self.path + ".part"
+        try:
+            playlist = self._load_media_playlist()
+            self.is_live = not playlist.endlist
+            with open(part_path, "wb") as out, \
+                    ThreadPoolExecutor(max_workers=HLS_DOWNLOAD_CONNECTIONS,
+                                       thread_name_prefix="hls-segment") as executor:
+                self._download(playlist, out, executor)
+            if self._cancel.is_set():
+                os.remove(part_path)
+                return
+            os.replace(part_path, self.path)
+            self._emit(self.finished, self.path)
+        except Exception as e:
+            # Auch unerwartete Fehler melden, sonst bleibt der Download-Platz belegt
+            if not isinstance(e, (HLSDownloadError, requests.RequestException, OSError)):
+                print(f"Unerwarteter Fehler beim HLS-Download {self.url}: {e!r}")
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+            if not self._cancel.is_set():
+                self._emit(self.failed, str(e))
+
+    def _emit(self, signal, *args):
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass  # Dialog wurde inzwischen geschlossen
+
+    def _report(self, written, total, written_bytes):
+        self.segments_written = written
+        # Gesamtgröße aus der mittleren Segmentgröße hochrechnen
+        estimate = int(written_bytes / written * total) if total else 0
+        self._emit(self.progress, written_bytes, estimate)
+
+    def _load_media_playlist(self):
+        parsed = get_manifest_cache().fetch(self.url).parsed
+        if isinstance(parsed, HLSMasterPlaylist):
+            variant = select_variant(parsed.variants, throughput_estimator.estimate(), self.max_height)
+            if parsed.has_external_audio(variant):
+                self.note = "Hinweis: Der Ton liegt in einer eigenen Playlist und ist nicht enthalten."
+            self.url = variant.url
+            parsed = get_manifest_cache().fetch(self.url).parsed
+        if not isinstance(parsed, HLSMediaPlaylist) or not parsed.segments:
+            raise HLSDownloadError("Keine Segmente in der Playlist gefunden.")
+        return parsed
+
+    def _download(self, playlist, out, executor):
+        started = time.time()
+        written = 0
+        written_bytes = 0
+        last_sequence = None
+        current_init = None
+        window = []
+
+        while True:
+            segments = [seg for seg in playlist.segments
+                        if last_sequence is None or seg.sequence > last_sequence]
+            total = 0 if self.is_live else len(segments)
+            queue = iter(segments)
+            for seg in queue:
+                window.append((seg, executor.submit(self._fetch_segment, seg)))
+                if len(window) < HLS_SEGMENT_WINDOW:
+                    continue
+                written_bytes, current_init = self._write_next(window, out, written_bytes, current_init)
+                written += 1
+                self._report(written, total, written_bytes)
+                if self._cancel.is_set():
+                    return
+            while window:
+                written_bytes, current_init = self._write_next(window, out, written_bytes, current_init)
+                written += 1
+                self._report(written, total, written_bytes)
+                if self._cancel.is_set():
+                    return
+            if segments:
+                last_sequence = segments[-1].sequence
+
+            # Live: Playlist erneut laden, bis gestoppt wird oder die Höchstdauer erreicht ist
+            if not self.is_live or playlist.endlist:
+                return
+            if self._stop.wait(max(playlist.target_duration / 2, 1)):
+                return
+            if time.time() - started > HLS_LIVE_MAX_SECONDS:
+                return
+            playlist = get_manifest_cache().fetch(self.url).parsed
+            if not isinstance(playlist, HLSMediaPlaylist):
+                return
+
+    def _write_next(self, window, out, written_bytes, current_init):
+        seg, future = window.pop(0)
+        data = future.result()
+        if seg.init is not None and (current_init is None or
+                                     (seg.init.url, seg.init.byterange) != current_init):
+            # Initialisierungssegment (fMP4) vor dem ersten zugehörigen Segment schreiben
+            init_data = self._fetch_segment(seg.init)
+            out.write(init_data)
+            written_bytes += len(init_data)
+            current_init = (seg.init.url, seg.init.byterange)
+        out.write(data)
+        return written_bytes + len(data), current_init
+
+    def _fetch_segment(self, seg):
+        last_error = None
+        for attempt in range(HLS_SEGMENT_RETRIES + 1):
+            if self._cancel.is_set():
+                raise HLSDownloadError("Download abgebrochen.")
+            try:
+                start = time.perf_counter()
+                r = get_http_session().get(seg.url, headers=seg.range_header(), timeout=HLS_REQUEST_TIMEOUT * 2)
+                r.raise_for_status()
+                data = r.content
+                if not download_rate_limiter.active:
+                    # Gedrosselte Downloads verfälschen die Durchsatzmessung
+                    throughput_estimator.record(len(data), time.perf_counter() - start)
+                download_rate_limiter.consume(len(data))
+                return self._decrypt(seg, data)
+            except requests.RequestException as e:
+                last_error = e
+                if attempt < HLS_SEGMENT_RETRIES:
+                    time.sleep(0.5 * 2 ** attempt)
+        raise HLSDownloadError(f"Segment konnte nicht geladen werden: {seg.url} ({last_error})")
+
+    def _decrypt(self, seg, data):
+        if seg.key is None:
+            return data
+        if seg.key.method != "AES-128":
+            raise HLSDownloadError(f"Verschlüsselung {seg.key.method} wird nicht unterstützt.")
+        with self._keys_lock:
+            key = self._keys.get(seg.key.uri)
+        if key is None:
+            r = get_http_session().get(seg.key.uri, timeout=HLS_REQUEST_TIMEOUT)
+            r.raise_for_status()
+            key = r.content
+            with self._keys_lock:
+                self._keys[seg.key.uri] = key
+        # Ohne IV-Attribut ist die Sequenznummer der IV (128 Bit, big-endian)
+        iv = seg.key.iv or seg.sequence.to_bytes(16, "big")
+        return aes128_cbc_decrypt(data, key, iv)
+
+# --------------------------------------------------
+#  Beschleunigter, fortsetzbarer Download (HTTP-Range)
+# --------------------------------------------------
+class RangedDownloadWorker(QObject):
+    """
+    Lädt eine Datei außerhalb der Ereignisschleife herunter.
+
+    Unterstützt der Server HTTP-Range, wird die Datei in Teilstücke
+    (RANGED_PIECE_SIZE) zerlegt, die über RANGED_CONNECTIONS parallele
+    Verbindungen direkt an ihre Position in der vorab angelegten
+    Zieldatei geschrieben werden. Der Fortschritt jedes Teilstücks steht
+    in einer Statusdatei neben der Zieldatei ("<Pfad>.part.json"), sodass
+    ein abgebrochener oder pausierter Download später fortgesetzt wird.
+    """
+    progress = pyqtSignal('qint64', 'qint64')
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    # Nach stop(): der Worker-Thread hat angehalten, der Stand ist gesichert
+    paused = pyqtSignal()
+
+    def __init__(self, url, path, connections=RANGED_CONNECTIONS, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.path = path
+        self.part_path = path + ".part"
+        self.state_path = path + ".part.json"
+        self.connections = connections
+        self.is_live = False
+        self.note = ""
+        self._stop = threading.Event()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._state = None
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        """
+        Pausiert: laufende Anfragen enden, der Stand bleibt für später erhalten.
+        """
+        self._stop.set()
+
+    def cancel(self):
+        """
+        Bricht ab und löscht Teildatei und Statusdatei.
+        """
+        self._cancel.set()
+        self._stop.set()
+
+    def _emit(self, signal, *args):
+        try:
+            signal.emit(*args)
+        except RuntimeError:
+            pass  # Empfänger wurde inzwischen gelöscht
+
+    # ---------- Ablauf (Worker-Thread) ----------
+    def _run(self):
+        try:
+            total, etag, last_modified, ranges = self._probe()
+            if not ranges or total < 2 * RANGED_PIECE_SIZE:
+                self._download_single()
+            else:
+                self._download_ranged(total, etag, last_modified)
+            if self._cancel.is_set():
+                self._discard()
+                return
+            if self._stop.is_set():
+                # Pausiert, Teildatei und Status bleiben liegen
+                self._emit(self.paused)
+                return
+            os.replace(self.part_path, self.path)
+            self._remove(self.state_path)
+            self._emit(self.finished, self.path)
+        except (requests.RequestException, OSError, ValueError) as e:
+            if self._cancel.is_set():
+                self._discard()
+            else:
+                self._emit(self.failed, str(e))
+
+    def _probe(self):
+        """
+        Fragt Byte 0 an: 206 mit Content-Range bedeutet Range-Unterstützung.
+        """
+        r = get_http_session().get(self.url, headers={"Range": "bytes=0-0"}, stream=True,
+                                   timeout=HLS_REQUEST_TIMEOUT)
+        r.close()
+        r.raise_for_status()
+        content_range = r.headers.get("Content-Range", "")
+        if r.status_code == 206 and "/" in content_range and not content_range.endswith("/*"):
+            total = int(content_range.rsplit("/", 1)[1])
+            return total, r.headers.get("ETag"), r.headers.get("Last-Modified"), True
+        return int(r.headers.get("Content-Length", 0) or 0), None, None, False
+
+    def _download_single(self):
+        start = time.perf_counter()
+        received = 0
+        with get_http_session().get(self.url, stream=True, timeout=HLS_REQUEST_TIMEOUT * 2) as r:
+            r.raise_for_status()
+            total = int(r.headers.get("Content-Length", 0) or 0)
+            last_report = 0.0
+            with open(self.part_path, "wb") as f:
+                for chunk in r.iter_content(RANGED_CHUNK_SIZE):
+                    if self._stop.is_set():
+                        return
+                    f.write(chunk)
+                    received += len(chunk)
+                    download_rate_limiter.consume(len(chunk))
+                    now = time.perf_counter()
+                    if now - last_report > 0.2:
+                        last_report = now
+                        self._emit(self.progress, received, total)
+        if not download_rate_limiter.active:
+            throughput_estimator.record(received, time.perf_counter() - start)
+        self._emit(self.progress, received, received)
+
+    def _load_state(self, total, etag, last_modified):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Nur fortsetzen, wenn es nachweislich dieselbe Datei ist
+        if (state.get("url") != self.url or state.get("total") != total or
+                state.get("etag") != etag or state.get("last_modified") != last_modified or
+                not os.path.exists(self.part_path)):
+            return None
+        return state
+
+    def _save_state(self):
+        with self._lock:
+            data = json.dumps(self._state)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.state_path)
+
+    def _download_ranged(self, total, etag, last_modified):
+        state = self._load_state(total, etag, last_modified)
+        if state is None:
+            pieces = [[start, min(start + RANGED_PIECE_SIZE, total) - 1, 0]
+                      for start in range(0, total, RANGED_PIECE_SIZE)]
+            state = {"url": self.url, "total": total, "etag": etag,
+                     "last_modified": last_modified, "pieces": pieces}
+            # Zieldatei in voller Größe anlegen (vermeidet Fragmentierung)
+            with open(self.part_path, "wb") as f:
+                f.truncate(total)
+        self._state = state
+        self._save_state()
+
+        validator = etag or last_modified
+        todo = [piece for piece in state["pieces"] if piece[0] + piece[2] <= piece[1]]
+        with ThreadPoolExecutor(max_workers=self.connections,
+                                thread_name_prefix="ranged-download") as executor:
+            futures = [executor.submit(self._download_piece, piece, validator) for piece in todo]
+            # Auf die Teilstücke warten, nicht auf _stop: nach Pause/Abbruch
+            # liefen sonst Zustandssicherung und Fortschritt ohne Pause weiter
+            while wait_futures(futures, timeout=RANGED_STATE_INTERVAL).not_done:
+                self._save_state()
+                self._emit(self.progress, self._received(), total)
+            self._save_state()
+            for future in futures:
+                future.result()  # Fehler der Teilstücke weiterreichen
+        self._emit(self.progress, self._received(), total)
+
+    def _received(self):
+        with self._lock:
+            return sum(piece[2] for piece in self._state["pieces"])
+
+    def _download_piece(self, piece, validator):
+        start, end, _ = piece
+        last_error = None
+        for attempt in range(RANGED_RETRIES + 1):
+            if self._stop.is_set():
+                return
+            offset = start + piece[2]
+            if offset > end:
+                return
+            headers = {"Range": f"bytes={offset}-{end}"}
+            if validator:
+                headers["If-Range"] = validator
+            try:
+                began = time.perf_counter()
+                received = 0
+                with get_http_session().get(self.url, headers=headers, stream=True,
+                                            timeout=HLS_REQUEST_TIMEOUT * 2) as r:
+                    r.raise_for_status()
+                    if r.status_code != 206:
+                        raise ValueError("Die Datei hat sich auf dem Server geändert.")
+                    with open(self.part_path, "r+b") as f:
+                        f.seek(offset)
+                        for chunk in r.iter_content(RANGED_CHUNK_SIZE):
+                            if self._stop.is_set():
+                                return
+                            f.write(chunk)
+                            received += len(chunk)
+                            with self._lock:
+                                piece[2] += len(chunk)
+                            download_rate_limiter.consume(len(chunk))
+                if not download_rate_limiter.active:
+                    throughput_estimator.record(received, time.perf_counter() - began)
+                if start + piece[2] > end:
+                    return
+            except requests.RequestException as e:
+                last_error = e
+                time.sleep(0.5 * 2 ** attempt)
+        raise requests.RequestException(f"Teilstück {start}-{end} fehlgeschlagen: {last_error}")
+
+    def _discard(self):
+        self._remove(self.part_path)
+        self._remove(self.state_path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+# --------------------------------------------------
+#  Download-Verwaltung (Warteschlange für Web- und Mediendownloads)
+# --------------------------------------------------
+def format_bytes(nbytes):
+    for unit in ("B", "KB", "MB", "GB"):
+        if nbytes < 1024 or unit == "GB":
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+class DownloadItem:
+    """
+    Ein Eintrag der Download-Warteschlange (eine Zeile der Tabelle downloads).
+
+    kind: "web" (QWebEngineDownloadRequest), "http" (RangedDownloadWorker)
+    oder "hls" (HLSDownloadWorker).
+    state: "queued", "running", "paused", "done", "failed" oder "canceled".
+    """
+    STATE_LABELS = {
+        "queued": "Wartet",
+        "running": "Lädt",
+        "paused": "Pausiert",
+        "done": "Fertig",
+        "failed": "Fehler",
+        "canceled": "Abgebrochen",
+    }
+
+    def __init__(self, download_id, url, path, kind, state="queued",
+                 received=0, total=0, added_at=None, error=""):
+        self.id = download_id
+        self.url = url
+        self.path = path
+        self.kind = kind
+        self.state = state
+        self.received = received
+        self.total = total
+        self.added_at = added_at if added_at is not None else time.time()
+        self.error = error
+        self.host = urlsplit(url).hostname or ""
+        self.request = None   # QWebEngineDownloadRequest (nur kind "web")
+        self.worker = None    # HLSDownloadWorker/RangedDownloadWorker
+        self.speed = 0.0      # Byte/s (EWMA)
+        self._last_received = received
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed", "canceled")
+
+    @property
+    def is_live(self):
+        return self.worker is not None and self.worker.is_live
+
+    def eta(self):
+        """
+        Restzeit in Sekunden oder None, wenn sie sich nicht schätzen lässt.
+        """
+        if self.state != "running" or self.speed <= 0 or self.total <= 0:
+            return None
+        return max(self.total - self.received, 0) / self.speed
+
+class DownloadManager(QObject):
+    """
+    Zentrale Verwaltung aller Downloads.
+
+    Web-Downloads (QWebEngineDownloadRequest) und Mediendownloads aus dem
+    VLC-Dialog laufen über eine gemeinsame, im Profilspeicher abgelegte
+    Warteschlange. Höchstens DOWNLOAD_MAX_ACTIVE Downloads laufen gleichzeitig,
+    davon höchstens DOWNLOAD_MAX_PER_HOST pro Host; der Rest wartet. Die
+    Python-Worker teilen sich download_rate_limiter als Bandbreitengrenze.
+    Beim nächsten Start werden unterbrochene Einträge fortgesetzt; Web-Downloads
+    lassen sich dann nicht mehr an WebEngine übergeben und laufen als
+    HTTP-Download weiter.
+    """
+    item_added = pyqtSignal(object)
+    item_changed = pyqtSignal(object)
+    items_removed = pyqtSignal(list)
+    # Einmal pro DOWNLOAD_TICK_MS, solange etwas läuft
+    stats_changed = pyqtSignal()
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.items = {}
+        download_rate_limiter.set_rate(self.rate_limit())
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(DOWNLOAD_TICK_MS)
+        self.timer.timeout.connect(self._tick)
+
+        self._load()
+        QTimer.singleShot(0, self._schedule)
+
+    def _load(self):
+        try:
+            rows = self.store.load_downloads().fetchall()
+        except sqlite3.Error as e:
+            print("Fehler beim Laden der Downloads:", e)
+            return
+        for row in rows:
+            item = DownloadItem(*row)
+            if not item.finished:
+                if item.kind == "web":
+                    item.kind = "http"
+                if item.state == "running":
+                    item.state = "queued"
+                self._persist(item)
+            self.items[item.id] = item
+
+    def _persist(self, item):
+        try:
+            self.store.update_download(item.id, item.kind, item.state,
+                                       item.received, item.total, item.error)
+        except sqlite3.Error as e:
+            print("Fehler beim Speichern des Downloads:", e)
+
+    def _add(self, url, path, kind, state):
+        added_at = time.time()
+        try:
+            download_id = self.store.add_download(url, path, kind, state, added_at)
+        except sqlite3.Error as e:
+            print("Fehler beim Speichern des Downloads:", e)
+            download_id = -len(self.items) - 1  # nur für diese Sitzung
+        item = DownloadItem(download_id, url, path, kind, state, added_at=added_at)
+        self.items[item.id] = item
+        self.item_added.emit(item)
+        return item
+
+    # ---------- Einreihen ----------
+    def enqueue(self, url, path, kind):
+        """
+        Reiht einen Mediendownload ein (kind "http" oder "hls").
+        """
+        item = self._add(url, path, kind, "queued")
+        self._schedule()
+        return item
+
+    def add_web_download(self, request):
+        """
+        Übernimmt einen bereits mit Zielpfad versehenen WebEngine-Download.
+        Ist kein Platz frei, wird er sofort pausiert und wartet.
+        """
+        path = os.path.join(request.downloadDirectory(), request.downloadFileName())
+        item = self._add(request.url().toString(), path, "web", "queued")
+        item.request = request
+        item.total = max(request.totalBytes(), 0)
+        request.receivedBytesChanged.connect(lambda i=item: self._on_web_progress(i))
+        request.totalBytesChanged.connect(lambda i=item: self._on_web_progress(i))
+        request.stateChanged.connect(lambda state, i=item: self._on_web_state(i, state))
+        request.accept()
+        if self._has_capacity(item):
+            self._start(item)
+        else:
+            request.pause()
+            self.item_changed.emit(item)
+
+    # ---------- Steuerung ----------
+    def pause(self, item):
+        """
+        Pausiert einen laufenden Download. Live-Mitschnitte werden beendet
+        und gespeichert; HLS-Downloads mit fester Länge lassen sich nicht pausieren.
+        """
+        if item.state == "queued":
+            item.state = "paused"
+        elif item.state != "running":
+            return
+        elif item.kind == "web":
+            item.request.pause()
+            item.state = "paused"
+        elif item.kind == "http":
+            # Der Worker meldet per paused, sobald sein Stand gesichert ist
+            item.worker.stop()
+            item.state = "paused"
+        elif item.is_live:
+            item.worker.stop()
+            return
+        else:
+            return
+        item.speed = 0.0
+        self._persist(item)
+        self.item_changed.emit(item)
+        self._schedule()
+
+    def resume(self, item):
+        """
+        Setzt einen pausierten Download fort bzw. wiederholt einen fehlgeschlagenen.
+        """
+        if item.state not in ("paused", "failed"):
+            return
+        if item.kind == "web" and (item.request is None or item.state == "failed"):
+            item.kind = "http"
+            item.request = None
+        item.state = "queued"
+        item.error = ""
+        self._persist(item)
+        self.item_changed.emit(item)
+        self._schedule()
+
+    def cancel(self, item):
+        if item.finished:
+            return
+        if item.request is not None:
+            item.request.cancel()
+        elif item.worker is not None:
+            item.worker.cancel()
+        else:
+            self._discard_partial(item)
+        item.state = "canceled"
+        item.speed = 0.0
+        self._persist(item)
+        self.item_changed.emit(item)
+        self._schedule()
+
+    def remove_finished(self):
+        ids = [item.id for item in self.items.values() if item.finished]
+        if not ids:
+            return
+        for download_id in ids:
+            del self.items[download_id]
+        try:
+            self.store.delete_downloads(download_id for download_id in ids if download_id > 0)
+        except sqlite3.Error as e:
+            print("Fehler beim Löschen der Downloads:", e)
+        self.items_removed.emit(ids)
+
+    def rate_limit(self):
+        return self.store.get_setting("download_rate_limit", 0)
+
+    def set_rate_limit(self, rate):
+        download_rate_limiter.set_rate(rate)
+        try:
+            self.store.set_setting("download_rate_limit", rate)
+        except sqlite3.Error as e:
+            print("Fehler beim Speichern der Einstellung:", e)
+
+    def summary(self):
+        running = [item for item in self.items.values() if item.state == "running"]
+        queued = sum(1 for item in self.items.values() if item.state == "queued")
+        return len(running), queued, sum(item.speed for item in running)
+
+    def shutdown(self):
+        """
+        Beim Beenden: Laufende Downloads anhalten und als wartend sichern,
+        damit sie beim nächsten Start fortgesetzt werden.
+        """
+        self.timer.stop()
+        for item in self.items.values():
+            if item.state != "running":
+                continue
+            if item.worker is not None and item.is_live:
+                item.worker.stop()
+                item.state = "failed"
+                item.error = "Mitschnitt beim Beenden unterbrochen."
+            else:
+                if item.worker is not None:
+                    # Range-Downloads behalten ihren Stand, HLS beginnt neu
+                    if item.kind == "http":
+                        item.worker.stop()
+                    else:
+                        item.worker.cancel()
+                item.state = "queued"
+            self._persist(item)
+
+    # ---------- Planung ----------
+    def _has_capacity(self, item, running=None):
+        if running is None:
+            running = [i for i in self.items.values() if i.state == "running"]
+        if len(running) >= DOWNLOAD_MAX_ACTIVE:
+            return False
+        return sum(1 for i in running if i.host == item.host) < DOWNLOAD_MAX_PER_HOST
+
+    def _schedule(self):
+        running = [item for item in self.items.values() if item.state == "running"]
+        per_host = Counter(item.host for item in running)
+        for item in self.items.values():
+            if len(running) >= DOWNLOAD_MAX_ACTIVE:
+                break
+            # Ein pausierter Worker, der noch anhält, wird erst danach neu gestartet
+            if item.state != "queued" or item.worker is not None:
+                continue
+            if per_host[item.host] >= DOWNLOAD_MAX_PER_HOST:
+                continue
+            self._start(item)
+            running.append(item)
+            per_host[item.host] += 1
+
+    def _start(self, item):
+        item.state = "running"
+        item.speed = 0.0
+        item._last_received = item.received
+        if item.kind == "web":
+            if item.request.isPaused():
+                item.request.resume()
+        else:
+            if item.kind == "hls":
+                worker = HLSDownloadWorker(item.url, item.path,
+                                           max_height=self.store.get_setting("video_max_height", 0),
+                                           parent=self)
+            else:
+                worker = RangedDownloadWorker(item.url, item.path, parent=self)
+                worker.paused.connect(lambda i=item: self._on_worker_paused(i))
+            worker.progress.connect(lambda received, total, i=item: self._on_progress(i, received, total))
+            worker.finished.connect(lambda _, i=item: self._on_finished(i))
+            worker.failed.connect(lambda message, i=item: self._on_failed(i, message))
+            item.worker = worker
+            worker.start()
+        self._persist(item)
+        self.item_changed.emit(item)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def _tick(self):
+        active = False
+        for item in self.items.values():
+            if item.state != "running":
+                continue
+            active = True
+            sample = (item.received - item._last_received) * 1000 / DOWNLOAD_TICK_MS
+            item._last_received = item.received
+            item.speed = DOWNLOAD_SPEED_ALPHA * sample + (1 - DOWNLOAD_SPEED_ALPHA) * item.speed
+            self.item_changed.emit(item)
+        self.stats_changed.emit()
+        if not active:
+            self.timer.stop()
+
+    # ---------- Rückmeldungen ----------
+    def _on_progress(self, item, received, total):
+        item.received = received
+        item.total = total
+
+    def _on_web_progress(self, item):
+        item.received = item.request.receivedBytes()
+        item.total = max(item.request.totalBytes(), 0)
+
+    def _on_web_state(self, item, state):
+        states = QWebEngineDownloadRequest.DownloadState
+        if state == states.DownloadInProgress and item.state in ("queued", "paused"):
+            # Qt beginnt nach accept() sofort; wartende Downloads anhalten
+            if not item.request.isPaused():
+                item.request.pause()
+        elif state == states.DownloadCompleted:
+            self._on_finished(item)
+        elif state == states.DownloadInterrupted:
+            self._on_failed(item, item.request.interruptReasonString())
+        elif state == states.DownloadCancelled and item.state != "canceled":
+            item.state = "canceled"
+            self._finish(item)
+
+    def _on_finished(self, item):
+        item.state = "done"
+        if item.worker is not None:
+            item.error = item.worker.note
+        if item.total <= 0 or item.is_live:
+            item.total = item.received
+        self._finish(item)
+
+    def _on_failed(self, item, message):
+        if item.state == "canceled":
+            return
+        item.state = "failed"
+        item.error = message
+        self._finish(item)
+
+    def _on_worker_paused(self, item):
+        item.worker = None
+        # Während des Anhaltens erneut fortgesetzt: jetzt neu starten
+        self._schedule()
+
+    def _finish(self, item):
+        item.worker = None
+        item.speed = 0.0
+        self._persist(item)
+        self.item_changed.emit(item)
+        self._schedule()
+
+    @staticmethod
+    def _discard_partial(item):
+        for path in (item.path + ".part", item.path + ".part.json"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+class DownloadPanelDialog(QDialog):
+    """
+    Übersicht aller Downloads mit Fortschritt, Geschwindigkeit und Restzeit.
+    Nicht modal; die Zeilen werden über die Signale des DownloadManager
+    aktualisiert.
+    """
+    COLUMNS = ("Datei", "Status", "Fortschritt", "Geschwindigkeit", "Restzeit", "Host")
+
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Downloads")
+        self.resize(800, 350)
+        self.manager = manager
+        self.rows = {}
+
+        layout = QVBoxLayout()
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        pause_btn = QPushButton("Pausieren")
+        resume_btn = QPushButton("Fortsetzen")
+        cancel_btn = QPushButton("Abbrechen")
+        clear_btn = QPushButton("Liste bereinigen")
+        close_btn = QPushButton("Schließen")
+        for btn in (pause_btn, resume_btn, cancel_btn, clear_btn, close_btn):
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
 
-# PyQt6
-from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QLineEdit, QWidget,
-    QTabWidget, QToolBar, QStatusBar, QFileDialog, QMessageBox,
-    QDialog, QPushButton, QLabel, QMenu, QListWidget, QListWidgetItem, QHBoxLayout,
-    QSizePolicy, QFrame, QSlider
-)
-from PyQt6.QtGui import QAction, QFont
-from PyQt6.QtCore import QUrl, QSize, QObject, pyqtSlot, Qt, QTimer
-from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWebChannel import QWebChannel
+        pause_btn.clicked.connect(lambda: self._for_selected(manager.pause))
+        resume_btn.clicked.connect(lambda: self._for_selected(manager.resume))
+        cancel_btn.clicked.connect(lambda: self._for_selected(manager.cancel))
+        clear_btn.clicked.connect(manager.remove_finished)
+        close_btn.clicked.connect(self.hide)
+
+        for item in manager.items.values():
+            self._add_row(item)
+        manager.item_added.connect(self._add_row)
+        manager.item_changed.connect(self._update_row)
+        manager.items_removed.connect(self._rebuild)
+
+    def _for_selected(self, action):
+        selected = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for download_id, row in list(self.rows.items()):
+            if row in selected:
+                action(self.manager.items[download_id])
+
+    def _add_row(self, item):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for column in range(len(self.COLUMNS)):
+            self.table.setItem(row, column, QTableWidgetItem())
+        self.rows[item.id] = row
+        self._update_row(item)
+
+    def _update_row(self, item):
+        row = self.rows.get(item.id)
+        if row is None:
+            return
+        if item.total > 0:
+            progress = f"{int(item.received / item.total * 100)}% von {format_bytes(item.total)}"
+        else:
+            progress = format_bytes(item.received)
+        status = DownloadItem.STATE_LABELS.get(item.state, item.state)
+        if item.state == "running" and item.is_live:
+            status = "Live-Mitschnitt"
+        eta = item.eta()
+        values = (
+            os.path.basename(item.path),
+            status,
+            progress,
+            f"{format_bytes(item.speed)}/s" if item.state == "running" else "",
+            format_duration(eta) if eta is not None else "",
+            item.host,
+        )
+        for column, value in enumerate(values):
+            cell = self.table.item(row, column)
+            if cell.text() != value:
+                cell.setText(value)
+        self.table.item(row, 0).setToolTip(f"{item.path}\n{item.url}\n{item.error}".strip())
+
+    def _rebuild(self, _ids=None):
+        self.table.setRowCount(0)
+        self.rows = {}
+        for item in self.manager.items.values():
+            self._add_row(item)
+
+_resolve_executor = None
+
+def get_resolve_executor():
+    global _resolve_executor
+    if _resolve_executor is None:
+        _resolve_executor = ThreadPoolExecutor(
+            max_workers=HLS_RESOLVE_WORKERS, thread_name_prefix="hls-resolve")
+    return _resolve_executor
+
+class ManifestResolveBatch(QObject):
+    """
+    Löst die Manifeste eines Video-Scans parallel im Worker-Pool auf.
 
-DATA_FILE = "favoriten_und_passwoerter.json"
+    Jedes Ergebnis wird sofort per item_resolved(index, ResolvedStream)
+    gemeldet. Nach HLS_BATCH_DEADLINE_MS oder per cancel() werden offene
+    Abrufe verworfen; für sie bleibt die ursprüngliche URL gültig.
+    """
+    item_resolved = pyqtSignal(int, object)
+    finished = pyqtSignal()
+    # Intern: Ergebnis aus dem Worker-Thread in den GUI-Thread bringen
+    _worker_done = pyqtSignal(int, object)
 
-def get_emoji_font():
-    """ 
-    Vereinfachtes Fallback: Liefert 'Arial' mit Größe 16 zurück,
-    um Probleme mit QFontDatabase zu vermeiden.
+    def __init__(self, sources, max_height=0, deadline_ms=HLS_BATCH_DEADLINE_MS, parent=None):
+        super().__init__(parent)
+        self.sources = list(sources)
+        self.max_height = max_height
+        self.results = [ResolvedStream(src) for src in self.sources]
+        self.pending = set()
+        self.futures = []
+        self.cancelled = False
+        self._worker_done.connect(self._on_worker_done)
+
+        self.deadline = QTimer(self)
+        self.deadline.setSingleShot(True)
+        self.deadline.setInterval(deadline_ms)
+        self.deadline.timeout.connect(self.cancel)
+
+    def start(self):
+        executor = get_resolve_executor()
+        for i, src in enumerate(self.sources):
+            if manifest_kind(src) is None:
+                continue
+            self.pending.add(i)
+            future = executor.submit(resolve_stream, src, self.max_height)
+            future.add_done_callback(lambda f, i=i: self._emit_worker_result(i, f))
+            self.futures.append(future)
+        if self.pending:
+            self.deadline.start()
+        else:
+            QTimer.singleShot(0, self.finished.emit)
+
+    def is_pending(self, index):
+        return index in self.pending
+
+    def cancel(self):
+        if self.cancelled:
+            return
+        self.cancelled = True
+        self.deadline.stop()
+        for future in self.futures:
+            future.cancel()
+        if self.pending:
+            self.pending.clear()
+            self.finished.emit()
+
+    def _emit_worker_result(self, index, future):
+        # Läuft im Worker-Thread
+        if future.cancelled():
+            return
+        try:
+            stream = future.result()
+        except Exception as e:
+            print("Fehler beim Auflösen des Manifests:", e)
+            stream = ResolvedStream(self.sources[index])
+        try:
+            self._worker_done.emit(index, stream)
+        except RuntimeError:
+            pass  # Batch wurde bereits gelöscht
+
+    def _on_worker_done(self, index, stream):
+        if self.cancelled or index not in self.pending:
+            return
+        self.pending.discard(index)
+        self.results[index] = stream
+        self.item_resolved.emit(index, stream)
+        if not self.pending:
+            self.deadline.stop()
+            self.finished.emit()
+
+class VideoSelectionDialog(QDialog):
     """
-    return QFont("Arial", 16)
+    Auswahl zwischen mehreren gefundenen Videos. Die Einträge erscheinen
+    sofort und werden aktualisiert, sobald ihr Manifest aufgelöst ist.
+    Beim Schließen werden noch laufende Auflösungen abgebrochen.
+    """
+    def __init__(self, batch, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Videos auswählen (höchste Auflösung)")
+        self.resize(400, 300)
+        self.batch = batch
+        self.selected_stream = None
+        layout = QVBoxLayout()
+
+        self.list_widget = QListWidget()
+        for i, stream in enumerate(batch.results):
+            item = QListWidgetItem()
+            self.list_widget.addItem(item)
+            self._set_item(i, stream)
+        layout.addWidget(self.list_widget)
+
+        btn_layout = QHBoxLayout()
+        play_btn = QPushButton("Abspielen")
+        cancel_btn = QPushButton("Abbrechen")
+        btn_layout.addWidget(play_btn)
+        btn_layout.addWidget(cancel_btn)
+        layout.addLayout(btn_layout)
+
+        self.setLayout(layout)
+
+        play_btn.clicked.connect(self.play_selected)
+        cancel_btn.clicked.connect(self.reject)
+        self.list_widget.itemDoubleClicked.connect(lambda _: self.play_selected())
+        # Ausgewähltes Video schon vorbereiten, solange der Dialog offen ist
+        self.list_widget.currentItemChanged.connect(lambda item, _: self._prepare(item))
+        batch.item_resolved.connect(self._set_item)
+        batch.finished.connect(self._on_batch_finished)
+
+    def _set_item(self, index, stream):
+        item = self.list_widget.item(index)
+        item.setData(Qt.ItemDataRole.UserRole, stream)
+        if self.batch.is_pending(index):
+            item.setText(f"{stream.url}  (wird aufgelöst…)")
+        elif stream.label:
+            item.setText(f"{stream.label}\n{stream.url}")
+        else:
+            item.setText(stream.url)
+
+    def _on_batch_finished(self):
+        # Abgelaufene Einträge behalten ihre ursprüngliche URL
+        for i in range(self.list_widget.count()):
+            self._set_item(i, self.batch.results[i])
+        self._prepare(self.list_widget.currentItem())
+
+    def _prepare(self, item):
+        if item is None or self.batch.is_pending(self.list_widget.row(item)):
+            return
+        stream = item.data(Qt.ItemDataRole.UserRole)
+        try:
+            get_vlc_pool().prepare(stream.url, stream.options)
+        except VLC_LOAD_ERRORS:
+            pass  # Fehler wird beim Abspielen gemeldet
+
+    def play_selected(self):
+        selected_item = self.list_widget.currentItem()
+        if selected_item:
+            self.selected_stream = selected_item.data(Qt.ItemDataRole.UserRole)
+            self.accept()
+        else:
+            QMessageBox.warning(self, "Warnung", "Bitte wählen Sie ein Video aus.")
+
+    def done(self, result):
+        self.batch.cancel()
+        super().done(result)
+
+# --------------------------------------------------
+#  Zugangsdaten: Index nach registrierbarer Domain
+# --------------------------------------------------
+class PublicSuffixList:
+    """
+    Public-Suffix-Regeln als drei Mengen (normal, Wildcard, Ausnahme).
+    registrable_domain() braucht damit höchstens so viele Mengenabfragen,
+    wie der Host Labels hat. Fehlt die Liste, gilt nur die Standardregel "*"
+    und complete ist False.
+    """
+    IP_RE = re.compile(r"^[\d.]+$|:")
+
+    def __init__(self, rules, complete=True):
+        self.complete = complete
+        self.rules = set()
+        self.wildcards = set()
+        self.exceptions = set()
+        for rule in rules:
+            rule = rule.strip().lower()
+            if not rule or rule.startswith("//"):
+                continue
+            rule = rule.split()[0]
+            if rule.startswith("!"):
+                self.exceptions.add(rule[1:])
+            elif rule.startswith("*."):
+                self.wildcards.add(rule[2:])
+            else:
+                self.rules.add(rule)
+
+    @classmethod
+    def load(cls, path=PUBLIC_SUFFIX_FILE):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(f)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Public-Suffix-Liste nicht lesbar ({path}): {e}")
+            return cls((), complete=False)
+
+    def registrable_domain(self, host):
+        """
+        Public Suffix plus ein Label ("login.example.co.uk" -> "example.co.uk").
+        IP-Adressen, einzelne Labels und Suffixe selbst bleiben unverändert.
+        """
+        host = host.lower().rstrip(".")
+        if not host or self.IP_RE.search(host):
+            return host
+        labels = host.split(".")
+        count = len(labels)
+        suffix_len = 1  # Standardregel "*"
+        # Von der längsten Kandidatin zur kürzesten: der erste Treffer ist die längste Regel
+        for i in range(count):
+            candidate = ".".join(labels[i:])
+            if candidate in self.exceptions:
+                suffix_len = count - i - 1
+                break
+            if candidate in self.rules or ".".join(labels[i + 1:]) in self.wildcards:
+                suffix_len = count - i
+                break
+        if suffix_len >= count:
+            return host
+        return ".".join(labels[count - suffix_len - 1:])
+
+_public_suffixes = None
+
+def get_public_suffixes():
+    global _public_suffixes
+    if _public_suffixes is None:
+        _public_suffixes = PublicSuffixList.load()
+    return _public_suffixes
+
+class CredentialIndex:
+    """
+    Zugangsdaten gruppiert nach registrierbarer Domain.
+
+    Gespeichert wird weiterhin pro Host; lookup() findet aber auch Einträge
+    anderer Subdomains derselben Site (exakter Host zuerst, sonst der Host
+    mit der längsten gemeinsamen Label-Endung). Ergebnisse werden pro Host
+    zwischengespeichert und bei jeder Änderung verworfen.
+
+    Ohne vollständige Public-Suffix-Liste zählt nur der exakte Host, damit
+    Mandanten gemeinsamer Hosting-Domains keine Zugangsdaten teilen.
+    """
+    def __init__(self, credentials, suffixes=None):
+        self.suffixes = suffixes or get_public_suffixes()
+        self.rebuild(credentials)
+
+    def rebuild(self, credentials):
+        self.by_site = {}
+        self._cache = {}
+        for host, creds in credentials.items():
+            self.by_site.setdefault(self.site_of(host), {})[host] = creds
+
+    def site_of(self, host):
+        if not self.suffixes.complete:
+            return host.lower().rstrip(".")
+        return self.suffixes.registrable_domain(host)
+
+    def set(self, host, creds):
+        self.by_site.setdefault(self.site_of(host), {})[host] = creds
+        self._cache = {}
+
+    def remove(self, host):
+        site = self.site_of(host)
+        entries = self.by_site.get(site, {})
+        entries.pop(host, None)
+        if not entries:
+            self.by_site.pop(site, None)
+        self._cache = {}
+
+    def lookup(self, host):
+        entry = self.find(host)
+        return entry[1] if entry else None
+
+    def find(self, host):
+        """
+        (gespeicherter Host, Zugangsdaten) für host oder None.
+        """
+        try:
+            return self._cache[host]
+        except KeyError:
+            pass
+        result = self._match(host)
+        self._cache[host] = result
+        return result
+
+    def _match(self, host):
+        entries = self.by_site.get(self.site_of(host))
+        if not entries:
+            return None
+        if host in entries:
+            return host, entries[host]
+        labels = host.split(".")[::-1]
+
+        def shared_labels(other):
+            shared = 0
+            for a, b in zip(labels, other.split(".")[::-1]):
+                if a != b:
+                    break
+                shared += 1
+            return shared
+        # max() liefert bei Gleichstand den zuerst gespeicherten Eintrag
+        return max(entries.items(), key=lambda item: shared_labels(item[0]))
+
+# --------------------------------------------------
+#  Login- und Videoerkennung (eingeschleustes Skript + QWebChannel)
+# --------------------------------------------------
+# Alle Watcher laufen ab Dokumenterstellung in jedem Frame in einer eigenen
+# JavaScript-Welt (für Seitenskripte unsichtbar) und teilen sich einen
+# QWebChannel: window.__tmpBridge(objekt, methode, argumente) puffert Aufrufe,
+# bis der Kanal steht. Nicht registrierte Objekte (z.B. loginBridge im
+# Stapelbetrieb) werden übergangen.
+PAGE_CHANNEL_JS = """
+(function() {
+    if (window.__tmpBridge || typeof qt === 'undefined' || !qt.webChannelTransport) {
+        return;
+    }
+    var objects = null;
+    var queue = [];
+    window.__tmpBridge = function(name, method, args) {
+        if (objects) {
+            var target = objects[name];
+            if (target && typeof target[method] === 'function') {
+                target[method].apply(target, args);
+            }
+        } else {
+            queue.push([name, method, args]);
+        }
+    };
+    new QWebChannel(qt.webChannelTransport, function(channel) {
+        objects = channel.objects;
+        queue.forEach(function(entry) { window.__tmpBridge(entry[0], entry[1], entry[2]); });
+        queue = [];
+    });
+})();
+"""
+
+# Ein MutationObserver meldet das erste Passwortfeld, auch wenn es erst nach
+# dem Laden entsteht (SPA); Absenden per Formular oder Button meldet die
+# eingegebenen Zugangsdaten. Jede Meldung trägt den Host des Frames, der
+# Einfügen-Hinweis kommt nur aus dem Hauptframe (nur dort wird eingefügt).
+LOGIN_WATCHER_JS = """
+(function() {
+    if (window.__tmpLoginWatcher || !window.__tmpBridge) {
+        return;
+    }
+    window.__tmpLoginWatcher = true;
+    function send(method, args) {
+        window.__tmpBridge('loginBridge', method, args);
+    }
+
+    function credentialsIn(root) {
+        var password = root.querySelector('input[type=password]');
+        if (!password || !password.value) {
+            return null;
+        }
+        var username = '';
+        var inputs = root.querySelectorAll('input[type=text], input[type=email], input:not([type])');
+        for (var i = 0; i < inputs.length; i++) {
+            if (inputs[i].value) {
+                username = inputs[i].value;
+                break;
+            }
+        }
+        return [username, password.value];
+    }
+    var lastSent = '';
+    function reportCredentials(root) {
+        var creds = credentialsIn(root || document);
+        if (!creds || !creds[0] || creds.join('\\n') === lastSent) {
+            return;
+        }
+        lastSent = creds.join('\\n');
+        send('submit_form', [location.hostname].concat(creds));
+    }
+    document.addEventListener('submit', function(e) { reportCredentials(e.target); }, true);
+    // SPA-Logins senden oft per Button und fetch() statt per Formular
+    document.addEventListener('click', function(e) {
+        var button = e.target.closest && e.target.closest('button, input[type=submit]');
+        if (button) {
+            reportCredentials(button.form || document);
+        }
+    }, true);
+
+    if (window !== window.top) {
+        return;  // Eingefügt wird nur im Hauptframe; Frames melden nur Logins
+    }
+    var pending = false;
+    var observer = new MutationObserver(function() {
+        if (!pending) {
+            pending = true;
+            setTimeout(check, 200);
+        }
+    });
+    function check() {
+        pending = false;
+        if (document.querySelector('input[type=password]')) {
+            observer.disconnect();
+            send('password_field_found', [location.hostname]);
+        }
+    }
+    observer.observe(document, {childList: true, subtree: true,
+                                attributes: true, attributeFilter: ['type']});
+    document.addEventListener('DOMContentLoaded', check);
+})();
+"""
+
+# Meldet pro <video> die beste Quelle (label/data-res oder "(\d+)p" in der
+# URL, sonst currentSrc) samt Höhe, sobald das Element entsteht, seine
+# Quelle wechselt oder Metadaten geladen hat. blob:-URLs stammen von
+# MediaSource-Playern; deren Manifeste findet PageRequestInterceptor.
+MEDIA_WATCHER_JS = """
+(function() {
+    if (window.__tmpMediaWatcher || !window.__tmpBridge) {
+        return;
+    }
+    window.__tmpMediaWatcher = true;
+    var reported = {};
+    var mseReported = false;
+    function heightFrom(text) {
+        var match = /(\\d{3,4})p/.exec(text || '');
+        return match ? parseInt(match[1], 10) : 0;
+    }
+    function report(src, label, height) {
+        if (!src) {
+            return;
+        }
+        if (src.lastIndexOf('blob:', 0) === 0) {
+            if (!mseReported) {
+                mseReported = true;
+                window.__tmpBridge('mediaBridge', 'mse_found', []);
+            }
+            return;
+        }
+        if (!/^https?:/.test(src) || reported[src] === height) {
+            return;
+        }
+        reported[src] = height;
+        window.__tmpBridge('mediaBridge', 'media_found', [src, label, height]);
+    }
+    function scanVideo(video) {
+        var best = null, bestLabel = '', bestHeight = 0;
+        var sources = video.getElementsByTagName('source');
+        for (var i = 0; i < sources.length; i++) {
+            var label = sources[i].getAttribute('label') || sources[i].getAttribute('data-res') || '';
+            var height = heightFrom(label) || heightFrom(sources[i].src);
+            if (sources[i].src && height > bestHeight) {
+                best = sources[i].src;
+                bestLabel = label;
+                bestHeight = height;
+            }
+        }
+        if (!best) {
+            best = video.currentSrc || video.src;
+            bestHeight = video.videoHeight || heightFrom(best);
+        }
+        report(best, bestLabel, bestHeight);
+    }
+    var pending = false;
+    function scan() {
+        pending = false;
+        var videos = document.getElementsByTagName('video');
+        for (var i = 0; i < videos.length; i++) {
+            scanVideo(videos[i]);
+        }
+    }
+    function touchesVideo(node) {
+        var name = node.nodeName;
+        return name === 'VIDEO' || name === 'SOURCE' ||
+               (node.getElementsByTagName && node.getElementsByTagName('video').length > 0);
+    }
+    var observer = new MutationObserver(function(mutations) {
+        if (pending) {
+            return;
+        }
+        for (var i = 0; i < mutations.length; i++) {
+            var m = mutations[i];
+            var nodes = m.type === 'attributes' ? [m.target] : m.addedNodes;
+            for (var j = 0; j < nodes.length; j++) {
+                if (touchesVideo(nodes[j])) {
+                    pending = true;
+                    setTimeout(scan, 300);
+                    return;
+                }
+            }
+        }
+    });
+    observer.observe(document, {childList: true, subtree: true,
+                                attributes: true, attributeFilter: ['src']});
+    // Medienereignisse steigen nicht auf, erreichen document aber in der Capture-Phase
+    document.addEventListener('loadedmetadata', function(e) {
+        if (e.target.nodeName === 'VIDEO') {
+            scanVideo(e.target);
+        }
+    }, true);
+    document.addEventListener('DOMContentLoaded', scan);
+})();
+"""
+
+_page_watcher_script = None
+
+def page_watcher_script():
+    """
+    QWebEngineScript aus qwebchannel.js (Qt-Ressource), PAGE_CHANNEL_JS und
+    den Watchern für Login-Felder und Videos.
+    """
+    global _page_watcher_script
+    if _page_watcher_script is None:
+        source = QFile(":/qtwebchannel/qwebchannel.js")
+        if not source.open(QIODevice.OpenModeFlag.ReadOnly):
+            raise OSError("qwebchannel.js nicht gefunden")
+        channel_js = bytes(source.readAll()).decode("utf-8")
+        source.close()
+        script = QWebEngineScript()
+        script.setName("tmp-page-watcher")
+        # Standardpuffer der Resource Timing API: nur 250 Einträge
+        timing_js = f"performance.setResourceTimingBufferSize({PERF_RESOURCE_BUFFER});\n"
+        script.setSourceCode(channel_js + PAGE_CHANNEL_JS + LOGIN_WATCHER_JS + MEDIA_WATCHER_JS + timing_js)
+        script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+        script.setWorldId(QWebEngineScript.ScriptWorldId.ApplicationWorld)
+        script.setRunsOnSubFrames(True)
+        _page_watcher_script = script
+    return _page_watcher_script
 
 class WebChannelInterface(QObject):
+    """
+    Gegenstelle von LOGIN_WATCHER_JS für einen Tab. Meldungen aus Frames
+    einer anderen Site (eingebettete Logins, Werbung) werden verworfen.
+    """
+    def __init__(self, browser, view):
+        super().__init__(view)
+        self.browser = browser
+        self.view = view
+
+    def _same_site(self, host):
+        index = self.browser.credential_index
+        return bool(host) and index.site_of(host) == index.site_of(self.view.url().host())
+
+    @pyqtSlot(str)
+    def password_field_found(self, host):
+        if host == self.view.url().host():
+            self.browser.offer_credentials(self.view)
+
+    @pyqtSlot(str, str, str)
+    def submit_form(self, host, username, password):
+        if self._same_site(host):
+            self.browser.handle_form_submission(self.view, host, username, password)
+
+# --------------------------------------------------
+#  Videoerkennung: Netzwerk und DOM aller Frames
+# --------------------------------------------------
+class MediaCandidate:
+    __slots__ = ("url", "kind", "label", "height", "origin")
+
+    def __init__(self, url, kind, label="", height=0, origin="dom"):
+        self.url = url
+        self.kind = kind  # "hls", "dash" oder "file"
+        self.label = label
+        self.height = height
+        self.origin = origin  # "dom" oder "network"
+
+    def sort_key(self):
+        # Manifeste zuerst (sie werden auf die passende Variante aufgelöst),
+        # danach Dateien nach Auflösung
+        return (self.kind == "file", -self.height)
+
+class MediaTabState:
+    __slots__ = ("candidates", "uses_mse")
+
+    def __init__(self):
+        self.candidates = OrderedDict()
+        self.uses_mse = False
+
+class MediaDiscovery(QObject):
+    """
+    Laufend gepflegte Liste abspielbarer Videos pro Tab.
+
+    Quellen sind MEDIA_WATCHER_JS (Video-Elemente in allen Frames) und
+    PageRequestInterceptor (HLS-/DASH-Manifeste, auch per XHR/fetch, und
+    Medienanfragen). Eine neue Navigation leert die Liste des Tabs;
+    changed(view) meldet jede Änderung.
+    """
+    changed = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tabs = {}
+
+    def state(self, view):
+        state = self.tabs.get(view)
+        if state is None:
+            state = self.tabs[view] = MediaTabState()
+        return state
+
+    def candidates(self, view):
+        state = self.tabs.get(view)
+        if state is None:
+            return []
+        return sorted(state.candidates.values(), key=MediaCandidate.sort_key)
+
+    def uses_mse(self, view):
+        state = self.tabs.get(view)
+        return state is not None and state.uses_mse
+
+    def reset(self, view):
+        state = self.tabs.get(view)
+        if state is not None and (state.candidates or state.uses_mse):
+            self.tabs[view] = MediaTabState()
+            self.changed.emit(view)
+
+    def forget(self, view):
+        self.tabs.pop(view, None)
+
+    def mark_mse(self, view):
+        state = self.state(view)
+        if not state.uses_mse:
+            state.uses_mse = True
+            self.changed.emit(view)
+
+    def add(self, view, url, kind=None, label="", height=0, origin="dom"):
+        if kind is None:
+            kind = manifest_kind(url) or "file"
+        state = self.state(view)
+        known = state.candidates.get(url)
+        if known is not None:
+            if height <= known.height and (known.label or not label):
+                return
+            known.height = max(known.height, height)
+            known.label = known.label or label
+        else:
+            if len(state.candidates) >= MEDIA_MAX_CANDIDATES:
+                return
+            if origin == "network" and kind != "file" and self._is_variant(state, url, kind):
+                return
+            state.candidates[url] = MediaCandidate(url, kind, label, height, origin)
+        self.changed.emit(view)
+
+    def observe_request(self, view, info):
+        """
+        Von PageRequestInterceptor: Manifeste (auch per XHR/fetch) und
+        Medienanfragen als Kandidaten übernehmen.
+        """
+        url = info.requestUrl()
+        if url.scheme() not in ("http", "https"):
+            return
+        text = url.toString()
+        kind = manifest_kind(text)
+        if kind is None:
+            # Dateien nur als Medienanfrage (<video src>); per XHR geladene
+            # .mp4/.m4s sind Segmente eines MediaSource-Players
+            if info.resourceType() != QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMedia:
+                return
+            kind = "file"
+        self.add(view, text, kind, origin="network")
+
+    def _is_variant(self, state, url, kind):
+        # Unter-Playlists/Repräsentationen liegen neben oder unter dem
+        # bereits gefundenen Master-Manifest
+        path = url.split("?", 1)[0]
+        for candidate in state.candidates.values():
+            if candidate.kind == kind and path.startswith(candidate.url.split("?", 1)[0].rsplit("/", 1)[0] + "/"):
+                return True
+        return False
+
+class MediaChannelInterface(QObject):
+    """
+    Gegenstelle von MEDIA_WATCHER_JS für einen Tab.
+    """
+    def __init__(self, discovery, view):
+        super().__init__(view)
+        self.discovery = discovery
+        self.view = view
+
+    @pyqtSlot(str, str, int)
+    def media_found(self, url, label, height):
+        self.discovery.add(self.view, url, label=label, height=height)
+
+    @pyqtSlot()
+    def mse_found(self):
+        self.discovery.mark_mse(self.view)
+
+# --------------------------------------------------
+#  Ladezeiten pro Tab (Navigation/Resource Timing, HAR-Export)
+# --------------------------------------------------
+# Läuft nach dem Laden in der Anwendungswelt; liefert Navigation Timing des
+# Dokuments und Resource Timing aller Unterressourcen (nur Hauptframe).
+PERF_COLLECT_JS = """
+(function() {
+    var FIELDS = ['name', 'initiatorType', 'startTime', 'duration', 'fetchStart',
+                  'domainLookupStart', 'domainLookupEnd', 'connectStart', 'connectEnd',
+                  'secureConnectionStart', 'requestStart', 'responseStart', 'responseEnd',
+                  'transferSize', 'encodedBodySize', 'decodedBodySize', 'nextHopProtocol',
+                  'responseStatus'];
+    function pick(entry) {
+        var result = {};
+        FIELDS.forEach(function(field) { result[field] = entry[field]; });
+        return result;
+    }
+    var result = {
+        timeOrigin: performance.timeOrigin,
+        resources: performance.getEntriesByType('resource').map(pick)
+    };
+    var nav = performance.getEntriesByType('navigation')[0];
+    if (nav) {
+        result.navigation = pick(nav);
+        result.navigation.domContentLoaded = nav.domContentLoadedEventEnd;
+        result.navigation.load = nav.loadEventEnd;
+    }
+    return result;
+})();
+"""
+
+RESOURCE_TYPE_NAMES = {
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMainFrame: "document",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeSubFrame: "iframe",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeStylesheet: "css",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeScript: "script",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeImage: "img",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeFontResource: "font",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMedia: "media",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeXhr: "xhr",
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypePing: "ping",
+}
+
+class PageLoadRecord:
+    """
+    Ein Seitenaufruf eines Tabs: per Interceptor mitgeschriebene Anfragen
+    (Zeitpunkt, Methode, Typ) und nach dem Laden die Timing-Daten der Seite.
+    """
+    def __init__(self, url):
+        self.url = url
+        self.title = ""
+        self.started = time.time()
+        self._started_monotonic = time.monotonic()
+        self.requests = []  # (ms seit Start, Methode, Typ, URL)
+        self.navigation = None
+        self.resources = []
+
+    def add_request(self, method, kind, url):
+        if len(self.requests) < PERF_MAX_REQUESTS:
+            offset = (time.monotonic() - self._started_monotonic) * 1000
+            self.requests.append((offset, method, kind, url))
+
+    def apply_timing(self, data):
+        if data.get("timeOrigin"):
+            self.started = data["timeOrigin"] / 1000
+        self.navigation = data.get("navigation")
+        self.resources = data.get("resources") or []
+
+    # ---------- Kennzahlen (ms bzw. Bytes; None = unbekannt) ----------
+    def ttfb(self):
+        return self.navigation.get("responseStart") if self.navigation else None
+
+    def dom_content_loaded(self):
+        return self.navigation.get("domContentLoaded") or None if self.navigation else None
+
+    def load(self):
+        return self.navigation.get("load") or None if self.navigation else None
+
+    def transferred_bytes(self):
+        entries = self.resources + ([self.navigation] if self.navigation else [])
+        return sum(entry.get("transferSize") or 0 for entry in entries)
+
+    def cache_counts(self):
+        """
+        (aus dem Cache, revalidiert, aus dem Netz, Bytes aus dem Cache) laut
+        Resource Timing. transferSize 0 bei vorhandenem Inhalt heißt Cache-
+        Treffer; kleiner als der Inhalt heißt 304 (nur Header übertragen).
+        Einträge ohne Größen (fremder Ursprung) zählen nicht.
+        """
+        hits = revalidated = misses = cached_bytes = 0
+        for entry in self.resources + ([self.navigation] if self.navigation else []):
+            transfer = entry.get("transferSize") or 0
+            body = entry.get("encodedBodySize") or 0
+            if not body:
+                continue
+            if transfer == 0:
+                hits += 1
+                cached_bytes += body
+            elif transfer < body:
+                revalidated += 1
+                cached_bytes += body
+            else:
+                misses += 1
+        return hits, revalidated, misses, cached_bytes
+
+    def request_count(self):
+        # Der Interceptor sieht auch Frames und nicht erfasste Ressourcen
+        return max(len(self.requests), len(self.resources) + (1 if self.navigation else 0))
+
+    # ---------- HAR ----------
+    def har_page(self, page_id):
+        return {
+            "startedDateTime": har_time(self.started),
+            "id": page_id,
+            "title": self.title or self.url,
+            "pageTimings": {
+                "onContentLoad": round(self.dom_content_loaded() or -1, 3),
+                "onLoad": round(self.load() or -1, 3),
+            },
+        }
+
+    def har_entries(self, page_id):
+        methods = {}
+        kinds = {}
+        for _, method, kind, url in self.requests:
+            methods.setdefault(url, method)
+            kinds.setdefault(url, kind)
+        entries = []
+        timed_urls = set()
+        timing_entries = ([self.navigation] if self.navigation else []) + self.resources
+        for entry in timing_entries:
+            timed_urls.add(entry["name"])
+            entries.append(har_entry(page_id, self.started, entry,
+                                     methods.get(entry["name"], "GET"),
+                                     kinds.get(entry["name"], entry.get("initiatorType", ""))))
+        # Nur vom Interceptor gesehen (Frames, Pufferüberlauf, fremde Ursprünge)
+        for offset, method, kind, url in self.requests:
+            if url in timed_urls:
+                continue
+            timed_urls.add(url)
+            entries.append(har_entry(page_id, self.started, {"name": url, "startTime": offset},
+                                     method, kind))
+        return entries
+
+def har_time(seconds):
+    return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).isoformat(timespec="milliseconds")
+
+def har_entry(page_id, page_started, entry, method, kind):
+    """
+    HAR-Eintrag aus einem PerformanceResourceTiming-Eintrag. Fehlen die
+    Detailzeiten (fremder Ursprung ohne Timing-Allow-Origin), zählt die
+    ganze Dauer als "wait".
+    """
+    start = entry.get("startTime") or 0
+    duration = entry.get("duration") or 0
+
+    def span(begin, end):
+        a, b = entry.get(begin) or 0, entry.get(end) or 0
+        return round(b - a, 3) if a and b >= a else -1
+
+    timings = {"blocked": -1, "dns": span("domainLookupStart", "domainLookupEnd"),
+               "connect": span("connectStart", "connectEnd"),
+               "ssl": span("secureConnectionStart", "connectEnd"),
+               "send": 0, "wait": round(duration, 3), "receive": 0}
+    if entry.get("requestStart") and entry.get("responseStart"):
+        timings["wait"] = span("requestStart", "responseStart")
+        timings["receive"] = span("responseStart", "responseEnd")
+        timings["blocked"] = round(max(0, entry["requestStart"] - start
+                                       - max(timings["dns"], 0) - max(timings["connect"], 0)), 3)
+    protocol = entry.get("nextHopProtocol") or ""
+    body = entry.get("encodedBodySize")
+    return {
+        "pageref": page_id,
+        "startedDateTime": har_time(page_started + start / 1000),
+        "time": round(duration, 3),
+        "request": {
+            "method": method, "url": entry["name"], "httpVersion": protocol,
+            "cookies": [], "headers": [], "queryString": [],
+            "headersSize": -1, "bodySize": -1,
+        },
+        "response": {
+            "status": entry.get("responseStatus") or 0, "statusText": "",
+            "httpVersion": protocol, "cookies": [], "headers": [],
+            "content": {"size": entry.get("decodedBodySize") or 0, "mimeType": ""},
+            "redirectURL": "", "headersSize": -1,
+            "bodySize": body if body is not None else -1,
+            "_transferSize": entry.get("transferSize") or 0,
+            "_resourceType": kind,
+        },
+        "cache": {},
+        "timings": timings,
+    }
+
+class PageTimingRecorder(QObject):
+    """
+    Ladezeiten pro Tab als rollendes Fenster der letzten PERF_WINDOW_LOADS
+    Seitenaufrufe.
+
+    Eine Navigation des Hauptframes beginnt einen neuen Eintrag; jede
+    Anfrage der Seite wird mit Zeitpunkt vermerkt (PageRequestInterceptor).
+    Nach dem Laden liest PERF_COLLECT_JS Navigation und Resource Timing aus.
+    updated(view) meldet neue Daten.
+    """
+    updated = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loads = {}
+
+    def records(self, view):
+        return list(self.loads.get(view, ()))
+
+    def latest(self, view):
+        window = self.loads.get(view)
+        return window[-1] if window else None
+
+    def forget(self, view):
+        self.loads.pop(view, None)
+
+    def observe_request(self, view, info):
+        url = info.requestUrl().toString()
+        resource_type = info.resourceType()
+        window = self.loads.setdefault(view, deque(maxlen=PERF_WINDOW_LOADS))
+        if resource_type == QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMainFrame or not window:
+            window.append(PageLoadRecord(url))
+        window[-1].add_request(bytes(info.requestMethod()).decode("ascii", "replace"),
+                               RESOURCE_TYPE_NAMES.get(resource_type, "other"), url)
+
+    def collect(self, view):
+        record = self.latest(view)
+        if record is None:
+            return
+        record.title = view.page().title()
+        view.page().runJavaScript(
+            PERF_COLLECT_JS, QWebEngineScript.ScriptWorldId.ApplicationWorld,
+            lambda data, v=view, r=record: self._apply(v, r, data))
+
+    def _apply(self, view, record, data):
+        if not isinstance(data, dict) or view not in self.loads:
+            return
+        record.apply_timing(data)
+        self.updated.emit(view)
+
+    def har(self, view):
+        records = self.records(view)
+        pages = []
+        entries = []
+        for i, record in enumerate(records):
+            page_id = f"page_{i + 1}"
+            pages.append(record.har_page(page_id))
+            entries.extend(record.har_entries(page_id))
+        return {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "TMP-Networks-Browser-Mini", "version": f"PyQt6 {PYQT_VERSION_STR}"},
+                "pages": pages,
+                "entries": entries,
+            }
+        }
+
+class PageRequestInterceptor(QWebEngineUrlRequestInterceptor):
+    """
+    Sieht alle Anfragen einer Seite (Werbeblocker, Videoerkennung,
+    Ladezeiten); blockierte Anfragen gehen nicht in die Messung ein.
+
+    Pro Seite installiert: Profil-Interceptoren sehen nur die Site (für
+    Cookies) der Anfrage, nicht den Tab, aus dem sie stammt.
+    """
+    def __init__(self, browser, view):
+        super().__init__(view)
+        self.browser = browser
+        self.view = view
+
+    def interceptRequest(self, info):
+        if self.browser.blocker.observe_request(self.view, info):
+            return
+        self.browser.timing.observe_request(self.view, info)
+        self.browser.media.observe_request(self.view, info)
+
+class PerformancePanelDialog(QDialog):
+    """
+    Ladezeiten der letzten Seitenaufrufe des aktuellen Tabs. Nicht modal;
+    folgt dem Tabwechsel und neuen Messungen.
+    """
+    COLUMNS = ("Seite", "TTFB", "DOMContentLoaded", "Load", "Übertragen", "Anfragen")
+
     def __init__(self, browser):
-        super().__init__()
+        super().__init__(browser)
+        self.setWindowTitle("Ladezeiten")
+        self.resize(800, 350)
         self.browser = browser
 
-    @pyqtSlot(str, str)
-    def submit_form(self, username, password):
-        self.browser.handle_form_submission(username, password)
+        layout = QVBoxLayout()
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        refresh_btn = QPushButton("Neu messen")
+        export_btn = QPushButton("Als HAR exportieren…")
+        close_btn = QPushButton("Schließen")
+        for btn in (refresh_btn, export_btn, close_btn):
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+        refresh_btn.clicked.connect(lambda: self._with_view(browser.timing.collect))
+        export_btn.clicked.connect(lambda: self._with_view(browser.export_har))
+        close_btn.clicked.connect(self.hide)
+        browser.timing.updated.connect(self._on_updated)
+        browser.tabs.currentChanged.connect(lambda _: self.refresh())
+        self.refresh()
+
+    def _with_view(self, action):
+        view = self.browser.tabs.currentWidget()
+        if isinstance(view, QWebEngineView):
+            action(view)
+
+    def _on_updated(self, view):
+        if view is self.browser.tabs.currentWidget():
+            self.refresh()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        records = self.browser.timing.records(self.browser.tabs.currentWidget())
+
+        def ms(value):
+            return f"{value:.0f} ms" if value is not None else "–"
+        self.table.setRowCount(len(records))
+        # Neuester Aufruf oben
+        for row, record in enumerate(reversed(records)):
+            values = (record.title or record.url, ms(record.ttfb()), ms(record.dom_content_loaded()),
+                      ms(record.load()), format_bytes(record.transferred_bytes()),
+                      str(record.request_count()))
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+            self.table.item(row, 0).setToolTip(record.url)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+# --------------------------------------------------
+#  Werbeblocker: kompilierte Filterlisten (EasyList-Format)
+# --------------------------------------------------
+FILTER_TYPE_BITS = {
+    "script": 1, "image": 2, "stylesheet": 4, "subdocument": 8, "xmlhttprequest": 16,
+    "media": 32, "font": 64, "object": 128, "ping": 256, "websocket": 512, "other": 1024,
+}
+FILTER_ALL_TYPES = sum(FILTER_TYPE_BITS.values())
+FILTER_RESOURCE_TYPES = {
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeScript: FILTER_TYPE_BITS["script"],
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeImage: FILTER_TYPE_BITS["image"],
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeFavicon: FILTER_TYPE_BITS["image"],
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeStylesheet: FILTER_TYPE_BITS["stylesheet"],
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeSubFrame: FILTER_TYPE_BITS["subdocument"],
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeXhr: FILTER_TYPE_BITS["xmlhttprequest"],
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMedia: FILTER_TYPE_BITS["media"],
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeFontResource: FILTER_TYPE_BITS["font"],
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypeObject: FILTER_TYPE_BITS["object"],
+    QWebEngineUrlRequestInfo.ResourceType.ResourceTypePing: FILTER_TYPE_BITS["ping"],
+}
+# Optionen ohne Bedeutung für das Blockieren einzelner Anfragen
+FILTER_IGNORED_OPTIONS = frozenset(("match-case", "important"))
+# Zeichenraum für die Zustandsnummern im Automaten (Zustand * Raum + Zeichen)
+AC_CHAR_SPAN = 0x110000
+FILTER_TOKEN_RE = re.compile(r"[a-z0-9%]+")
+# Kommen in fast jeder URL vor und taugen nur zur Not als Index
+FILTER_BAD_TOKENS = frozenset(("http", "https", "www", "com", "net", "org", "de", "js", "html"))
+
+class AhoCorasick:
+    """
+    Mehrmuster-Automat: findet alle Schlüsselwörter in einem einzigen
+    Durchlauf über den Text. Alle Übergänge liegen in einem dict mit der
+    Zahl Zustand * AC_CHAR_SPAN + Zeichen als Schlüssel – deutlich
+    kleiner als ein dict pro Zustand und schnell zu (ent)pickeln.
+    """
+    def __init__(self, keywords):
+        delta = {}
+        out = {}
+        states = 1
+        for kid, word in enumerate(keywords):
+            state = 0
+            for ch in word:
+                key = state * AC_CHAR_SPAN + ord(ch)
+                nxt = delta.get(key)
+                if nxt is None:
+                    nxt = delta[key] = states
+                    states += 1
+                state = nxt
+            out.setdefault(state, []).append(kid)
+
+        children = [[] for _ in range(states)]
+        for key, nxt in delta.items():
+            children[key // AC_CHAR_SPAN].append((key % AC_CHAR_SPAN, nxt))
+        fail = [0] * states
+        # Breitensuche: Fehlerzustände sind immer flacher und damit schon
+        # fertig, ihre Treffer werden übernommen
+        queue = deque(nxt for _, nxt in children[0])
+        while queue:
+            state = queue.popleft()
+            for code, nxt in children[state]:
+                f = fail[state]
+                while f and f * AC_CHAR_SPAN + code not in delta:
+                    f = fail[f]
+                target = delta.get(f * AC_CHAR_SPAN + code, 0)
+                fail[nxt] = target
+                if target in out:
+                    out.setdefault(nxt, []).extend(out[target])
+                queue.append(nxt)
+        self.delta = delta
+        self.fail = fail
+        self.out = {state: tuple(kids) for state, kids in out.items()}
+
+    def iter_matches(self, text):
+        """Nummern der gefundenen Schlüsselwörter (mehrfach möglich)."""
+        delta = self.delta
+        fail = self.fail
+        out = self.out
+        state = 0
+        for ch in text:
+            code = ord(ch)
+            nxt = delta.get(state * AC_CHAR_SPAN + code)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = delta.get(state * AC_CHAR_SPAN + code)
+            state = nxt or 0
+            if state in out:
+                yield from out[state]
+
+def filter_pattern_regex(pattern):
+    """
+    Adblock-Muster als regulärer Ausdruck: "||" = Domain oder Subdomain,
+    "|" = Anfang/Ende, "^" = Trennzeichen oder Ende, "*" = beliebig.
+    """
+    prefix = suffix = ""
+    if pattern.startswith("||"):
+        prefix = r"^[a-z][a-z0-9+.-]*://(?:[^/?#]*\.)?"
+        pattern = pattern[2:]
+    elif pattern.startswith("|"):
+        prefix = "^"
+        pattern = pattern[1:]
+    if pattern.endswith("|"):
+        suffix = "$"
+        pattern = pattern[:-1]
+    body = re.escape(pattern).replace(r"\*", ".*").replace(r"\^", r"(?:[^\w\-.%]|$)")
+    return prefix + body + suffix
+
+def filter_tokens(pattern):
+    """
+    Wörter des Musters, die in jeder passenden URL als ganzes Wort (im
+    Sinne von FILTER_TOKEN_RE) vorkommen müssen: links und rechts steht
+    ein festes Trennzeichen, "^" oder ein Anker – kein "*" und kein
+    offener Rand.
+    """
+    anchored_start = pattern.startswith("|")
+    anchored_end = pattern.endswith("|") and not pattern.endswith("||")
+    body = pattern.lstrip("|")
+    if anchored_end:
+        body = body[:-1]
+    tokens = []
+    for match in FILTER_TOKEN_RE.finditer(body):
+        start, end = match.span()
+        if end - start < 2:
+            continue
+        if start == 0 and not anchored_start or start > 0 and body[start - 1] == "*":
+            continue
+        if end == len(body) and not anchored_end or end < len(body) and body[end] == "*":
+            continue
+        tokens.append(match.group())
+    return tokens
+
+def filter_keyword(pattern):
+    """
+    Längstes festes Stück des Musters, unter dem die Regel im Automaten
+    einsortiert wird (auf FILTER_KEYWORD_LENGTH gekürzt); None, wenn kein
+    Stück lang genug ist.
+    """
+    pieces = re.split(r"[*^|]", pattern)
+    best = max(pieces, key=len)
+    if len(best) < FILTER_MIN_KEYWORD:
+        return None
+    return best[:FILTER_KEYWORD_LENGTH]
+
+def host_suffixes(host):
+    """"a.b.example.com" -> a.b.example.com, b.example.com, example.com, com"""
+    yield host
+    i = host.find(".")
+    while i >= 0:
+        yield host[i + 1:]
+        i = host.find(".", i + 1)
+
+class FilterMatcher:
+    """
+    Regeln einer Art (blockieren oder Ausnahme), dreistufig vorsortiert:
+
+    - reine Domainregeln ("||ads.example^") in einer Menge: eine Abfrage
+      pro Label des Hosts;
+    - sonst nach einem Wort, das die URL enthalten muss: die URL wird
+      einmal (in C) in Wörter zerlegt, je Wort eine dict-Abfrage;
+    - Regeln ohne solches Wort nach ihrem längsten festen Stück im
+      Aho-Corasick-Automaten, der nur läuft, wenn es solche Regeln gibt.
+
+    Geprüft werden nur die so gefundenen Regeln; ihre Ausdrücke werden
+    erst beim ersten Gebrauch kompiliert.
+    """
+    def __init__(self):
+        self.domains = set()
+        # (Ausdruck, Typ-Bits, Partei, erlaubte Seiten, ausgeschlossene Seiten);
+        # Partei: 0 = alle, 1 = nur Drittanbieter, 2 = nur Erstanbieter
+        self.rules = []
+        self.tokens = {}
+        self.keywords = {}
+        self.generic = []
+        self.automaton = None
+        self.keyword_words = []
+        self.keyword_rules = ()
+        self._compiled = []
+
+    def add(self, pattern, types, party, include, exclude):
+        if (types == FILTER_ALL_TYPES and not party and not include and not exclude
+                and re.fullmatch(r"\|\|[a-z0-9.-]+\^", pattern)):
+            self.domains.add(pattern[2:].rstrip("^"))
+            return
+        index = len(self.rules)
+        self.rules.append((filter_pattern_regex(pattern), types, party, include, exclude))
+        tokens = filter_tokens(pattern)
+        if tokens:
+            # Seltenstes Wort wählen, damit pro Wort wenige Regeln zu prüfen sind
+            token = min(tokens, key=lambda t: (t in FILTER_BAD_TOKENS, len(self.tokens.get(t, ())), -len(t)))
+            self.tokens.setdefault(token, []).append(index)
+            return
+        keyword = filter_keyword(pattern)
+        if keyword is None:
+            self.generic.append(index)
+        else:
+            self.keywords.setdefault(keyword, []).append(index)
+
+    def finish(self):
+        self.tokens = {token: tuple(rules) for token, rules in self.tokens.items()}
+        self.keyword_words = list(self.keywords)
+        self.keyword_rules = [tuple(self.keywords[word]) for word in self.keyword_words]
+        self.keywords = {}
+        self._build()
+
+    def _build(self):
+        words = self.keyword_words
+        self.automaton = AhoCorasick(words) if words else None
+        self._compiled = [None] * len(self.rules)
+
+    def to_data(self):
+        """Nur Zeichenketten, Zahlen, Listen und dicts (für JSON)."""
+        return {
+            "domains": sorted(self.domains),
+            "rules": [[regex, types, party,
+                       sorted(include) if include else None,
+                       sorted(exclude) if exclude else None]
+                      for regex, types, party, include, exclude in self.rules],
+            "tokens": {token: list(rules) for token, rules in self.tokens.items()},
+            "keywords": self.keyword_words,
+            "keyword_rules": [list(rules) for rules in self.keyword_rules],
+            "generic": self.generic,
+        }
+
+    @classmethod
+    def from_data(cls, data):
+        matcher = cls()
+        matcher.domains = set(data["domains"])
+        matcher.rules = [(str(regex), int(types), int(party),
+                          frozenset(include) if include else None,
+                          frozenset(exclude) if exclude else None)
+                         for regex, types, party, include, exclude in data["rules"]]
+        count = len(matcher.rules)
+
+        def indices(values):
+            values = tuple(int(i) for i in values)
+            if any(not 0 <= i < count for i in values):
+                raise ValueError("Regelindex außerhalb des Bereichs")
+            return values
+        matcher.tokens = {str(token): indices(rules) for token, rules in data["tokens"].items()}
+        matcher.keyword_words = [str(word) for word in data["keywords"]]
+        matcher.keyword_rules = [indices(rules) for rules in data["keyword_rules"]]
+        if len(matcher.keyword_rules) != len(matcher.keyword_words):
+            raise ValueError("Schlüsselwörter und Regeln passen nicht zusammen")
+        matcher.generic = list(indices(data["generic"]))
+        matcher._build()
+        return matcher
+
+    def __len__(self):
+        return len(self.domains) + len(self.rules)
+
+    def match(self, url, host, page_host, type_bit, third_party):
+        for suffix in host_suffixes(host):
+            if suffix in self.domains:
+                return True
+        for index in self.generic:
+            if self._rule_matches(index, url, page_host, type_bit, third_party):
+                return True
+        tokens = self.tokens
+        for token in FILTER_TOKEN_RE.findall(url):
+            rules = tokens.get(token)
+            if rules:
+                for index in rules:
+                    if self._rule_matches(index, url, page_host, type_bit, third_party):
+                        return True
+        if self.automaton is not None:
+            keyword_rules = self.keyword_rules
+            for kid in self.automaton.iter_matches(url):
+                for index in keyword_rules[kid]:
+                    if self._rule_matches(index, url, page_host, type_bit, third_party):
+                        return True
+        return False
+
+    def _rule_matches(self, index, url, page_host, type_bit, third_party):
+        regex, types, party, include, exclude = self.rules[index]
+        if not types & type_bit:
+            return False
+        if party and (party == 1) != third_party:
+            return False
+        if include or exclude:
+            suffixes = set(host_suffixes(page_host))
+            if include and not suffixes & include:
+                return False
+            if exclude and suffixes & exclude:
+                return False
+        compiled = self._compiled[index]
+        if compiled is None:
+            compiled = self._compiled[index] = re.compile(regex)
+        return compiled.search(url) is not None
+
+class FilterEngine:
+    """
+    Kompilierte Filterlisten. Versteht die Netzwerkregeln des EasyList-
+    Formats (Anker, "^", "*", Ausnahmen "@@", Optionen für Typ,
+    Dritt-/Erstanbieter und domain=). Element-Verstecken ("##"),
+    reguläre Ausdrücke und Optionen, die keine einzelne Anfrage
+    betreffen (popup, csp, redirect …), werden übergangen.
+    """
+    def __init__(self):
+        self.block = FilterMatcher()
+        self.allow = FilterMatcher()
+        # "@@||seite^$document": auf diesen Seiten nichts blockieren
+        self.allowed_pages = set()
+        self.skipped = 0
+        # Host -> registrierbare Domain (Dritt-/Erstanbieter je Anfrage)
+        self._sites = {}
+
+    @property
+    def rule_count(self):
+        return len(self.block) + len(self.allow) + len(self.allowed_pages)
+
+    def add_line(self, line):
+        line = line.strip()
+        if not line or line[0] in "![" or "##" in line or "#@#" in line or "#?#" in line:
+            return
+        exception = line.startswith("@@")
+        if exception:
+            line = line[2:]
+        pattern, options = line, ""
+        if "$" in line:
+            pattern, options = line.rsplit("$", 1)
+        pattern = pattern.lower()
+        if len(pattern) > 1 and pattern.startswith("/") and pattern.endswith("/"):
+            self.skipped += 1
+            return
+        types, party, include, exclude, document = self._parse_options(options)
+        if types is None:
+            self.skipped += 1
+            return
+        if document:
+            if exception and re.fullmatch(r"\|\|[a-z0-9.-]+\^", pattern):
+                self.allowed_pages.add(pattern[2:].rstrip("^"))
+            if not types:
+                return
+        if not types:
+            self.skipped += 1
+            return
+        pattern = pattern.lstrip("*") if not pattern.startswith("|") else pattern
+        if not pattern.strip("*^|"):
+            # Leeres Muster nur mit Optionen ("$script,domain=…") träfe alles
+            if not include:
+                self.skipped += 1
+                return
+            pattern = "*"
+        (self.allow if exception else self.block).add(pattern, types, party, include, exclude)
+
+    @staticmethod
+    def _parse_options(options):
+        """(Typ-Bits, Partei, erlaubte, ausgeschlossene Seiten, document) oder None-Typen."""
+        types = 0
+        negated = 0
+        party = 0
+        include = exclude = None
+        document = False
+        for option in filter(None, options.lower().split(",")):
+            inverse = option.startswith("~")
+            name = option.lstrip("~")
+            if name in FILTER_TYPE_BITS:
+                if inverse:
+                    negated |= FILTER_TYPE_BITS[name]
+                else:
+                    types |= FILTER_TYPE_BITS[name]
+            elif name in ("third-party", "3p"):
+                party = 2 if inverse else 1
+            elif name in ("first-party", "1p"):
+                party = 1 if inverse else 2
+            elif name.startswith("domain="):
+                domains = name[len("domain="):].split("|")
+                include = frozenset(d for d in domains if d and not d.startswith("~")) or None
+                exclude = frozenset(d[1:] for d in domains if d.startswith("~")) or None
+            elif name == "document" and not inverse:
+                document = True
+            elif name == "all":
+                types |= FILTER_ALL_TYPES
+                document = True
+            elif name not in FILTER_IGNORED_OPTIONS:
+                return None, 0, None, None, False
+        if not types and not document:
+            types = FILTER_ALL_TYPES
+        if negated:
+            types = (types or FILTER_ALL_TYPES) & ~negated
+        return types, party, include, exclude, document
+
+    def add_list(self, lines):
+        for line in lines:
+            self.add_line(line)
+
+    def finish(self):
+        self.block.finish()
+        self.allow.finish()
+        return self
+
+    def to_data(self):
+        return {
+            "block": self.block.to_data(),
+            "allow": self.allow.to_data(),
+            "allowed_pages": sorted(self.allowed_pages),
+            "skipped": self.skipped,
+        }
+
+    @classmethod
+    def from_data(cls, data):
+        engine = cls()
+        engine.block = FilterMatcher.from_data(data["block"])
+        engine.allow = FilterMatcher.from_data(data["allow"])
+        engine.allowed_pages = set(data["allowed_pages"])
+        engine.skipped = int(data["skipped"])
+        return engine
+
+    def should_block(self, url, host, page_host, type_bit):
+        """
+        url und Hosts klein geschrieben; page_host ist der Host der Seite
+        (Erstanbieter), type_bit ein Wert aus FILTER_TYPE_BITS.
+        """
+        for suffix in host_suffixes(page_host):
+            if suffix in self.allowed_pages:
+                return False
+        third_party = self._site(host) != self._site(page_host)
+        if not self.block.match(url, host, page_host, type_bit, third_party):
+            return False
+        return not self.allow.match(url, host, page_host, type_bit, third_party)
+
+    def _site(self, host):
+        site = self._sites.get(host)
+        if site is None:
+            if len(self._sites) >= 10000:
+                self._sites.clear()
+            site = self._sites[host] = get_public_suffixes().registrable_domain(host)
+        return site
+
+    @classmethod
+    def load(cls, directory=FILTER_LIST_DIR, cache_file=FILTER_CACHE_FILE):
+        """
+        Alle *.txt-Listen aus directory. Die kompilierte Fassung liegt als
+        JSON (nur Daten, kein ausführbarer Inhalt) in cache_file und gilt,
+        solange Namen, Größen und Änderungszeiten der Listen gleich sind;
+        der Automat wird beim Laden neu aufgebaut. Ein unlesbarer oder
+        beschädigter Cache zählt als nicht vorhanden.
+        """
+        try:
+            names = sorted(n for n in os.listdir(directory) if n.lower().endswith(".txt"))
+        except OSError:
+            names = []
+        sources = []
+        for name in names:
+            st = os.stat(os.path.join(directory, name))
+            sources.append((name, st.st_size, st.st_mtime_ns))
+        key = [FILTER_CACHE_VERSION, [list(source) for source in sources]]
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached["key"] == key:
+                return cls.from_data(cached["engine"])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print("Filter-Cache unbrauchbar, Listen werden neu kompiliert:", e)
+
+        engine = cls()
+        for name, _size, _mtime in sources:
+            with open(os.path.join(directory, name), "r", encoding="utf-8", errors="replace") as f:
+                engine.add_list(f)
+        engine.finish()
+        if sources:
+            tmp_path = f"{cache_file}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"key": key, "engine": engine.to_data()}, f, separators=(",", ":"))
+                os.replace(tmp_path, cache_file)
+            except OSError as e:
+                print("Fehler beim Schreiben des Filter-Caches:", e)
+        return engine
+
+class ContentBlocker(QObject):
+    """
+    Blockiert Anfragen laut Filterlisten (von PageRequestInterceptor
+    aufgerufen) und zählt die blockierten Anfragen pro Tab; die Zählung
+    beginnt mit jedem Seitenaufruf neu. Die Listen werden im Hintergrund
+    geladen, bis dahin wird nichts blockiert. Es läuft immer nur ein
+    Ladevorgang; Aufrufe währenddessen laden danach noch einmal.
+    """
+    count_changed = pyqtSignal(object)
+    loaded = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.engine = None
+        self.enabled = True
+        self.counts = {}
+        self._load_lock = threading.Lock()
+        self._loading = False
+        self._reload = False
+
+    def load(self):
+        with self._load_lock:
+            if self._loading:
+                self._reload = True
+                return
+            self._loading = True
+        threading.Thread(target=self._load, daemon=True).start()
+
+    def _load(self):
+        while True:
+            try:
+                engine = FilterEngine.load()
+            except Exception as e:
+                print("Fehler beim Laden der Filterlisten:", e)
+                try:
+                    self.failed.emit(str(e))
+                except RuntimeError:
+                    pass
+            else:
+                self.engine = engine
+                try:
+                    self.loaded.emit(engine.rule_count)
+                except RuntimeError:
+                    pass
+            with self._load_lock:
+                if not self._reload:
+                    self._loading = False
+                    return
+                self._reload = False
+
+    def count(self, view):
+        return self.counts.get(view, 0)
+
+    def forget(self, view):
+        self.counts.pop(view, None)
+
+    def observe_request(self, view, info):
+        """True, wenn die Anfrage blockiert wurde."""
+        resource_type = info.resourceType()
+        if resource_type == QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMainFrame:
+            if self.counts.pop(view, 0):
+                self.count_changed.emit(view)
+            return False
+        engine = self.engine
+        if engine is None or not self.enabled:
+            return False
+        url = info.requestUrl()
+        if url.scheme() not in ("http", "https", "ws", "wss"):
+            return False
+        type_bit = FILTER_RESOURCE_TYPES.get(resource_type, FILTER_TYPE_BITS["other"])
+        if not engine.should_block(url.toString().lower(), url.host().lower(),
+                                   info.firstPartyUrl().host().lower(), type_bit):
+            return False
+        info.block(True)
+        self.counts[view] = self.counts.get(view, 0) + 1
+        self.count_changed.emit(view)
+        return True
+
+# --------------------------------------------------
+#  Web-Profil: dauerhafte Cookies, HTTP-Cache, Vorladen
+# --------------------------------------------------
+def directory_size(path):
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    return total
+
+class WebProfileManager(QObject):
+    """
+    Benanntes QWebEngineProfile für alle Tabs (statt des flüchtigen
+    Standardprofils): Cookies und HTTP-Cache liegen dauerhaft unter
+    WEB_PROFILE_DIR, Cache-Größe und -Ort sind einstellbar.
+
+    Auf Wunsch lädt es im Leerlauf (kein Tab lädt) die meistbesuchten
+    Favoriten nacheinander in einer unsichtbaren Seite, damit deren
+    Ressourcen beim ersten Aufruf schon im Cache liegen.
+    """
+    cache_size_measured = pyqtSignal('qint64')
+    warmup_progress = pyqtSignal(int, int)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        storage = os.path.abspath(WEB_PROFILE_DIR)
+        # Elternobjekt ist die Anwendung: das Profil muss alle Seiten überleben
+        self.profile = QWebEngineProfile(WEB_PROFILE_NAME, QApplication.instance())
+        self.profile.setPersistentStoragePath(storage)
+        self.profile.setCachePath(self.cache_path())
+        self.profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.DiskHttpCache)
+        self.profile.setHttpCacheMaximumSize(self.cache_size_mb() * 1024 * 1024)
+        self.profile.setPersistentCookiesPolicy(
+            QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
+
+        self.warmup_page = None
+        self.warmup_queue = deque()
+        self.warmup_total = 0
+        self.is_busy = lambda: False
+        self.warmup_timer = QTimer(self)
+        self.warmup_timer.setSingleShot(True)
+        self.warmup_timer.timeout.connect(self._warm_next)
+        self.warmup_deadline = QTimer(self)
+        self.warmup_deadline.setSingleShot(True)
+        self.warmup_deadline.setInterval(CACHE_WARMUP_TIMEOUT_MS)
+        self.warmup_deadline.timeout.connect(self._warm_timeout)
+
+    # ---------- Einstellungen ----------
+    def cache_size_mb(self):
+        return self.store.get_setting("web_cache_size_mb", WEB_CACHE_SIZE_MB)
+
+    def set_cache_size_mb(self, size_mb):
+        self.store.set_setting("web_cache_size_mb", size_mb)
+        self.profile.setHttpCacheMaximumSize(size_mb * 1024 * 1024)
+
+    def cache_path(self):
+        return self.store.get_setting("web_cache_path", "") or os.path.join(
+            os.path.abspath(WEB_PROFILE_DIR), "cache")
+
+    def set_cache_path(self, path):
+        # Gilt ab dem nächsten Start; der laufende Cache bleibt in Benutzung
+        self.store.set_setting("web_cache_path", path)
+
+    def warmup_enabled(self):
+        return self.store.get_setting("cache_warmup", False)
+
+    def set_warmup_enabled(self, enabled):
+        self.store.set_setting("cache_warmup", enabled)
+        if not enabled:
+            self.stop_warmup()
+
+    # ---------- Cache ----------
+    def measure_cache_size(self):
+        path = self.profile.cachePath()
+        threading.Thread(target=self._measure, args=(path,), daemon=True).start()
+
+    def _measure(self, path):
+        size = directory_size(path)
+        try:
+            self.cache_size_measured.emit(size)
+        except RuntimeError:
+            pass
+
+    def clear_cache(self):
+        self.profile.clearHttpCache()
+
+    # ---------- Vorladen ----------
+    def start_warmup(self, urls, is_busy):
+        self.stop_warmup()
+        self.warmup_queue = deque(urls)
+        self.warmup_total = len(self.warmup_queue)
+        self.is_busy = is_busy
+        if self.warmup_queue:
+            self.warmup_timer.start(CACHE_WARMUP_GAP_MS)
+
+    def stop_warmup(self):
+        self.warmup_timer.stop()
+        self.warmup_deadline.stop()
+        self.warmup_queue.clear()
+        if self.warmup_page is not None:
+            self.warmup_page.deleteLater()
+            self.warmup_page = None
+
+    def warmup_done(self):
+        return self.warmup_total - len(self.warmup_queue)
+
+    def _warm_next(self):
+        if not self.warmup_queue:
+            self.stop_warmup()
+            return
+        if self.is_busy():
+            # Tabs haben Vorrang: später erneut versuchen
+            self.warmup_timer.start(CACHE_WARMUP_GAP_MS)
+            return
+        if self.warmup_page is None:
+            self.warmup_page = QWebEnginePage(self.profile, self)
+            self.warmup_page.setAudioMuted(True)
+            self.warmup_page.loadFinished.connect(self._warm_finished)
+        self.warmup_page.load(QUrl(self.warmup_queue.popleft()))
+        self.warmup_deadline.start()
+
+    def _warm_timeout(self):
+        if self.warmup_page is not None:
+            self.warmup_page.triggerAction(QWebEnginePage.WebAction.Stop)
+
+    def _warm_finished(self, _ok):
+        self.warmup_deadline.stop()
+        self.warmup_progress.emit(self.warmup_done(), self.warmup_total)
+        if self.warmup_queue:
+            self.warmup_timer.start(CACHE_WARMUP_GAP_MS)
+        else:
+            self.stop_warmup()
+
+class CacheInspectorDialog(QDialog):
+    """
+    Ort, Belegung und Trefferquote des HTTP-Caches. Die Trefferquote stammt
+    aus den Ladezeiten (Resource Timing) der Seitenaufrufe aller Tabs.
+    """
+    def __init__(self, browser):
+        super().__init__(browser)
+        self.setWindowTitle("HTTP-Cache")
+        self.resize(500, 250)
+        self.browser = browser
+        self.web_profile = browser.web_profile
+        self.measured_size = None
+
+        layout = QVBoxLayout()
+        self.info_label = QLabel()
+        self.info_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(self.info_label)
+
+        btn_layout = QHBoxLayout()
+        refresh_btn = QPushButton("Aktualisieren")
+        clear_btn = QPushButton("Cache leeren")
+        path_btn = QPushButton("Speicherort ändern…")
+        close_btn = QPushButton("Schließen")
+        for btn in (refresh_btn, clear_btn, path_btn, close_btn):
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+
+        refresh_btn.clicked.connect(self.refresh)
+        clear_btn.clicked.connect(self.clear_cache)
+        path_btn.clicked.connect(self.change_path)
+        close_btn.clicked.connect(self.accept)
+        self.web_profile.cache_size_measured.connect(self._on_size)
+        self.web_profile.warmup_progress.connect(lambda *_: self._update_text())
+        self.refresh()
+
+    def refresh(self):
+        self.web_profile.measure_cache_size()
+        self._update_text()
+
+    def _on_size(self, size):
+        self.measured_size = size
+        self._update_text()
+
+    def _update_text(self):
+        hits = revalidated = misses = cached_bytes = 0
+        for window in self.browser.timing.loads.values():
+            for record in window:
+                h, r, m, b = record.cache_counts()
+                hits += h
+                revalidated += r
+                misses += m
+                cached_bytes += b
+        total = hits + revalidated + misses
+        used = format_bytes(self.measured_size) if self.measured_size is not None else "wird ermittelt…"
+        lines = [
+            f"Speicherort: {self.web_profile.profile.cachePath()}",
+            f"Belegt: {used} von {self.web_profile.cache_size_mb()} MB",
+        ]
+        if total:
+            lines.append(f"Ressourcen der letzten Seitenaufrufe: {total}")
+            lines.append(f"  aus dem Cache: {hits} ({hits * 100 // total} %), "
+                         f"revalidiert: {revalidated}, aus dem Netz: {misses}")
+            lines.append(f"  nicht erneut übertragen: {format_bytes(cached_bytes)}")
+        else:
+            lines.append("Noch keine Seitenaufrufe gemessen.")
+        if self.web_profile.warmup_total:
+            lines.append(f"Vorladen: {self.web_profile.warmup_done()} von "
+                         f"{self.web_profile.warmup_total} Favoriten")
+        self.info_label.setText("\n".join(lines))
+
+    def clear_cache(self):
+        self.web_profile.clear_cache()
+        self.measured_size = None
+        QTimer.singleShot(1000, self.refresh)
+
+    def change_path(self):
+        path = QFileDialog.getExistingDirectory(self, "Speicherort des Caches", self.web_profile.cache_path())
+        if path:
+            self.web_profile.set_cache_path(path)
+            QMessageBox.information(self, "Info", "Der neue Speicherort gilt ab dem nächsten Start.")
+
+# --------------------------------------------------
+#  VLC: gemeinsame Instanz und Player-Vorrat
+# --------------------------------------------------
+class VLCPool:
+    """
+    Prozessweite libVLC-Instanz mit einem kleinen Vorrat wiederverwendbarer
+    Media-Player.
+
+    Der teure Plugin-Scan von vlc.Instance() fällt nur einmal an, bevorzugt
+    per warm_up() im Hintergrund kurz nach dem Programmstart. prepare()
+    legt das Medium eines Videos schon an und parst es vor (Verbindung,
+    Container), solange der Nutzer noch auswählt. Alle Medien erhalten
+    :network-caching=<network_caching>.
+    """
+    def __init__(self, size=VLC_PLAYER_POOL_SIZE):
+        self.size = size
+        self.network_caching = VLC_NETWORK_CACHING_MS
+        self.ttff_samples = []
+        self._instance = None
+        self._players = []
+        self._prepared = OrderedDict()
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def _warm_up(self):
+        try:
+            instance = self.instance()
+            with self._lock:
+                while len(self._players) < self.size:
+                    self._players.append(instance.media_player_new())
+        except VLC_LOAD_ERRORS as e:
+            print("VLC konnte nicht vorgeladen werden:", e)
+
+    def instance(self):
+        """
+        Liefert die gemeinsame Instanz; blockiert, falls sie gerade im
+        Hintergrund entsteht.
+        """
+        with self._lock:
+            if self._instance is None:
+                instance = vlc.Instance(*VLC_INSTANCE_ARGS)
+                if instance is None:
+                    raise OSError("libVLC konnte nicht initialisiert werden.")
+                self._instance = instance
+            return self._instance
+
+    @property
+    def ready(self):
+        return self._instance is not None
+
+    # ---------- Player ----------
+    def acquire_player(self):
+        instance = self.instance()
+        with self._lock:
+            if self._players:
+                return self._players.pop()
+        return instance.media_player_new()
+
+    def release_player(self, player):
+        player.stop()
+        player.set_media(None)
+        # Ausgabefenster lösen, bevor das Widget verschwindet
+        if sys.platform.startswith('win'):
+            player.set_hwnd(0)
+        elif sys.platform.startswith('linux'):
+            player.set_xwindow(0)
+        elif sys.platform.startswith('darwin'):
+            player.set_nsobject(0)
+        with self._lock:
+            if len(self._players) < self.size:
+                self._players.append(player)
+                return
+        player.release()
+
+    # ---------- Medien ----------
+    def _new_media(self, url, options):
+        media = self.instance().media_new(url)
+        options = list(options or [])
+        if not any(option.startswith(":network-caching=") for option in options):
+            options.append(f":network-caching={self.network_caching}")
+        for option in options:
+            media.add_option(option)
+        return media
+
+    def prepare(self, url, options=None):
+        """
+        Legt das Medium im Voraus an und startet das Vorparsen. Blockiert
+        nie: ist die Instanz noch nicht bereit, passiert nichts.
+        """
+        key = (url, tuple(options or ()))
+        if not self.ready or key in self._prepared:
+            return
+        media = self._new_media(url, options)
+        media.parse_with_options(vlc.MediaParseFlag.network, 0)
+        self._prepared[key] = media
+        while len(self._prepared) > VLC_PREPARED_MEDIA:
+            _, old = self._prepared.popitem(last=False)
+            old.release()
+
+    def media(self, url, options=None):
+        media = self._prepared.pop((url, tuple(options or ())), None)
+        return media if media is not None else self._new_media(url, options)
+
+    # ---------- Messung ----------
+    def record_ttff(self, seconds):
+        self.ttff_samples.append(seconds)
+        del self.ttff_samples[:-VLC_TTFF_SAMPLES]
+        return sum(self.ttff_samples) / len(self.ttff_samples)
+
+_vlc_pool = None
+
+def get_vlc_pool():
+    global _vlc_pool
+    if _vlc_pool is None:
+        _vlc_pool = VLCPool()
+    return _vlc_pool
 
 class VLCPlayerDialog(QDialog):
     """
     Dialog zum Abspielen eines Videos mit VLC und Steuerelementen:
     - Play/Pause, Stop
     - Lauter/Leiser
-    - Download
+    - Download (über den DownloadManager, läuft nach dem Schließen weiter)
     - Positions-Slider (zum Spulen)
+
+    Instanz und Player stammen aus dem VLCPool; first_frame meldet die
+    Zeit vom Öffnen bis zum ersten Bild in Sekunden.
+
+    Position, Länge, Puffer- und Fehlerzustand kommen über den Event-Manager
+    von libVLC. Die Rückrufe merken sich nur den neuesten Stand; angewendet
+    wird er im GUI-Thread höchstens einmal pro Bildwiederholung. Ohne
+    Ereignisse (Pause, Ende) fällt keine Arbeit an.
     """
-    def __init__(self, video_url, parent=None):
+    first_frame = pyqtSignal(float)
+    # Intern: neuer Zustand aus dem libVLC-Thread liegt vor
+    _vlc_changed = pyqtSignal()
+
+    def __init__(self, video_url, parent=None, media_options=None, download_manager=None):
         super().__init__(parent)
+        self.opened_at = time.perf_counter()
         self.setWindowTitle("Video abspielen mit VLC")
         self.resize(800, 600)
         self.video_url = video_url
+        self.download_manager = download_manager
 
         # Variable, um zu wissen, ob gerade per Slider gesprungen wird
         self.is_seeking = False
@@ -77,6 +4789,10 @@ class VLCPlayerDialog(QDialog):
         self.position_slider.sliderPressed.connect(self.slider_pressed)
         self.position_slider.sliderReleased.connect(self.slider_released)
 
+        # Zustand: Puffern, Pause, Ende, Fehler
+        self.status_label = QLabel("Wird geöffnet…")
+        layout.addWidget(self.status_label)
+
         # -----------------------------------
         # 3) Steuer-Buttons (Play/Pause, Stop)
         playback_layout = QHBoxLayout()
@@ -107,30 +4823,93 @@ class VLCPlayerDialog(QDialog):
         # Download-Button
         self.download_button = QPushButton("Download")
         self.download_button.clicked.connect(self.download_video)
+        self.download_button.setEnabled(download_manager is not None)
         volume_layout.addWidget(self.download_button)
 
         layout.addLayout(volume_layout)
 
         # -----------------------------------
-        # VLC-Setup
-        self.instance = vlc.Instance()
-        self.media_player = self.instance.media_player_new()
-        media = self.instance.media_new(self.video_url)
-        self.media_player.set_media(media)
+        # VLC-Setup (gemeinsame Instanz, Player aus dem Vorrat)
+        self.pool = get_vlc_pool()
+        self.media_player = self.pool.acquire_player()
+        self.media_player.set_media(self.pool.media(self.video_url, media_options))
         self.media_player.audio_set_volume(self.volume)
 
-        # Timer, um den Player zu aktualisieren (Position etc.)
-        self.timer = QTimer(self)
-        self.timer.setInterval(200)  # alle 200 ms
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start()
-
-        # Beim Öffnen direkt abspielen
-        self.media_player.play()
-
-        # Widget für Video
+        # Ereignisse aus libVLC: Stand sammeln, höchstens einmal pro Bild anzeigen
+        self._first_frame_seen = False
+        self._vlc_state = {}
+        self._vlc_update_pending = False
+        self._length = 0
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        refresh_rate = self.screen().refreshRate() if self.screen() else 60.0
+        self.refresh_timer.setInterval(max(int(1000 / (refresh_rate or 60.0)), 1))
+        self.refresh_timer.timeout.connect(self._apply_vlc_state)
+        self._vlc_changed.connect(self._on_vlc_changed)
+        events = vlc.EventType
+        self._vlc_handlers = {
+            events.MediaPlayerTimeChanged: lambda e: self._vlc_update(time=e.u.new_time),
+            events.MediaPlayerLengthChanged: lambda e: self._vlc_update(length=e.u.new_length),
+            events.MediaPlayerBuffering: lambda e: self._vlc_update(buffering=e.u.new_cache),
+            events.MediaPlayerPlaying: lambda e: self._vlc_update(state="playing"),
+            events.MediaPlayerPaused: lambda e: self._vlc_update(state="paused"),
+            events.MediaPlayerStopped: lambda e: self._vlc_update(state="stopped"),
+            events.MediaPlayerEndReached: lambda e: self._vlc_update(state="ended"),
+            events.MediaPlayerEncounteredError: lambda e: self._vlc_update(state="error"),
+            events.MediaPlayerVout: lambda e: self._vlc_update(vout=True),
+        }
+        event_manager = self.media_player.event_manager()
+        for event_type, handler in self._vlc_handlers.items():
+            event_manager.event_attach(event_type, handler)
+
+        # Erst das Ausgabefenster setzen, dann abspielen (sonst öffnet VLC ein eigenes)
         self.show()
         self.set_video_widget()
+        self.media_player.play()
+
+    # ---------- libVLC-Ereignisse ----------
+    def _vlc_update(self, **changes):
+        # Läuft im libVLC-Thread: nur merken, höchstens ein Signal bis zur Anzeige
+        self._vlc_state.update(changes)
+        if self._vlc_update_pending:
+            return
+        self._vlc_update_pending = True
+        try:
+            self._vlc_changed.emit()
+        except RuntimeError:
+            pass  # Dialog wurde inzwischen geschlossen
+
+    def _on_vlc_changed(self):
+        if not self.refresh_timer.isActive():
+            self.refresh_timer.start()
+
+    def _apply_vlc_state(self):
+        # Zuerst zurücksetzen: Ereignisse ab jetzt lösen eine neue Anzeige aus
+        self._vlc_update_pending = False
+        state = self._vlc_state
+        self._vlc_state = {}
+        if state.get("vout") and not self._first_frame_seen:
+            self._first_frame_seen = True
+            self.first_frame.emit(time.perf_counter() - self.opened_at)
+        if "state" in state:
+            self.status_label.setText({
+                "playing": "",
+                "paused": "Pausiert",
+                "stopped": "Gestoppt",
+                "ended": "Wiedergabe beendet",
+                "error": "Fehler: Das Video kann nicht abgespielt werden.",
+            }[state["state"]])
+        elif "buffering" in state:
+            cache = state["buffering"]
+            self.status_label.setText("" if cache >= 100 else f"Puffern… {cache:.0f} %")
+        if self.isMinimized():
+            return  # Position erst wieder anzeigen, wenn sie sichtbar ist
+        length = state.get("length", self._length)
+        if length > 0 and length != self._length:
+            self._length = length
+            self.position_slider.setRange(0, length)
+        if "time" in state and not self.is_seeking:
+            self.position_slider.setValue(state["time"])
 
     def set_video_widget(self):
         if sys.platform.startswith('win'):
@@ -144,6 +4923,9 @@ class VLCPlayerDialog(QDialog):
         if self.media_player.is_playing():
             self.media_player.pause()
         else:
+            if self.media_player.get_state() == vlc.State.Ended:
+                # Nach dem Ende muss libVLC erst gestoppt werden
+                self.media_player.stop()
             self.media_player.play()
 
     def stop_playback(self):
@@ -166,52 +4948,603 @@ class VLCPlayerDialog(QDialog):
         self.media_player.set_time(new_position)
 
     def download_video(self):
-        save_path, _ = QFileDialog.getSaveFileName(self, "Video speichern unter",
-                                                   os.path.basename(self.video_url))
+        kind = manifest_kind(self.video_url)
+        if kind == "dash":
+            QMessageBox.information(self, "Download", "DASH-Streams können nicht heruntergeladen werden.")
+            return
+        default_name = os.path.basename(self.video_url.split("?", 1)[0])
+        if kind == "hls":
+            default_name = os.path.splitext(default_name)[0] + ".ts"
+        save_path, _ = QFileDialog.getSaveFileName(self, "Video speichern unter", default_name)
         if not save_path:
             return  # Abbruch
 
+        self.download_manager.enqueue(self.video_url, save_path, "hls" if kind == "hls" else "http")
+        self.download_button.setText("Download eingereiht (siehe Downloads)")
+        self.download_button.setEnabled(False)
+
+    def done(self, result):
+        # Auch bei Esc (reject) Wiedergabe beenden und den Player zurückgeben
+        if self.media_player is not None:
+            self.refresh_timer.stop()
+            event_manager = self.media_player.event_manager()
+            for event_type in self._vlc_handlers:
+                event_manager.event_detach(event_type)
+            self.pool.release_player(self.media_player)
+            self.media_player = None
+        super().done(result)
+
+# --------------------------------------------------
+#  Tab-Lebenszyklus (Einfrieren / Verwerfen von Hintergrund-Tabs)
+# --------------------------------------------------
+def read_process_rss(pid):
+    """
+    Resident Set Size eines Prozesses in Byte (Linux, /proc); 0 wenn unbekannt.
+    """
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii", errors="replace") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+class TabLifecycleInfo:
+    __slots__ = ("last_active", "pinned", "scroll")
+
+    def __init__(self, now):
+        self.last_active = now
+        self.pinned = False
+        self.scroll = None
+
+class TabLifecycleManager(QObject):
+    """
+    Überführt Hintergrund-Tabs schrittweise von aktiv über eingefroren
+    (keine Skripte/Timer mehr) nach verworfen (Renderer-Speicher freigegeben).
+
+    Maßgeblich sind die Leerlaufzeit seit dem letzten Aktivieren
+    (TAB_FREEZE_AFTER_SECONDS, TAB_DISCARD_AFTER_SECONDS) und ein
+    Speicherbudget für alle Renderer zusammen (gemessen von TaskMonitor,
+    siehe enforce_budget): wird es überschritten, werden die am längsten
+    unbenutzten Tabs zuerst verworfen. Tabs im Vordergrund,
+    mit Tonwiedergabe oder mit "Nie verwerfen" bleiben unberührt. Ein
+    verworfener Tab wird beim Aktivieren neu geladen (URL und Titel bleiben
+    erhalten) und springt danach an die gemerkte Scrollposition.
+    """
+    def __init__(self, tabs, store, parent=None):
+        super().__init__(parent)
+        self.tabs = tabs
+        self.store = store
+        self.infos = {}
+        self.current = None
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(TAB_LIFECYCLE_INTERVAL_MS)
+        self.timer.timeout.connect(self.check)
+        self.timer.start()
+
+    def info(self, view):
+        info = self.infos.get(view)
+        if info is None:
+            info = self.infos[view] = TabLifecycleInfo(time.monotonic())
+        return info
+
+    def forget(self, view):
+        self.infos.pop(view, None)
+        if self.current is view:
+            self.current = None
+
+    # ---------- Einstellungen ----------
+    def memory_budget_mb(self):
+        return self.store.get_setting("tab_memory_budget_mb", TAB_MEMORY_BUDGET_MB)
+
+    def set_pinned(self, view, pinned):
+        self.info(view).pinned = pinned
+        if pinned:
+            self._activate(view)
+
+    # ---------- Tabwechsel ----------
+    def on_current_changed(self, index):
+        now = time.monotonic()
+        if self.current is not None and self.current in self.infos:
+            self.infos[self.current].last_active = now
+        view = self.tabs.widget(index)
+        self.current = view
+        if not isinstance(view, QWebEngineView):
+            return
+        self.info(view).last_active = now
+        self._activate(view)
+
+    def _activate(self, view):
+        page = view.page()
+        state = page.lifecycleState()
+        if state == QWebEnginePage.LifecycleState.Active:
+            return
+        if state == QWebEnginePage.LifecycleState.Discarded:
+            scroll = self.info(view).scroll
+            if scroll is not None:
+                page.loadFinished.connect(self._make_scroll_restorer(view, scroll))
+        page.setLifecycleState(QWebEnginePage.LifecycleState.Active)
+        self._update_tooltip(view)
+
+    def _make_scroll_restorer(self, view, scroll):
+        def restore(ok):
+            view.page().loadFinished.disconnect(restore)
+            self.info(view).scroll = None
+            if ok:
+                view.page().runJavaScript(f"window.scrollTo({scroll[0]}, {scroll[1]});")
+        return restore
+
+    # ---------- Übergänge ----------
+    def views(self):
+        """
+        Alle Tabs mit Webansicht als (Index, View); Sitzungs-Platzhalter
+        haben noch keine Seite und werden übergangen.
+        """
+        for i in range(self.tabs.count()):
+            view = self.tabs.widget(i)
+            if isinstance(view, QWebEngineView):
+                yield i, view
+
+    def candidates(self):
+        """
+        Hintergrund-Tabs, die eingefroren oder verworfen werden dürfen,
+        am längsten unbenutzte zuerst.
+        """
+        result = []
+        for i, view in self.views():
+            if view is self.tabs.currentWidget():
+                continue
+            info = self.info(view)
+            if info.pinned or view.page().recentlyAudible():
+                continue
+            result.append((info.last_active, i, view))
+        result.sort(key=lambda entry: entry[:2])
+        return [view for _, _, view in result]
+
+    def check(self):
+        now = time.monotonic()
+        for view in self.candidates():
+            idle = now - self.infos[view].last_active
+            state = view.page().lifecycleState()
+            if idle >= TAB_DISCARD_AFTER_SECONDS:
+                self.discard(view)
+            elif idle >= TAB_FREEZE_AFTER_SECONDS and state == QWebEnginePage.LifecycleState.Active:
+                view.page().setLifecycleState(QWebEnginePage.LifecycleState.Frozen)
+                self._update_tooltip(view)
+
+    def discard(self, view):
+        page = view.page()
+        if page.lifecycleState() == QWebEnginePage.LifecycleState.Discarded:
+            return
+        position = page.scrollPosition()
+        self.info(view).scroll = (int(position.x()), int(position.y()))
+        page.setLifecycleState(QWebEnginePage.LifecycleState.Discarded)
+        self._update_tooltip(view)
+
+    def enforce_budget(self, samples):
+        """
+        samples: ProcessUsage-Liste der letzten Messung von TaskMonitor.
+        """
+        budget = self.memory_budget_mb() * 1024 * 1024
+        rss_by_pid = {usage.pid: usage.rss for usage in samples if usage.kind == "renderer"}
+        total = sum(rss_by_pid.values())
+        if budget <= 0 or total <= budget:
+            return
+        # Renderer werden unter Umständen von mehreren Tabs geteilt; erst wenn
+        # der letzte Tab eines Prozesses verworfen ist, wird dessen Speicher frei
+        users = Counter()
+        pid_of = {}
+        for _, view in self.views():
+            if view.page().lifecycleState() == QWebEnginePage.LifecycleState.Discarded:
+                continue
+            pid = view.page().renderProcessPid()
+            pid_of[view] = pid
+            users[pid] += 1
+        for view in self.candidates():
+            if total <= budget:
+                break
+            if view not in pid_of:
+                continue
+            self.discard(view)
+            pid = pid_of[view]
+            users[pid] -= 1
+            if users[pid] == 0:
+                total -= rss_by_pid.get(pid, 0)
+
+    def _update_tooltip(self, view):
+        index = self.tabs.indexOf(view)
+        if index < 0:
+            return
+        state = view.page().lifecycleState()
+        if state == QWebEnginePage.LifecycleState.Frozen:
+            self.tabs.setTabToolTip(index, "Eingefroren")
+        elif state == QWebEnginePage.LifecycleState.Discarded:
+            self.tabs.setTabToolTip(index, "Verworfen (wird beim Aktivieren neu geladen)")
+        else:
+            self.tabs.setTabToolTip(index, "")
+
+# --------------------------------------------------
+#  Task-Manager: Speicher und CPU pro Prozess
+# --------------------------------------------------
+PROCESS_KIND_NAMES = {
+    "browser": "Browser (inkl. VLC-Wiedergabe)",
+    "renderer": "Renderer",
+    "gpu-process": "GPU-Prozess",
+    "utility": "Hilfsprozess",
+    "zygote": "Zygote",
+}
+
+def read_process_cpu_ticks(pid):
+    """
+    Verbrauchte CPU-Zeit (User + System) eines Prozesses in Clock-Ticks
+    (Linux, /proc); None wenn unbekannt.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="ascii", errors="replace") as f:
+            # Der Programmname steht in Klammern und darf Leerzeichen enthalten
+            fields = f.read().rsplit(")", 1)[1].split()
+        return int(fields[11]) + int(fields[12])
+    except (OSError, ValueError, IndexError):
+        return None
+
+def process_kind(pid):
+    """Prozessart laut --type= der Kommandozeile (WebEngine), sonst "other"."""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            args = f.read().split(b"\0")
+    except OSError:
+        return "other"
+    for arg in args:
+        if arg.startswith(b"--type="):
+            return arg[len(b"--type="):].decode("ascii", "replace")
+    return "other"
+
+def descendant_processes(root_pid):
+    """Alle Nachfahren eines Prozesses laut /proc (leer, wenn es kein /proc gibt)."""
+    children = {}
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return []
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r", encoding="ascii", errors="replace") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    result = []
+    stack = [root_pid]
+    while stack:
+        for child in children.get(stack.pop(), ()):
+            result.append(child)
+            stack.append(child)
+    return result
+
+class ProcessUsage:
+    __slots__ = ("pid", "kind", "rss", "cpu")
+
+    def __init__(self, pid, kind, rss, cpu):
+        self.pid = pid
+        self.kind = kind
+        self.rss = rss
+        self.cpu = cpu
+
+class TaskMonitor(QObject):
+    """
+    Tastet den Browser-Prozess (mit VLC, das im selben Prozess abspielt),
+    die Renderer der Tabs und die übrigen WebEngine-Prozesse ab: Speicher
+    (RSS) und CPU-Anteil aus /proc, gelesen in einem Hintergrund-Thread.
+
+    Läuft durchgehend, damit die Höchstwerte der Sitzung vollständig sind
+    und das Speicherbudget der Tabs (TabLifecycleManager) geprüft werden
+    kann; write_peak_log() hängt sie beim Beenden an TASK_PEAK_LOG an.
+    Ohne /proc (nicht Linux) wird nicht abgetastet.
+    """
+    updated = pyqtSignal()
+    _sampled = pyqtSignal(object)
+
+    def __init__(self, browser, parent=None):
+        super().__init__(parent)
+        self.browser = browser
+        self.available = os.path.isdir("/proc/self")
+        self.busy = False
+        self.samples = []
+        self.views_by_pid = {}
+        self.started = time.time()
+        self.peaks = {"total_rss": 0, "browser_rss": 0, "renderer_rss": 0, "renderers": 0,
+                      "tabs": 0, "total_cpu": 0.0, "browser_cpu": 0.0}
+        self.peak_rss_by_pid = {}
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        # Nur im Hintergrund-Thread benutzt (höchstens einer gleichzeitig)
+        self._ticks = {}
+        self._kinds = {}
+
+        self._sampled.connect(self._apply)
+        self.timer = QTimer(self)
+        self.timer.setInterval(TASK_SAMPLE_INTERVAL_MS)
+        self.timer.timeout.connect(self.sample)
+        if self.available:
+            self.timer.start()
+
+    def set_fast(self, fast):
+        self.timer.setInterval(TASK_MANAGER_INTERVAL_MS if fast else TASK_SAMPLE_INTERVAL_MS)
+        if fast:
+            self.sample()
+
+    def sample(self):
+        if self.busy or not self.available:
+            return
+        views_by_pid = {}
+        for _, view in self.browser.lifecycle.views():
+            pid = view.page().renderProcessPid()
+            if pid > 0:
+                views_by_pid.setdefault(pid, []).append(view)
+        self.views_by_pid = views_by_pid
+        self.busy = True
+        threading.Thread(target=self._run, args=(list(views_by_pid),), daemon=True).start()
+
+    def _run(self, renderer_pids):
         try:
-            r = requests.get(self.video_url, stream=True)
-            r.raise_for_status()
+            result = self._measure(renderer_pids)
+        except Exception as e:
+            print("Fehler beim Abtasten der Prozesse:", e)
+            result = None
+        finally:
+            # Ohne Rücksetzen bliebe die Abtastung für den Rest der Sitzung aus
+            self.busy = False
+        if result is None:
+            return
+        try:
+            self._sampled.emit(result)
+        except RuntimeError:
+            pass
+
+    def _measure(self, renderer_pids):
+        main_pid = os.getpid()
+        pids = [main_pid] + descendant_processes(main_pid)
+        pids += [pid for pid in renderer_pids if pid not in pids]
+        kinds = {main_pid: "browser"}
+        for pid in pids[1:]:
+            kinds[pid] = self._kinds.get(pid) or process_kind(pid)
+        for pid in renderer_pids:
+            kinds[pid] = "renderer"
+        self._kinds = kinds
+
+        now = time.monotonic()
+        ticks = {}
+        result = []
+        for pid in pids:
+            cpu = 0.0
+            cpu_ticks = read_process_cpu_ticks(pid)
+            if cpu_ticks is not None:
+                ticks[pid] = (cpu_ticks, now)
+                previous = self._ticks.get(pid)
+                if previous is not None and now > previous[1]:
+                    cpu = (cpu_ticks - previous[0]) / self.clock_ticks / (now - previous[1]) * 100
+            result.append(ProcessUsage(pid, kinds[pid], read_process_rss(pid), cpu))
+        self._ticks = ticks
+        return result
+
+    def _apply(self, samples):
+        self.samples = samples
+        peaks = self.peaks
+        renderers = [u for u in samples if u.kind == "renderer"]
+        browser = [u for u in samples if u.kind == "browser"]
+        peaks["total_rss"] = max(peaks["total_rss"], sum(u.rss for u in samples))
+        peaks["total_cpu"] = max(peaks["total_cpu"], sum(u.cpu for u in samples))
+        peaks["browser_rss"] = max([peaks["browser_rss"]] + [u.rss for u in browser])
+        peaks["browser_cpu"] = max([peaks["browser_cpu"]] + [u.cpu for u in browser])
+        peaks["renderer_rss"] = max([peaks["renderer_rss"]] + [u.rss for u in renderers])
+        peaks["renderers"] = max(peaks["renderers"], len(renderers))
+        peaks["tabs"] = max(peaks["tabs"], self.browser.tabs.count())
+        for usage in samples:
+            if usage.rss > self.peak_rss_by_pid.get(usage.pid, 0):
+                self.peak_rss_by_pid[usage.pid] = usage.rss
+        self.updated.emit()
+
+    def write_peak_log(self, path=TASK_PEAK_LOG):
+        if not self.samples:
+            return
+        mb = 1024 * 1024
+        entry = {
+            "start": datetime.datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "ende": datetime.datetime.now().isoformat(timespec="seconds"),
+            "gesamt_mb": round(self.peaks["total_rss"] / mb, 1),
+            "browser_mb": round(self.peaks["browser_rss"] / mb, 1),
+            "groesster_renderer_mb": round(self.peaks["renderer_rss"] / mb, 1),
+            "renderer": self.peaks["renderers"],
+            "tabs": self.peaks["tabs"],
+            "cpu_gesamt_prozent": round(self.peaks["total_cpu"], 1),
+            "cpu_browser_prozent": round(self.peaks["browser_cpu"], 1),
+            "cpu_kerne": os.cpu_count(),
+        }
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print("Fehler beim Schreiben des Ressourcen-Protokolls:", e)
 
-            total_size = int(r.headers.get('content-length', 0))
-            chunk_size = 8192
-            downloaded = 0
+class TaskManagerDialog(QDialog):
+    """
+    Prozesse des Browsers mit Speicher, Höchstwert und CPU-Anteil; Renderer
+    mit den Tabs, die sie darstellen. Nicht modal, aktualisiert sich selbst.
+    """
+    COLUMNS = ("Prozess", "PID", "Speicher", "Höchstwert", "CPU")
 
-            with open(save_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=chunk_size):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            percent = int(downloaded / total_size * 100)
-                            self.setWindowTitle(f"Download: {percent}%")
-                        QApplication.processEvents()
+    def __init__(self, browser):
+        super().__init__(browser)
+        self.setWindowTitle("Task-Manager")
+        self.resize(750, 400)
+        self.browser = browser
+        self.monitor = browser.task_monitor
+        self.row_pids = []
 
-            QMessageBox.information(self, "Download", "Download abgeschlossen.")
-        except requests.RequestException as e:
-            QMessageBox.warning(self, "Download-Fehler", f"Fehler beim Herunterladen: {e}")
+        layout = QVBoxLayout()
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
 
-        self.setWindowTitle("Video abspielen mit VLC")
+        btn_layout = QHBoxLayout()
+        reload_btn = QPushButton("Neu laden")
+        kill_btn = QPushButton("Prozess beenden")
+        close_btn = QPushButton("Schließen")
+        for btn in (reload_btn, kill_btn, close_btn):
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
 
-    def update_frame(self):
-        if not self.is_seeking:
-            current_time = self.media_player.get_time()  # in ms
-            total_length = self.media_player.get_length()
-            if total_length > 0:
-                self.position_slider.setRange(0, total_length)
-                self.position_slider.setValue(current_time)
+        reload_btn.clicked.connect(self.reload_selected)
+        kill_btn.clicked.connect(self.kill_selected)
+        close_btn.clicked.connect(self.hide)
+        self.monitor.updated.connect(self.refresh)
+
+    def _tab_titles(self, pid):
+        titles = []
+        for view in self.monitor.views_by_pid.get(pid, ()):
+            index = self.browser.tabs.indexOf(view)
+            if index >= 0:
+                titles.append(self.browser.tabs.tabText(index) or view.url().toString())
+        return titles
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        if not self.monitor.available:
+            self.summary_label.setText("Prozessdaten sind nur unter Linux (/proc) verfügbar.")
+            return
+        selected = self.selected_pid()
+        samples = sorted(self.monitor.samples,
+                         key=lambda u: (u.kind != "browser", u.kind != "renderer", -u.rss))
+        self.table.setRowCount(len(samples))
+        self.row_pids = [u.pid for u in samples]
+        for row, usage in enumerate(samples):
+            name = PROCESS_KIND_NAMES.get(usage.kind, usage.kind)
+            titles = self._tab_titles(usage.pid) if usage.kind == "renderer" else []
+            if titles:
+                name = f"Tab: {', '.join(titles)}"
+            values = (name, str(usage.pid), format_bytes(usage.rss),
+                      format_bytes(self.monitor.peak_rss_by_pid.get(usage.pid, usage.rss)),
+                      f"{usage.cpu:.1f} %")
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+            self.table.item(row, 0).setToolTip(name)
+            if usage.pid == selected:
+                self.table.selectRow(row)
+        peaks = self.monitor.peaks
+        self.summary_label.setText(
+            f"Gesamt: {format_bytes(sum(u.rss for u in samples))}, "
+            f"CPU {sum(u.cpu for u in samples):.1f} % – Höchstwerte der Sitzung: "
+            f"{format_bytes(peaks['total_rss'])}, CPU {peaks['total_cpu']:.1f} % "
+            f"(Protokoll: {TASK_PEAK_LOG})")
+
+    def selected_pid(self):
+        row = self.table.currentRow()
+        return self.row_pids[row] if 0 <= row < len(self.row_pids) else None
+
+    def reload_selected(self):
+        for view in self.monitor.views_by_pid.get(self.selected_pid(), ()):
+            view.reload()
+
+    def kill_selected(self):
+        pid = self.selected_pid()
+        if pid is None:
+            return
+        if pid not in self.monitor.views_by_pid:
+            QMessageBox.information(self, "Info", "Nur die Renderer von Tabs können beendet werden.")
+            return
+        titles = "\n".join(self._tab_titles(pid))
+        reply = QMessageBox.question(
+            self, "Prozess beenden",
+            f"Renderer {pid} beenden? Betroffene Tabs zeigen danach eine Fehlerseite, "
+            f"bis sie neu geladen werden:\n{titles}",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            os.kill(pid, signal.SIGKILL if hasattr(signal, "SIGKILL") else signal.SIGTERM)
+        except OSError as e:
+            QMessageBox.critical(self, "Fehler", f"Prozess konnte nicht beendet werden:\n{e}")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.monitor.set_fast(True)
+        self.refresh()
+
+    def hideEvent(self, event):
+        self.monitor.set_fast(False)
+        super().hideEvent(event)
+
+# --------------------------------------------------
+#  Sitzung (Sicherung der Tabs, verzögertes Laden)
+# --------------------------------------------------
+def serialize_web_history(history):
+    """
+    Vor-/Zurück-Verlauf eines Tabs als Bytes (QDataStream-Format von Qt).
+    """
+    data = QByteArray()
+    stream = QDataStream(data, QIODevice.OpenModeFlag.WriteOnly)
+    stream << history
+    return bytes(data)
 
-    def closeEvent(self, event):
-        self.timer.stop()
-        self.media_player.stop()
-        super().closeEvent(event)
+def restore_web_history(history, blob):
+    """
+    Stellt den Verlauf wieder her; Qt lädt dabei den aktuellen Eintrag.
+    """
+    stream = QDataStream(QByteArray(blob), QIODevice.OpenModeFlag.ReadOnly)
+    stream >> history
+    return stream.status() == QDataStream.Status.Ok
+
+class TabPlaceholder(QWidget):
+    """
+    Platzhalter für einen wiederhergestellten Tab. Er hält nur URL, Titel
+    und Verlauf; die eigentliche Webansicht entsteht erst beim ersten
+    Aktivieren (Browser.materialize_tab).
+    """
+    def __init__(self, url, title, pinned=False, history=None, parent=None):
+        super().__init__(parent)
+        self.session_url = url
+        self.session_title = title
+        self.pinned = pinned
+        self.history_blob = history
+        layout = QVBoxLayout(self)
+        label = QLabel(f"{title}\n{url}")
+        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(label)
 
 class CustomWebEngineView(QWebEngineView):
     def __init__(self, browser):
         super().__init__()
         self.browser = browser
+        # Seite im gemeinsamen benannten Profil (Cookies, Cache, Skripte)
+        self.setPage(QWebEnginePage(browser.web_profile.profile, self))
+        self.loading = False
+        self.loadStarted.connect(lambda: setattr(self, "loading", True))
+        self.loadFinished.connect(lambda _: setattr(self, "loading", False))
+        # Login- und Videoerkennung: Kanal in derselben Welt wie das eingeschleuste Skript
+        self.login_bridge = WebChannelInterface(browser, self)
+        self.media_bridge = MediaChannelInterface(browser.media, self)
+        self.channel = QWebChannel(self)
+        self.channel.registerObject("loginBridge", self.login_bridge)
+        self.channel.registerObject("mediaBridge", self.media_bridge)
+        self.page().setWebChannel(self.channel, QWebEngineScript.ScriptWorldId.ApplicationWorld)
+        self.request_interceptor = PageRequestInterceptor(browser, self)
+        self.page().setUrlRequestInterceptor(self.request_interceptor)
+        self.page().loadStarted.connect(lambda: browser.media.reset(self))
+        self.loadFinished.connect(lambda _: browser.timing.collect(self))
+        # Host, für den zuletzt das Einfügen angeboten wurde (nicht erneut fragen)
+        self.credentials_offered_for = None
 
     def createWindow(self, requested_window_type):
         reply = QMessageBox.question(
@@ -320,29 +5653,199 @@ class CredentialsManagerDialog(QDialog):
             self.list_widget.takeItem(self.list_widget.row(selected_item))
             QMessageBox.information(self, "Erfolg", f"Zugangsdaten für {domain} gelöscht.")
 
+class HistoryPageLoader(QObject):
+    """
+    Lädt Seiten der Chronik in einem eigenen Thread mit eigener
+    SQLite-Verbindung (Keyset-Paging über last_visit/url), damit weder
+    das Blättern noch die Suche den GUI-Thread blockieren.
+    """
+    page_loaded = pyqtSignal(int, list, bool)
+
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self._conn = None
+        # Ein Worker: Anfragen werden der Reihe nach abgearbeitet
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def request(self, generation, filter_text, after, limit=HISTORY_PAGE_SIZE):
+        self._executor.submit(self._load, generation, filter_text, after, limit)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load(self, generation, filter_text, after, limit):
+        try:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, timeout=10)
+            where = []
+            params = []
+            if after is not None:
+                where.append("(last_visit, url) < (?, ?)")
+                params.extend(after)
+            if filter_text:
+                pattern = "%" + filter_text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                where.append("(title LIKE ? ESCAPE '\\' OR url LIKE ? ESCAPE '\\')")
+                params.extend((pattern, pattern))
+            sql = "SELECT url, title, visit_count, last_visit FROM history"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY last_visit DESC, url DESC LIMIT ?"
+            params.append(limit)
+            rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print("Fehler beim Laden der Chronik:", e)
+            rows = []
+        try:
+            self.page_loaded.emit(generation, rows, len(rows) < limit)
+        except RuntimeError:
+            # Dialog wurde inzwischen geschlossen
+            pass
+
+class HistoryListModel(QAbstractListModel):
+    """
+    Listenmodell für die Chronik, das Zeilen erst beim Scrollen
+    (canFetchMore/fetchMore) seitenweise nachlädt und die Einträge
+    durch Tages-Überschriften gruppiert.
+    """
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.loader = HistoryPageLoader(db_path, self)
+        self.loader.page_loaded.connect(self.on_page_loaded)
+        self.rows = []
+        self.entry_count = 0
+        self.filter_text = ""
+        self._generation = 0
+        self._last_key = None
+        self._last_day = None
+        self._loading = False
+        self._exhausted = False
+        self._request_page()
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self.rows = []
+        self.entry_count = 0
+        self.filter_text = text
+        self._generation += 1
+        self._last_key = None
+        self._last_day = None
+        self._loading = False
+        self._exhausted = False
+        self.endResetModel()
+        self._request_page()
+
+    def _request_page(self):
+        self._loading = True
+        self.loader.request(self._generation, self.filter_text, self._last_key)
+
+    # ---------- Qt-Modell ----------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._loading and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._request_page()
+
+    def flags(self, index):
+        if self.rows[index.row()][0] == "day":
+            return Qt.ItemFlag.ItemIsEnabled
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if row[0] == "day":
+            if role == Qt.ItemDataRole.DisplayRole:
+                return row[1]
+            if role == Qt.ItemDataRole.FontRole:
+                font = QFont()
+                font.setBold(True)
+                return font
+            return None
+        _, url, title, visit_count, last_visit = row
+        if role == Qt.ItemDataRole.DisplayRole:
+            clock = datetime.datetime.fromtimestamp(last_visit).strftime("%H:%M")
+            return f"{clock}  {title or 'Ohne Titel'}\n{url}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"{url}\nBesuche: {visit_count}"
+        if role == Qt.ItemDataRole.UserRole:
+            return url
+        return None
+
+    # ---------- Nachladen ----------
+    def on_page_loaded(self, generation, page, exhausted):
+        if generation != self._generation:
+            return  # Ergebnis einer veralteten Suche
+        self._loading = False
+        self._exhausted = exhausted
+        if not page:
+            return
+
+        new_rows = []
+        for url, title, visit_count, last_visit in page:
+            day = datetime.date.fromtimestamp(last_visit)
+            if day != self._last_day:
+                self._last_day = day
+                new_rows.append(("day", HistoryListModel.day_label(day)))
+            new_rows.append(("entry", url, title, visit_count, last_visit))
+        last_url, _, _, last_visit = page[-1]
+        self._last_key = (last_visit, last_url)
+
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+        self.rows.extend(new_rows)
+        self.entry_count += len(page)
+        self.endInsertRows()
+
+    @staticmethod
+    def day_label(day):
+        today = datetime.date.today()
+        if day == today:
+            return "Heute"
+        if day == today - datetime.timedelta(days=1):
+            return "Gestern"
+        weekdays = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
+        return f"{weekdays[day.weekday()]}, {day.strftime('%d.%m.%Y')}"
+
 class HistoryDialog(QDialog):
     """
-    Einfache Dialogklasse, um die Chronik anzuzeigen.
+    Dialog zum Anzeigen und Durchsuchen der Chronik.
+    Die Einträge werden beim Scrollen seitenweise aus dem Profilspeicher geladen.
     """
-    def __init__(self, parent=None, history_list=None):
+    def __init__(self, parent=None, db_path=DB_FILE):
         super().__init__(parent)
         self.setWindowTitle("Chronik anzeigen")
-        self.resize(400, 300)
-        self.history = history_list if history_list else []
+        self.resize(500, 400)
 
         layout = QVBoxLayout()
 
-        self.list_widget = QListWidget()
-        for entry in self.history:
-            title = entry.get("title", "Ohne Titel")
-            url = entry.get("url", "")
-            item_text = f"{title}\n{url}"
-            item = QListWidgetItem(item_text)
-            self.list_widget.addItem(item)
-        layout.addWidget(self.list_widget)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Chronik durchsuchen…")
+        self.search_edit.setClearButtonEnabled(True)
+        layout.addWidget(self.search_edit)
+
+        self.model = HistoryListModel(db_path, self)
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.list_view.setLayoutMode(QListView.LayoutMode.Batched)
+        layout.addWidget(self.list_view)
 
         # Navigation beim Doppelklick
-        self.list_widget.itemDoubleClicked.connect(self.navigate_from_history)
+        self.list_view.doubleClicked.connect(self.navigate_from_history)
+
+        # Suche erst nach einer kurzen Tipp-Pause starten
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(HISTORY_FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(lambda: self.model.set_filter(self.search_edit.text().strip()))
+        self.search_edit.textChanged.connect(self.filter_timer.start)
 
         close_btn = QPushButton("Schließen")
         close_btn.clicked.connect(self.accept)
@@ -350,23 +5853,28 @@ class HistoryDialog(QDialog):
 
         self.setLayout(layout)
 
-    def navigate_from_history(self, item):
-        text = item.text()
-        lines = text.split("\n")
-        if len(lines) >= 2:
-            url = lines[-1]
-            main_window = self.parent()
-            if hasattr(main_window, "navigate_to_url_string"):
-                main_window.navigate_to_url_string(url)
-            self.accept()
+    def navigate_from_history(self, index):
+        url = index.data(Qt.ItemDataRole.UserRole)
+        if not url:
+            return  # Tages-Überschrift
+        main_window = self.parent()
+        if hasattr(main_window, "navigate_to_url_string"):
+            main_window.navigate_to_url_string(url)
+        self.accept()
+
+    def done(self, result):
+        self.model.loader.shutdown()
+        super().done(result)
 
 class EditFavoriteDialog(QDialog):
     """
-    Dialog zum Bearbeiten eines einzelnen Favoriten (Titel/URL).
+    Dialog zum Bearbeiten eines einzelnen Favoriten (Titel/URL/Ordner).
+    Für Ordner entfällt das URL-Feld.
     """
-    def __init__(self, parent=None, title="", url=""):
+    def __init__(self, parent=None, title="", url="", folders=None, folder_id=None, is_folder=False,
+                 window_title=None):
         super().__init__(parent)
-        self.setWindowTitle("Favorit bearbeiten")
+        self.setWindowTitle(window_title or ("Ordner bearbeiten" if is_folder else "Favorit bearbeiten"))
         layout = QVBoxLayout()
 
         self.title_edit = QLineEdit()
@@ -378,8 +5886,16 @@ class EditFavoriteDialog(QDialog):
         self.url_edit = QLineEdit()
         self.url_edit.setPlaceholderText("URL")
         self.url_edit.setText(url)
-        layout.addWidget(QLabel("URL:"))
-        layout.addWidget(self.url_edit)
+        if not is_folder:
+            layout.addWidget(QLabel("URL:"))
+            layout.addWidget(self.url_edit)
+
+        self.folder_combo = QComboBox()
+        for choice_id, path in folders or [(None, "Favoriten")]:
+            self.folder_combo.addItem(path, choice_id)
+        self.folder_combo.setCurrentIndex(max(0, self.folder_combo.findData(folder_id)))
+        layout.addWidget(QLabel("Ordner:"))
+        layout.addWidget(self.folder_combo)
 
         save_btn = QPushButton("Speichern")
         save_btn.clicked.connect(self.accept)
@@ -390,32 +5906,44 @@ class EditFavoriteDialog(QDialog):
     def get_values(self):
         return self.title_edit.text(), self.url_edit.text()
 
+    def selected_folder(self):
+        return self.folder_combo.currentData()
+
 class FavoritesManagerDialog(QDialog):
     """
-    Verwaltung für Favoriten (Bearbeiten / Löschen).
+    Verwaltung für Favoriten und Ordner (Anlegen / Bearbeiten / Löschen).
+
+    Jede Änderung geht sofort über den Browser an Speicher und Menü.
+    Ordnerinhalte werden erst beim Aufklappen in den Baum geladen.
     """
-    def __init__(self, parent=None, favorites_list=None):
-        super().__init__(parent)
+    def __init__(self, browser):
+        super().__init__(browser)
         self.setWindowTitle("Favoriten verwalten")
-        self.resize(400, 300)
-        
-        self.favorites = favorites_list.copy() if favorites_list else []
-        
+        self.resize(500, 400)
+        self.browser = browser
+        self.favorites = browser.favorites
+        # ID -> Baumeintrag (nur bereits geladene Einträge)
+        self.items = {}
+        # Ordner, deren Inhalt schon im Baum steht (auch wenn er leer ist)
+        self.loaded = set()
+
         layout = QVBoxLayout()
 
-        self.list_widget = QListWidget()
-        for fav in sorted(self.favorites, key=lambda x: x["title"]):
-            item_text = f"{fav['title']}\n{fav['url']}"
-            item = QListWidgetItem(item_text)
-            self.list_widget.addItem(item)
-        layout.addWidget(self.list_widget)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Titel", "URL"])
+        self.tree.itemExpanded.connect(self._load_children)
+        self.tree.itemDoubleClicked.connect(lambda item, _: self.edit_favorite())
+        layout.addWidget(self.tree)
 
-        # Buttons: Bearbeiten, Löschen
+        # Buttons: Neuer Ordner, Bearbeiten, Löschen
         btn_layout = QHBoxLayout()
+        self.folder_btn = QPushButton("Neuer Ordner")
         self.edit_btn = QPushButton("Bearbeiten")
         self.delete_btn = QPushButton("Löschen")
+        self.folder_btn.clicked.connect(self.add_folder)
         self.edit_btn.clicked.connect(self.edit_favorite)
         self.delete_btn.clicked.connect(self.delete_favorite)
+        btn_layout.addWidget(self.folder_btn)
         btn_layout.addWidget(self.edit_btn)
         btn_layout.addWidget(self.delete_btn)
         layout.addLayout(btn_layout)
@@ -425,61 +5953,103 @@ class FavoritesManagerDialog(QDialog):
         layout.addWidget(close_btn)
 
         self.setLayout(layout)
+        self.reload(None)
+
+    def _make_item(self, fav):
+        item = QTreeWidgetItem([f"📁 {fav.title}" if fav.is_folder else fav.title, fav.url])
+        item.setData(0, Qt.ItemDataRole.UserRole, fav.id)
+        if fav.is_folder:
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+        self.items[fav.id] = item
+        return item
+
+    def _load_children(self, item):
+        fav_id = item.data(0, Qt.ItemDataRole.UserRole)
+        if fav_id not in self.loaded:
+            self.loaded.add(fav_id)
+            item.addChildren([self._make_item(fav) for fav in self.favorites.children(fav_id)])
+
+    def reload(self, folder_id):
+        """
+        Baut die Kinder von folder_id neu auf, sofern sie schon geladen sind.
+        """
+        if folder_id is None:
+            self.items = {}
+            self.loaded = set()
+            self.tree.clear()
+            self.tree.addTopLevelItems([self._make_item(fav) for fav in self.favorites.children(None)])
+            return
+        item = self.items.get(folder_id)
+        if item is None or folder_id not in self.loaded:
+            return
+        for child in item.takeChildren():
+            self._drop_items(child)
+        self.loaded.discard(folder_id)
+        self._load_children(item)
+
+    def _drop_items(self, item):
+        fav_id = item.data(0, Qt.ItemDataRole.UserRole)
+        self.items.pop(fav_id, None)
+        self.loaded.discard(fav_id)
+        for i in range(item.childCount()):
+            self._drop_items(item.child(i))
+
+    def selected(self):
+        item = self.tree.currentItem()
+        if item is None:
+            return None
+        return self.favorites.get(item.data(0, Qt.ItemDataRole.UserRole))
+
+    def add_folder(self):
+        selected = self.selected()
+        parent_id = None
+        if selected is not None:
+            parent_id = selected.id if selected.is_folder else selected.parent_id
+        title, ok = QInputDialog.getText(self, "Neuer Ordner", "Name des Ordners:")
+        if ok and title.strip():
+            if self.browser.create_favorite(title.strip(), "", parent_id, is_folder=True):
+                self.reload(parent_id)
 
     def edit_favorite(self):
-        selected_item = self.list_widget.currentItem()
-        if not selected_item:
+        fav = self.selected()
+        if fav is None:
             QMessageBox.information(self, "Info", "Bitte wählen Sie einen Favoriten aus.")
             return
-        
-        lines = selected_item.text().split("\n")
-        if len(lines) < 2:
-            return
-        old_title = lines[0]
-        old_url   = lines[1]
-        
-        edit_dlg = EditFavoriteDialog(self, old_title, old_url)
+
+        edit_dlg = EditFavoriteDialog(
+            self, fav.title, fav.url,
+            folders=self.favorites.folder_choices(exclude=fav.id if fav.is_folder else None),
+            folder_id=fav.parent_id, is_folder=fav.is_folder
+        )
         if edit_dlg.exec() == QDialog.DialogCode.Accepted:
             new_title, new_url = edit_dlg.get_values()
-            for fav in self.favorites:
-                if fav["title"] == old_title and fav["url"] == old_url:
-                    fav["title"] = new_title
-                    fav["url"] = new_url
-                    break
-            self.refresh_list()
+            old_parent = fav.parent_id
+            if not self.browser.edit_favorite(fav.id, new_title, new_url, edit_dlg.selected_folder()):
+                return
+            self.reload(old_parent)
+            if fav.parent_id != old_parent:
+                self.reload(fav.parent_id)
 
     def delete_favorite(self):
-        selected_item = self.list_widget.currentItem()
-        if not selected_item:
+        fav = self.selected()
+        if fav is None:
             QMessageBox.information(self, "Info", "Bitte wählen Sie einen Favoriten aus.")
             return
-        
-        lines = selected_item.text().split("\n")
-        if len(lines) < 2:
-            return
-        fav_title = lines[0]
-        fav_url   = lines[1]
-        
+
+        question = (f"Soll der Ordner '{fav.title}' samt Inhalt wirklich gelöscht werden?"
+                    if fav.is_folder else
+                    f"Soll der Favorit '{fav.title}' wirklich gelöscht werden?")
         reply = QMessageBox.question(
             self,
             "Löschen bestätigen",
-            f"Sollen der Favorit '{fav_title}' wirklich gelöscht werden?",
+            question,
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            self.favorites = [
-                f for f in self.favorites
-                if not (f["title"] == fav_title and f["url"] == fav_url)
-            ]
-            self.refresh_list()
-
-    def refresh_list(self):
-        self.list_widget.clear()
-        for fav in sorted(self.favorites, key=lambda x: x["title"]):
-            item_text = f"{fav['title']}\n{fav['url']}"
-            item = QListWidgetItem(item_text)
-            self.list_widget.addItem(item)
+            parent_id = fav.parent_id
+            if self.browser.delete_favorite(fav.id):
+                self.reload(parent_id)
 
 class Browser(QMainWindow):
     def __init__(self):
@@ -487,21 +6057,58 @@ class Browser(QMainWindow):
         self.setWindowTitle("TMP-Networks Browser (PyQt6)")
         self.setGeometry(100, 100, 1200, 800)
         self.load_data()
-
-        if "history" not in self.data:
-            self.data["history"] = []
+        startup_profiler.mark("Profil geöffnet")
 
         self.tabs = QTabWidget()
         self.tabs.setDocumentMode(True)
         self.tabs.setTabsClosable(True)
         self.tabs.tabCloseRequested.connect(self.close_current_tab)
-        self.tabs.currentChanged.connect(self.update_url_bar)
+        self.tabs.currentChanged.connect(self.on_current_tab_changed)
         self.setCentralWidget(self.tabs)
 
+        # Gefundene Videos pro Tab; steuert den 🎥-Button
+        self.media = MediaDiscovery(self)
+        self.media.changed.connect(self.on_media_changed)
+        self.blocker = ContentBlocker(self)
+        self.blocker.enabled = self.store.get_setting("content_blocking", True)
+        self.blocker.count_changed.connect(self.on_blocked_count_changed)
+        self.blocker.loaded.connect(
+            lambda count: self.status.showMessage(f"Filterlisten geladen: {count} Regeln", 3000))
+        self.blocker.failed.connect(
+            lambda error: self.status.showMessage(f"Filterlisten nicht geladen: {error}", 5000))
+        self.blocker.load()
+        # Ladezeiten pro Tab (Menü "Tabs" > "Ladezeiten")
+        self.timing = PageTimingRecorder(self)
+        self.performance_panel = None
+
+        # Hintergrund-Tabs einfrieren/verwerfen; "Nie verwerfen" im Kontextmenü
+        self.lifecycle = TabLifecycleManager(self.tabs, self.store, self)
+        self.tabs.currentChanged.connect(self.lifecycle.on_current_changed)
+        # Speicher/CPU aller Prozesse (Menü "Tabs" > "Task-Manager")
+        self.task_monitor = TaskMonitor(self, self)
+        self.task_monitor.updated.connect(
+            lambda: self.lifecycle.enforce_budget(self.task_monitor.samples))
+        self.task_manager = None
+        self.tabs.tabBar().setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.tabs.tabBar().customContextMenuRequested.connect(self.show_tab_context_menu)
+
+        # Alle Tabs teilen sich ein benanntes Profil: Downloads nur einmal verbinden
+        # und Login-/Videoerkennung einmal für alle Seiten und Frames einschleusen
+        self.web_profile = WebProfileManager(self.store, self)
+        self.web_profile.warmup_progress.connect(
+            lambda done, total: self.status.showMessage(f"Favoriten vorgeladen: {done} von {total}", 3000))
+        profile = self.web_profile.profile
+        profile.downloadRequested.connect(self.on_downloadRequested)
+        try:
+            profile.scripts().insert(page_watcher_script())
+        except OSError as e:
+            print("Login- und Videoerkennung nicht verfügbar:", e)
+
         menu_bar = self.menuBar()
 
-        # Favoriten-Menü
+        # Favoriten-Menü (Einträge und Ordner werden erst beim Aufklappen erzeugt)
         self.fav_menu = QMenu("Favoriten", self)
+        self.fav_menu.aboutToShow.connect(lambda: self.populate_favorites_menu(None))
         menu_bar.addMenu(self.fav_menu)
         add_fav_action = QAction("Favorit hinzufügen", self)
         add_fav_action.triggered.connect(self.add_favorite)
@@ -512,8 +6119,13 @@ class Browser(QMainWindow):
         manage_fav_action = QAction("Favoriten verwalten", self)
         manage_fav_action.triggered.connect(self.manage_favorites)
         self.fav_menu.addAction(manage_fav_action)
+        self.fav_menu.addSeparator()
 
-        self.update_favorites_menu()
+        # Ordner-ID -> Menü (None = Favoriten-Menü), ID -> Aktion; nur für
+        # bereits aufgeklappte Menüs
+        self._fav_menus = {None: self.fav_menu}
+        self._fav_populated = set()
+        self._fav_actions = {}
 
         # Passwörter-Menü
         self.pass_menu = QMenu("Passwörter", self)
@@ -528,6 +6140,114 @@ class Browser(QMainWindow):
         manage_pass_action.triggered.connect(self.manage_credentials)
         self.pass_menu.addAction(manage_pass_action)
 
+        # Video-Menü: Qualitätsgrenze für die Variantenwahl
+        self.video_menu = QMenu("Video", self)
+        menu_bar.addMenu(self.video_menu)
+        quality_menu = self.video_menu.addMenu("Maximale Qualität")
+        quality_group = QActionGroup(self)
+        current_cap = self.video_max_height()
+        for height in (0,) + VIDEO_QUALITY_CAPS:
+            action = QAction("Automatisch" if height == 0 else f"{height}p", self)
+            action.setCheckable(True)
+            action.setChecked(height == current_cap)
+            action.setData(height)
+            action.triggered.connect(lambda _, h=height: self.set_video_max_height(h))
+            quality_group.addAction(action)
+            quality_menu.addAction(action)
+        caching_menu = self.video_menu.addMenu("Puffer (Startverzögerung)")
+        caching_group = QActionGroup(self)
+        current_caching = self.vlc_network_caching()
+        for caching in VLC_NETWORK_CACHING_CHOICES:
+            action = QAction(f"{caching} ms", self)
+            action.setCheckable(True)
+            action.setChecked(caching == current_caching)
+            action.triggered.connect(lambda _, c=caching: self.set_vlc_network_caching(c))
+            caching_group.addAction(action)
+            caching_menu.addAction(action)
+
+        # Downloads-Menü
+        self.downloads_menu = QMenu("Downloads", self)
+        menu_bar.addMenu(self.downloads_menu)
+        show_downloads_action = QAction("Downloads anzeigen", self)
+        show_downloads_action.triggered.connect(self.show_downloads)
+        self.downloads_menu.addAction(show_downloads_action)
+        rate_menu = self.downloads_menu.addMenu("Bandbreite begrenzen")
+        rate_group = QActionGroup(self)
+        current_rate = self.downloads.rate_limit()
+        for rate in (0,) + DOWNLOAD_RATE_LIMITS:
+            action = QAction("Unbegrenzt" if rate == 0 else f"{format_bytes(rate)}/s", self)
+            action.setCheckable(True)
+            action.setChecked(rate == current_rate)
+            action.triggered.connect(lambda _, r=rate: self.downloads.set_rate_limit(r))
+            rate_group.addAction(action)
+            rate_menu.addAction(action)
+
+        # Tabs-Menü: Speicherbudget für Hintergrund-Tabs
+        self.tabs_menu = QMenu("Tabs", self)
+        menu_bar.addMenu(self.tabs_menu)
+        budget_menu = self.tabs_menu.addMenu("Speicherbudget")
+        budget_group = QActionGroup(self)
+        current_budget = self.lifecycle.memory_budget_mb()
+        for budget in (0,) + TAB_MEMORY_BUDGETS_MB:
+            action = QAction("Unbegrenzt" if budget == 0 else f"{budget // 1024} GB", self)
+            action.setCheckable(True)
+            action.setChecked(budget == current_budget)
+            action.triggered.connect(lambda _, b=budget: self.store_write(
+                self.store.set_setting, "tab_memory_budget_mb", b))
+            budget_group.addAction(action)
+            budget_menu.addAction(action)
+        discard_action = QAction("Hintergrund-Tabs jetzt verwerfen", self)
+        discard_action.triggered.connect(self.discard_background_tabs)
+        self.tabs_menu.addAction(discard_action)
+        self.tabs_menu.addSeparator()
+        performance_action = QAction("Ladezeiten", self)
+        performance_action.triggered.connect(self.show_performance_panel)
+        self.tabs_menu.addAction(performance_action)
+        har_action = QAction("Als HAR exportieren…", self)
+        har_action.triggered.connect(lambda: self.export_har(self.tabs.currentWidget()))
+        self.tabs_menu.addAction(har_action)
+        task_manager_action = QAction("Task-Manager", self)
+        task_manager_action.setShortcut("Shift+Esc")
+        task_manager_action.triggered.connect(self.show_task_manager)
+        self.tabs_menu.addAction(task_manager_action)
+
+        # Cache-Menü: Größe des HTTP-Caches, Übersicht, Vorladen
+        self.cache_menu = QMenu("Cache", self)
+        menu_bar.addMenu(self.cache_menu)
+        cache_inspector_action = QAction("Cache-Übersicht", self)
+        cache_inspector_action.triggered.connect(lambda: CacheInspectorDialog(self).exec())
+        self.cache_menu.addAction(cache_inspector_action)
+        cache_size_menu = self.cache_menu.addMenu("Cache-Größe")
+        cache_size_group = QActionGroup(self)
+        current_size = self.web_profile.cache_size_mb()
+        for size_mb in WEB_CACHE_SIZES_MB:
+            action = QAction(f"{size_mb} MB" if size_mb < 1024 else f"{size_mb // 1024} GB", self)
+            action.setCheckable(True)
+            action.setChecked(size_mb == current_size)
+            action.triggered.connect(lambda _, m=size_mb: self.store_write(self.web_profile.set_cache_size_mb, m))
+            cache_size_group.addAction(action)
+            cache_size_menu.addAction(action)
+        warmup_action = QAction("Favoriten im Leerlauf vorladen", self)
+        warmup_action.setCheckable(True)
+        warmup_action.setChecked(self.web_profile.warmup_enabled())
+        warmup_action.toggled.connect(self.set_cache_warmup)
+        self.cache_menu.addAction(warmup_action)
+
+        # Werbeblocker-Menü
+        blocker_menu = QMenu("Werbeblocker", self)
+        menu_bar.addMenu(blocker_menu)
+        blocking_action = QAction("Werbung und Tracker blockieren", self)
+        blocking_action.setCheckable(True)
+        blocking_action.setChecked(self.blocker.enabled)
+        blocking_action.toggled.connect(self.set_content_blocking)
+        blocker_menu.addAction(blocking_action)
+        add_filter_action = QAction("Filterliste hinzufügen…", self)
+        add_filter_action.triggered.connect(self.add_filter_lists)
+        blocker_menu.addAction(add_filter_action)
+        reload_filter_action = QAction("Filterlisten neu laden", self)
+        reload_filter_action.triggered.connect(self.blocker.load)
+        blocker_menu.addAction(reload_filter_action)
+
         # Chronik-Menü
         self.history_menu = QMenu("Chronik", self)
         menu_bar.addMenu(self.history_menu)
@@ -579,6 +6299,14 @@ class Browser(QMainWindow):
         self.url_bar.returnPressed.connect(self.navigate_to_url)
         navigation_bar.addWidget(self.url_bar)
 
+        # Vorschläge aus Chronik und Favoriten
+        self.completion_model = QStandardItemModel(self)
+        self.url_completer = QCompleter(self.completion_model, self)
+        self.url_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.url_completer.activated.connect(self.navigate_to_url_string)
+        self.url_bar.setCompleter(self.url_completer)
+        self.url_bar.textEdited.connect(self.update_url_suggestions)
+
         spacer = QWidget()
         spacer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         navigation_bar.addWidget(spacer)
@@ -589,123 +6317,396 @@ class Browser(QMainWindow):
         scan_button.triggered.connect(self.scan_for_login_fields)
         navigation_bar.addAction(scan_button)
 
-        video_scan_button = QAction("🎥", self)
-        video_scan_button.setToolTip("Videos scannen und abspielen (höchste Auflösung)")
-        video_scan_button.setFont(emoji_font)
-        video_scan_button.triggered.connect(self.scan_and_play_videos)
-        navigation_bar.addAction(video_scan_button)
+        self.video_scan_button = QAction("🎥", self)
+        self.video_scan_button.setFont(emoji_font)
+        self.video_scan_button.triggered.connect(self.scan_and_play_videos)
+        navigation_bar.addAction(self.video_scan_button)
+        self.update_video_button(None)
         
         self.status = QStatusBar()
         self.setStatusBar(self.status)
-
-        # Start-Tab
-        self.add_new_tab(QUrl('https://www.google.com'), 'Startseite')
+        self.blocked_label = QLabel()
+        self.status.addPermanentWidget(self.blocked_label)
+        startup_profiler.mark("Menüs und Leisten erstellt")
+
+        # Die erste Webansicht ist der teuerste Schritt: Sitzung erst nach dem
+        # ersten Zeichnen des Fensters wiederherstellen, danach regelmäßig sichern
+        self._first_paint_done = False
+        self._session_restored = False
+        self._last_session = None
+        self.session_timer = QTimer(self)
+        self.session_timer.setInterval(SESSION_SAVE_INTERVAL_MS)
+        self.session_timer.timeout.connect(self.save_session)
+        self.session_timer.start()
+
+    def event(self, event):
+        if event.type() == QEvent.Type.Paint and not self._first_paint_done:
+            self._first_paint_done = True
+            startup_profiler.mark("Erstes Zeichnen des Fensters")
+            QTimer.singleShot(0, self.finish_startup)
+        return super().event(event)
+
+    def finish_startup(self):
+        self.restore_session()
+        self._session_restored = True
+        startup_profiler.mark("Sitzung wiederhergestellt")
+        # libVLC vorladen, wenn der Start erledigt ist
+        get_vlc_pool().network_caching = self.vlc_network_caching()
+        QTimer.singleShot(VLC_WARMUP_DELAY_MS, get_vlc_pool().warm_up)
+        if self.web_profile.warmup_enabled():
+            QTimer.singleShot(CACHE_WARMUP_DELAY_MS, self.start_cache_warmup)
+
+    def set_cache_warmup(self, enabled):
+        self.store_write(self.web_profile.set_warmup_enabled, enabled)
+        if enabled:
+            self.start_cache_warmup()
+
+    def start_cache_warmup(self):
+        if not self.web_profile.warmup_enabled():
+            return
+        try:
+            urls = self.store.most_visited_favorites(CACHE_WARMUP_MAX_PAGES)
+        except sqlite3.Error as e:
+            print("Fehler beim Lesen der Favoriten:", e)
+            return
+        self.web_profile.start_warmup(
+            urls, lambda: any(view.loading for _, view in self.lifecycle.views()))
 
     # --------------------------------------------------
-    #  HLS PARSING: Um .m3u8 zu analysieren und höchste Auflösung zu wählen
-    # --------------------------------------------------
-    def parse_m3u8_for_highest_variant(self, manifest_url):
+    def load_data(self):
         """
-        Lädt das (Top-Level-)HLS-Manifest von manifest_url.
-        Sucht #EXT-X-STREAM-INF-Einträge samt RESOLUTION=WxH
-        und gibt die Sub-Playlist-URL mit der höchsten Auflösung zurück.
-        
-        Falls nichts gefunden wird, liefern wir einfach manifest_url zurück.
+        Öffnet den SQLite-Profilspeicher (migriert beim ersten Start die
+        alte JSON-Datei). Favoriten und Zugangsdaten lädt ein ProfileLoader
+        im Hintergrund; bis dahin sind Index und Zugangsdaten leer und
+        Aktionen, die sie brauchen, warten (siehe profile_pending).
         """
         try:
-            r = requests.get(manifest_url, timeout=5)
-            r.raise_for_status()
-        except requests.RequestException as e:
-            print("Fehler beim Laden des Manifests:", e)
-            return manifest_url
-
-        lines = r.text.splitlines()
-        best_url = None
-        best_resolution = 0  # wir speichern z. B. w*h
-
-        for i, line in enumerate(lines):
-            if line.strip().startswith('#EXT-X-STREAM-INF:'):
-                # Bsp: #EXT-X-STREAM-INF:BANDWIDTH=...,RESOLUTION=1280x720, ...
-                match = re.search(r'RESOLUTION\s*=\s*(\d+)x(\d+)', line, re.IGNORECASE)
-                if match:
-                    w = int(match.group(1))
-                    h = int(match.group(2))
-                    resolution = w * h
-                    # Nächste Zeile = URL (Sub-Manifest)
-                    if i+1 < len(lines):
-                        sub_url = lines[i+1].strip()
-                        # Falls relativer Pfad => absolute URL bauen
-                        if not sub_url.startswith('http'):
-                            sub_url = urljoin(manifest_url, sub_url)
-
-                        if resolution > best_resolution:
-                            best_resolution = resolution
-                            best_url = sub_url
-
-        # Falls wir was gefunden haben, nimm den "besten" Sub-Manifest-Link
-        if best_url:
-            return best_url
-
-        # Sonst nimm einfach das Original
-        return manifest_url
-
-    # --------------------------------------------------
-    def load_data(self):
-        if os.path.exists(DATA_FILE):
-            try:
-                with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
-            except json.JSONDecodeError:
-                QMessageBox.warning(self, "Fehler", f"Die Datei {DATA_FILE} ist beschädigt.")
-                self.data = {"favorites": [], "credentials": {}, "history": []}
-        else:
-            self.data = {"favorites": [], "credentials": {}, "history": []}
+            self.store = ProfileStore(DB_FILE)
+        except (ValueError, AttributeError, TypeError, sqlite3.ProgrammingError):
+            # Kein gültiges JSON, nicht UTF-8 (beides ValueError) oder falsche
+            # Struktur (z.B. Liste statt Objekt, Werte nicht speicherbar)
+            QMessageBox.warning(self, "Fehler", f"Die Datei {DATA_FILE} ist beschädigt.")
+            # Beschädigte Datei beiseitelegen und mit leerem Profil starten
+            os.replace(DATA_FILE, DATA_FILE + ".beschaedigt")
+            self.store = ProfileStore(DB_FILE)
+        self.profile_ready = False
+        self._after_profile_load = []
+        self.data = {"credentials": {}}
+        self.favorites = FavoriteIndex()
+        self.credential_index = CredentialIndex({})
+        # Vorschlagsindex entsteht erst mit den Favoriten (start_completion_index)
+        self.completion_index = None
+        self._pending_completion = []
+        self._profile_loader = ProfileLoader(self.store.path, self)
+        self._profile_loader.finished.connect(self.on_profile_loaded)
+        self._profile_loader.start()
+        self.history = HistoryEngine(self.store, self)
+        self.history.records_removed.connect(self.on_history_records_removed)
+        # Erste Bereinigung kurz nach dem Start, danach periodisch
+        QTimer.singleShot(30000, self.history.compact)
+        self.downloads = DownloadManager(self.store, self)
+        self.downloads.stats_changed.connect(self.show_download_stats)
+        self.download_panel = None
+
+    def on_profile_loaded(self, data):
+        self.data = {"credentials": data["credentials"]}
+        self.favorites = FavoriteIndex(data["favorites"])
+        self.credential_index = CredentialIndex(self.data["credentials"])
+        self.profile_ready = True
+        startup_profiler.mark_once("Favoriten und Zugangsdaten geladen")
+        self.start_completion_index()
+        pending, self._after_profile_load = self._after_profile_load, []
+        for func, args in pending:
+            func(*args)
+
+    def profile_pending(self, func, *args):
+        """
+        True, solange Favoriten und Zugangsdaten noch laden; func(*args)
+        wird dann ausgeführt, sobald sie bereitstehen.
+        """
+        if self.profile_ready:
+            return False
+        self._after_profile_load.append((func, args))
+        return True
 
     def save_data(self):
+        """
+        Gleicht Favoriten und Zugangsdaten komplett mit dem Speicher ab.
+        Einzelne Änderungen laufen über die inkrementellen Methoden
+        des ProfileStore (siehe store_write).
+        """
+        if self.profile_pending(self.save_data):
+            return
         try:
-            with open(DATA_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=4, ensure_ascii=False)
-        except Exception as e:
+            self.store.replace_favorites(self.favorites.all())
+            self.store.replace_credentials(self.data["credentials"])
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Fehler", f"Beim Speichern der Daten ist ein Fehler aufgetreten:\n{e}")
+
+    def store_write(self, method, *args):
+        """
+        Führt eine einzelne Schreiboperation des ProfileStore aus
+        und meldet Fehler wie bisher per Dialog.
+        """
+        try:
+            return method(*args)
+        except sqlite3.Error as e:
             QMessageBox.critical(self, "Fehler", f"Beim Speichern der Daten ist ein Fehler aufgetreten:\n{e}")
+            return None
 
     def add_to_history(self, title, url):
         if not title:
             title = "Ohne Titel"
-        self.data["history"].append({"title": title, "url": url})
-        self.save_data()
+        record = self.history.add_visit(title, url)
+        self.update_completion(record.url, title=record.title, history_rank=record.rank())
+
+    def update_history_title(self, url, title):
+        self.history.update_title(url, title)
+        record = self.history.records.get(url)
+        if record is not None:
+            self.update_completion(url, title=record.title)
+
+    # -------------- URL-Vorschläge -------------- #
+    def start_completion_index(self):
+        """
+        Startet den Indexaufbau im Hintergrund. Änderungen, die währenddessen
+        anfallen, werden gesammelt und danach nachgetragen.
+        """
+        self.completion_index = None
+        self._pending_completion = []
+        self.history.flush()
+        self._completion_builder = CompletionIndexBuilder(
+            self.store.path, [{"title": fav.title, "url": fav.url} for fav in self.favorites.bookmarks()], self)
+        self._completion_builder.finished.connect(self.on_completion_index_ready)
+        self._completion_builder.start()
+
+    def on_completion_index_ready(self, index):
+        for url, kwargs in self._pending_completion:
+            if kwargs is None:
+                index.remove_history(url)
+            else:
+                index.update(url, **kwargs)
+        self._pending_completion = []
+        self.completion_index = index
+        startup_profiler.mark_once("Vorschlagsindex bereit")
+
+    def update_completion(self, url, **kwargs):
+        if self.completion_index is None:
+            self._pending_completion.append((url, kwargs))
+        else:
+            self.completion_index.update(url, **kwargs)
+
+    def on_history_records_removed(self, urls):
+        for url in urls:
+            if self.completion_index is None:
+                self._pending_completion.append((url, None))
+            else:
+                self.completion_index.remove_history(url)
+
+    def remove_completion(self, url):
+        if self.completion_index is None:
+            self._pending_completion.append((url, {"favorite": False}))
+        else:
+            self.completion_index.update(url, favorite=False)
+
+    def update_url_suggestions(self, text):
+        self.completion_model.clear()
+        if self.completion_index is None or not text.strip():
+            return
+        for entry in self.completion_index.query(text):
+            item = QStandardItem(f"{entry.title} — {entry.url}")
+            item.setData(entry.url, Qt.ItemDataRole.EditRole)
+            if entry.favorite:
+                item.setText(f"★ {entry.title} — {entry.url}")
+            self.completion_model.appendRow(item)
 
     def add_new_tab(self, qurl=None, label="Neue Seite"):
         if qurl is None or qurl == '':
-            qurl = QUrl('https://www.google.com')
-        browser = CustomWebEngineView(self)
+            qurl = QUrl(START_PAGE_URL)
+        browser = self.create_tab_view()
         browser.setUrl(qurl)
-        browser.page().profile().downloadRequested.connect(self.on_downloadRequested)
-        browser.loadFinished.connect(lambda _, b=browser: self.check_credentials(b))
-        browser.loadFinished.connect(lambda _, i=self.tabs.count(), b=browser:
-                                     self.tabs.setTabText(i, b.page().title()))
-        browser.urlChanged.connect(lambda new_url, b=browser: self.update_url_bar(new_url, b))
 
         i = self.tabs.addTab(browser, label)
         self.tabs.setCurrentIndex(i)
 
+    def create_tab_view(self):
+        browser = CustomWebEngineView(self)
+        browser.loadFinished.connect(lambda _: startup_profiler.mark_once("Erste Seite geladen"))
+        browser.loadFinished.connect(lambda _, b=browser:
+                                     self.tabs.setTabText(self.tabs.indexOf(b), b.page().title()))
+        browser.urlChanged.connect(lambda new_url, b=browser: self.update_url_bar(new_url, b))
+        browser.titleChanged.connect(lambda title, b=browser:
+                                     self.update_history_title(b.url().toString(), title))
+        return browser
+
     def close_current_tab(self, index):
+        browser = self.tabs.widget(index)
         self.tabs.removeTab(index)
+        # removeTab gibt den Tab nur frei; ohne deleteLater liefe die Seite weiter
+        self.lifecycle.forget(browser)
+        self.media.forget(browser)
+        self.timing.forget(browser)
+        self.blocker.forget(browser)
+        browser.deleteLater()
         if self.tabs.count() == 0:
             self.close()
 
-    def update_url_bar(self, qurl=None, browser=None):
-        if browser != self.tabs.currentWidget():
+    # -------------- Sitzung -------------- #
+    def restore_session(self):
+        """
+        Legt für jeden Tab der letzten Sitzung einen Platzhalter an; nur der
+        aktive Tab bekommt sofort eine Webansicht.
+        """
+        try:
+            tabs = self.store.load_session()
+            current = self.store.get_setting("session_current_tab", 0)
+        except sqlite3.Error as e:
+            print("Fehler beim Laden der Sitzung:", e)
+            tabs = []
+        if not tabs:
+            self.add_new_tab(QUrl(START_PAGE_URL), 'Startseite')
             return
+        self.tabs.blockSignals(True)
+        for url, title, pinned, history in tabs:
+            self.tabs.addTab(TabPlaceholder(url, title, bool(pinned), history), title or url)
+        self.tabs.blockSignals(False)
+        current = min(max(current, 0), len(tabs) - 1)
+        if current == self.tabs.currentIndex():
+            self.on_current_tab_changed(current)
+            self.lifecycle.on_current_changed(current)
+        else:
+            self.tabs.setCurrentIndex(current)
 
-        if qurl is None:
-            qurl = self.tabs.currentWidget().url()
-        self.url_bar.setText(qurl.toString())
+    def materialize_tab(self, index):
+        """
+        Ersetzt den Platzhalter an index durch eine echte Webansicht und lädt sie.
+        """
+        placeholder = self.tabs.widget(index)
+        if not isinstance(placeholder, TabPlaceholder):
+            return placeholder
+        browser = self.create_tab_view()
+        if not placeholder.history_blob or not restore_web_history(
+                browser.history(), placeholder.history_blob):
+            browser.setUrl(QUrl(placeholder.session_url))
+        # Signale blockieren: das Austauschen soll keinen weiteren Tabwechsel auslösen
+        self.tabs.blockSignals(True)
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, browser, placeholder.session_title or placeholder.session_url)
+        self.tabs.setCurrentIndex(index)
+        self.tabs.blockSignals(False)
+        if placeholder.pinned:
+            self.lifecycle.set_pinned(browser, True)
+        placeholder.deleteLater()
+        return browser
+
+    def session_snapshot(self):
+        tabs = []
+        for i in range(self.tabs.count()):
+            widget = self.tabs.widget(i)
+            if isinstance(widget, TabPlaceholder):
+                tabs.append((widget.session_url, widget.session_title,
+                             widget.pinned, widget.history_blob))
+                continue
+            try:
+                history = serialize_web_history(widget.history())
+            except TypeError:
+                history = None  # Qt-Version ohne QDataStream-Operatoren
+            tabs.append((widget.url().toString(), self.tabs.tabText(i),
+                         self.lifecycle.info(widget).pinned, history))
+        return tabs, self.tabs.currentIndex()
+
+    def save_session(self):
+        if not self._session_restored:
+            return  # sonst würde die gesicherte Sitzung mit einer leeren überschrieben
+        snapshot = self.session_snapshot()
+        if snapshot == self._last_session:
+            return
+        try:
+            self.store.save_session(*snapshot)
+            self._last_session = snapshot
+        except sqlite3.Error as e:
+            print("Fehler beim Sichern der Sitzung:", e)
+
+    def show_tab_context_menu(self, pos):
+        index = self.tabs.tabBar().tabAt(pos)
+        browser = self.tabs.widget(index)
+        if browser is None:
+            return
+        menu = QMenu(self)
+        pin_action = menu.addAction("Nie verwerfen")
+        pin_action.setCheckable(True)
+        discard_action = menu.addAction("Tab verwerfen")
+        if isinstance(browser, TabPlaceholder):
+            # Noch nicht geladen: Markierung gilt beim Aktivieren, verwerfen entfällt
+            pin_action.setChecked(browser.pinned)
+            pin_action.toggled.connect(lambda pinned: setattr(browser, "pinned", pinned))
+            discard_action.setEnabled(False)
+        else:
+            pin_action.setChecked(self.lifecycle.info(browser).pinned)
+            pin_action.toggled.connect(lambda pinned: self.lifecycle.set_pinned(browser, pinned))
+            discard_action.setEnabled(browser is not self.tabs.currentWidget()
+                                      and not self.lifecycle.info(browser).pinned)
+        discard_action.triggered.connect(lambda: self.lifecycle.discard(browser))
+        har_action = menu.addAction("Als HAR exportieren…")
+        har_action.setEnabled(isinstance(browser, QWebEngineView))
+        har_action.triggered.connect(lambda: self.export_har(browser))
+        menu.exec(self.tabs.tabBar().mapToGlobal(pos))
+
+    def show_performance_panel(self):
+        if self.performance_panel is None:
+            self.performance_panel = PerformancePanelDialog(self)
+        self.performance_panel.show()
+        self.performance_panel.raise_()
+
+    def show_task_manager(self):
+        if self.task_manager is None:
+            self.task_manager = TaskManagerDialog(self)
+        self.task_manager.show()
+        self.task_manager.raise_()
+
+    def export_har(self, browser):
+        if not isinstance(browser, QWebEngineView):
+            return
+        har = self.timing.har(browser)
+        if not har["log"]["pages"]:
+            QMessageBox.information(self, "Info", "Für diesen Tab liegen noch keine Ladezeiten vor.")
+            return
+        name = (browser.url().host() or "seite") + ".har"
+        path, _ = QFileDialog.getSaveFileName(self, "Als HAR exportieren", name, "HAR-Dateien (*.har)")
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(har, f, ensure_ascii=False, indent=1)
+        except OSError as e:
+            QMessageBox.critical(self, "Fehler", f"HAR-Datei konnte nicht gespeichert werden:\n{e}")
+            return
+        self.status.showMessage(f"HAR gespeichert: {path}", 5000)
+
+    def discard_background_tabs(self):
+        for browser in self.lifecycle.candidates():
+            self.lifecycle.discard(browser)
+
+    def on_current_tab_changed(self, index):
+        # Tabwechsel: nur die URL-Leiste aktualisieren, kein Chronik-Eintrag;
+        # Platzhalter aus der Sitzung werden jetzt erst geladen
+        browser = self.materialize_tab(index)
+        self.update_video_button(browser)
+        self.update_blocked_label(browser)
+        if browser is None:
+            return
+        self.url_bar.setText(browser.url().toString())
         self.url_bar.setCursorPosition(0)
 
-        current_title = self.tabs.currentWidget().page().title()
+    def update_url_bar(self, qurl, browser):
         current_url = qurl.toString()
         if current_url and current_url != "about:blank":
-            self.add_to_history(current_title, current_url)
+            self.add_to_history(browser.page().title(), current_url)
+
+        if browser != self.tabs.currentWidget():
+            return
+        self.url_bar.setText(current_url)
+        self.url_bar.setCursorPosition(0)
 
     def navigate_to_url(self):
         q = QUrl(self.url_bar.text())
@@ -714,7 +6715,7 @@ class Browser(QMainWindow):
         self.tabs.currentWidget().setUrl(q)
 
     def navigate_home(self):
-        self.tabs.currentWidget().setUrl(QUrl("https://www.google.com"))
+        self.tabs.currentWidget().setUrl(QUrl(START_PAGE_URL))
 
     def navigate_to_url_string(self, url_string):
         if not url_string:
@@ -724,48 +6725,165 @@ class Browser(QMainWindow):
             q.setScheme("http")
         self.tabs.currentWidget().setUrl(q)
 
+    # -------------- Downloads -------------- #
     def on_downloadRequested(self, download):
-        options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getSaveFileName(self, "Speichern unter", download.path(), options=options)
-        if file_path:
-            download.setPath(file_path)
-            download.accept()
-            download.finished.connect(lambda: self.download_finished(download))
-            download.downloadProgress.connect(self.download_progress)
-
-    def download_progress(self, received, total):
-        if total > 0:
-            progress = int(received / total * 100)
-            self.status.showMessage(f"Download läuft: {progress}%")
+        if self.web_profile.warmup_page is not None and download.page() is self.web_profile.warmup_page:
+            download.cancel()  # Vorladen lädt nie Dateien herunter
+            return
+        default_path = os.path.join(download.downloadDirectory(), download.downloadFileName())
+        file_path, _ = QFileDialog.getSaveFileName(self, "Speichern unter", default_path)
+        if not file_path:
+            download.cancel()
+            return
+        download.setDownloadDirectory(os.path.dirname(file_path))
+        download.setDownloadFileName(os.path.basename(file_path))
+        self.downloads.add_web_download(download)
+
+    def show_downloads(self):
+        if self.download_panel is None:
+            self.download_panel = DownloadPanelDialog(self.downloads, self)
+        self.download_panel.show()
+        self.download_panel.raise_()
+
+    def show_download_stats(self):
+        running, queued, speed = self.downloads.summary()
+        if running or queued:
+            self.status.showMessage(
+                f"Downloads: {running} aktiv, {queued} wartend – {format_bytes(speed)}/s")
         else:
-            self.status.showMessage("Download läuft...")
-
-    def download_finished(self, download):
-        self.status.showMessage(f"Download abgeschlossen: {download.path()}")
+            self.status.clearMessage()
 
     # -------------- Favoriten -------------- #
     def add_favorite(self):
+        if self.profile_pending(self.add_favorite):
+            return
         current_url = self.tabs.currentWidget().url().toString()
         current_title = self.tabs.currentWidget().page().title()
-        if any(fav["url"] == current_url for fav in self.data["favorites"]):
+        if self.favorites.contains_url(current_url):
             QMessageBox.information(self, "Info", "Diese Seite ist bereits als Favorit gespeichert.")
             return
-        self.data["favorites"].append({"title": current_title, "url": current_url})
-        self.save_data()
-        self.update_favorites_menu()
-        QMessageBox.information(self, "Erfolg", "Favorit hinzugefügt.")
-
-    def update_favorites_menu(self):
-        actions = self.fav_menu.actions()
-        # Ab Index 3 entfernen (0=Favorit hinzufügen, 1=Separator, 2=Favoriten verwalten)
-        for action in actions[3:]:
-            self.fav_menu.removeAction(action)
-
-        for fav in sorted(self.data["favorites"], key=lambda x: x["title"]):
-            action = QAction(fav["title"], self)
-            action.setData(fav["url"])
+        parent_id = None
+        choices = self.favorites.folder_choices()
+        if len(choices) > 1:
+            # Ordner vorhanden: Zielordner (und Titel) wählen lassen
+            dlg = EditFavoriteDialog(self, current_title, current_url, folders=choices,
+                                     window_title="Favorit hinzufügen")
+            if dlg.exec() != QDialog.DialogCode.Accepted:
+                return
+            current_title, current_url = dlg.get_values()
+            parent_id = dlg.selected_folder()
+        if self.create_favorite(current_title, current_url, parent_id):
+            QMessageBox.information(self, "Erfolg", "Favorit hinzugefügt.")
+
+    def create_favorite(self, title, url, parent_id=None, is_folder=False):
+        fav_id = self.store_write(self.store.add_favorite, title, url, parent_id, is_folder)
+        if fav_id is None:
+            return None
+        fav = Favorite(fav_id, title, url, parent_id, is_folder)
+        self.favorites.add(fav)
+        if not is_folder:
+            self.update_completion(url, title=title, favorite=True)
+        self._place_favorite_action(fav, None)
+        return fav
+
+    def edit_favorite(self, fav_id, title, url, parent_id):
+        """
+        Ändert einen Favoriten; False, wenn das Speichern fehlschlug
+        (Index und Menü bleiben dann unverändert).
+        """
+        fav = self.favorites.get(fav_id)
+        old_url = fav.url
+        if not self.store_write(self.store.update_favorite, fav_id, title, url, parent_id):
+            return False
+        # Aktion aus dem alten Menü lösen, im Index umsortieren, neu einreihen
+        action = self._fav_actions.get(fav_id)
+        if action is not None:
+            self._fav_menus[fav.parent_id].removeAction(action)
+        self.favorites.update(fav_id, title, url, parent_id)
+        self._place_favorite_action(fav, action)
+        if not fav.is_folder:
+            if old_url != url and not self.favorites.contains_url(old_url):
+                self.remove_completion(old_url)
+            self.update_completion(url, title=title, favorite=True)
+        return True
+
+    def delete_favorite(self, fav_id):
+        """
+        Löscht einen Favoriten bzw. Ordner samt Inhalt; False, wenn das
+        Speichern fehlschlug.
+        """
+        fav = self.favorites.get(fav_id)
+        ids = [f.id for f in self.favorites.descendants(fav_id)]
+        if not self.store_write(self.store.delete_favorites, ids):
+            return False
+        action = self._fav_actions.get(fav_id)
+        if action is not None:
+            self._fav_menus[fav.parent_id].removeAction(action)
+        removed = self.favorites.remove(fav_id)
+        self._drop_favorite_actions(removed)
+        for f in removed:
+            if not f.is_folder and not self.favorites.contains_url(f.url):
+                self.remove_completion(f.url)
+        return True
+
+    def populate_favorites_menu(self, folder_id):
+        if folder_id in self._fav_populated or not self.profile_ready:
+            return
+        self._fav_populated.add(folder_id)
+        menu = self._fav_menus[folder_id]
+        for fav in self.favorites.children(folder_id):
+            menu.addAction(self._make_favorite_action(fav, menu))
+
+    def _make_favorite_action(self, fav, menu):
+        if fav.is_folder:
+            submenu = QMenu(fav.title, menu)
+            submenu.aboutToShow.connect(lambda fav_id=fav.id: self.populate_favorites_menu(fav_id))
+            self._fav_menus[fav.id] = submenu
+            action = submenu.menuAction()
+        else:
+            action = QAction(fav.title, menu)
+            action.setData(fav.url)
             action.triggered.connect(self.navigate_to_favorite)
-            self.fav_menu.addAction(action)
+        self._fav_actions[fav.id] = action
+        return action
+
+    def _place_favorite_action(self, fav, action):
+        """
+        Reiht die Aktion von fav an der sortierten Position ihres Menüs ein.
+        Ist das Menü noch nie aufgeklappt worden, entsteht nichts (bzw. eine
+        vorhandene Aktion wird verworfen).
+        """
+        if fav.parent_id not in self._fav_populated:
+            if action is not None:
+                self._drop_favorite_actions(self.favorites.descendants(fav.id))
+            return
+        menu = self._fav_menus[fav.parent_id]
+        if action is None:
+            action = self._make_favorite_action(fav, menu)
+        elif fav.is_folder:
+            # Untermenü umhängen, sonst stirbt es mit dem alten Elternmenü
+            submenu = self._fav_menus[fav.id]
+            submenu.setParent(menu, submenu.windowFlags())
+            submenu.setTitle(fav.title)
+        else:
+            action.setParent(menu)
+            action.setText(fav.title)
+            action.setData(fav.url)
+        following = self.favorites.next_sibling(fav)
+        if following is None:
+            menu.addAction(action)
+        else:
+            menu.insertAction(self._fav_actions[following.id], action)
+
+    def _drop_favorite_actions(self, favs):
+        for fav in favs:
+            action = self._fav_actions.pop(fav.id, None)
+            submenu = self._fav_menus.pop(fav.id, None)
+            self._fav_populated.discard(fav.id)
+            if submenu is not None:
+                submenu.deleteLater()
+            elif action is not None:
+                action.deleteLater()
 
     def navigate_to_favorite(self):
         action = self.sender()
@@ -774,14 +6892,10 @@ class Browser(QMainWindow):
             self.tabs.currentWidget().setUrl(QUrl(url))
 
     def manage_favorites(self):
-        if not self.data["favorites"]:
-            QMessageBox.information(self, "Info", "Keine gespeicherten Favoriten vorhanden.")
+        if self.profile_pending(self.manage_favorites):
             return
-        dlg = FavoritesManagerDialog(self, favorites_list=self.data["favorites"])
-        if dlg.exec() == QDialog.DialogCode.Accepted:
-            self.data["favorites"] = dlg.favorites
-            self.save_data()
-            self.update_favorites_menu()
+        # Auch ohne Favoriten: nur hier lassen sich Ordner anlegen
+        FavoritesManagerDialog(self).exec()
 
     # -------------- Passwörter -------------- #
     def save_credentials_for_current_page(self):
@@ -791,13 +6905,29 @@ class Browser(QMainWindow):
         if dlg.exec() == QDialog.DialogCode.Accepted:
             username, password = dlg.get_credentials()
             if username and password:
-                self.data["credentials"][domain] = {"username": username, "password": password}
-                self.save_data()
+                self.store_credentials(domain, username, password)
                 QMessageBox.information(self, "Erfolg", f"Zugangsdaten für {domain} gespeichert.")
             else:
                 QMessageBox.warning(self, "Warnung", "Benutzername und Passwort dürfen nicht leer sein.")
 
+    def store_credentials(self, host, username, password):
+        """
+        Speichert Zugangsdaten für host. Gelten genau diese Daten über den
+        Index schon für host (z. B. von einer anderen Subdomain), entsteht
+        kein weiterer Eintrag.
+        """
+        if self.profile_pending(self.store_credentials, host, username, password):
+            return
+        creds = {"username": username, "password": password}
+        if self.credential_index.lookup(host) == creds:
+            return
+        self.data["credentials"][host] = creds
+        self.credential_index.set(host, creds)
+        self.store_write(self.store.set_credentials, host, username, password)
+
     def view_credentials(self):
+        if self.profile_pending(self.view_credentials):
+            return
         if not self.data["credentials"]:
             QMessageBox.information(self, "Info", "Keine gespeicherten Zugangsdaten vorhanden.")
             return
@@ -822,75 +6952,88 @@ class Browser(QMainWindow):
         creds_dialog.exec()
 
     def manage_credentials(self):
+        if self.profile_pending(self.manage_credentials):
+            return
         if not self.data["credentials"]:
             QMessageBox.information(self, "Info", "Keine gespeicherten Zugangsdaten vorhanden.")
             return
         dlg = CredentialsManagerDialog(self, credentials_dict=self.data["credentials"])
         if dlg.exec() == QDialog.DialogCode.Accepted:
             self.data["credentials"] = dlg.credentials
-            self.save_data()
+            self.credential_index.rebuild(self.data["credentials"])
+            self.store_write(self.store.replace_credentials, self.data["credentials"])
 
     # -------------- History -------------- #
     def view_history(self):
-        history_list = self.data.get("history", [])
-        dlg = HistoryDialog(self, history_list=history_list)
+        # Ausstehende Besuche schreiben, der Dialog liest direkt aus dem Speicher
+        self.history.flush()
+        dlg = HistoryDialog(self, db_path=self.store.path)
         dlg.exec()
 
     # -------------- Credential Checking -------------- #
     def get_credentials_for_url(self, url):
-        domain = QUrl(url).host()
-        return self.data["credentials"].get(domain, None)
+        # Auch Einträge anderer Subdomains derselben Site (siehe CredentialIndex)
+        return self.credential_index.lookup(QUrl(url).host())
 
-    def check_credentials(self, browser):
-        url = browser.url().toString()
-        credentials = self.get_credentials_for_url(url)
-        if not credentials:
-            return
-        js_code = """
-        (function() {
-            var inputs = document.getElementsByTagName('input');
-            var hasPasswordField = false;
-            for(var i=0; i<inputs.length; i++) {
-                if(inputs[i].type.toLowerCase() === 'password') {
-                    hasPasswordField = true;
-                    break;
-                }
-            }
-            return hasPasswordField;
-        })();
+    def offer_credentials(self, browser):
         """
-        browser.page().runJavaScript(
-            js_code, lambda result: self.handle_check_password_field(result, credentials, browser)
-        )
-
-    def handle_check_password_field(self, has_password_field, credentials, browser):
-        if not has_password_field:
+        Vom Login-Skript gemeldet: die Seite enthält ein Passwortfeld.
+        """
+        if self.profile_pending(self.offer_credentials, browser):
+            return
+        host = browser.url().host()
+        entry = self.credential_index.find(host)
+        if not entry or browser.credentials_offered_for == host:
             return
+        browser.credentials_offered_for = host
+        saved_host, credentials = entry
         reply = QMessageBox.question(
             self,
             "Zugangsdaten verfügbar",
-            "Zugangsdaten für diese Domain sind gespeichert. Möchten Sie diese einfügen?",
+            f"Für {saved_host} sind Zugangsdaten gespeichert"
+            f" (Benutzer: {credentials['username']}). Möchten Sie diese auf {host} einfügen?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
-            username = credentials['username'].replace('"', '\\"')
-            password = credentials['password'].replace('"', '\\"')
+            username = json.dumps(credentials['username'])
+            password = json.dumps(credentials['password'])
             js_code = f"""
             (function() {{
                 var inputs = document.getElementsByTagName('input');
                 for(var i=0; i<inputs.length; i++) {{
-                    if(inputs[i].type.toLowerCase() === 'text' || inputs[i].type.toLowerCase() === 'email') {{
-                        inputs[i].value = "{username}";
-                    }} else if(inputs[i].type.toLowerCase() === 'password') {{
-                        inputs[i].value = "{password}";
+                    var t = inputs[i].type.toLowerCase();
+                    if(t === 'text' || t === 'email') {{
+                        inputs[i].value = {username};
+                    }} else if(t === 'password') {{
+                        inputs[i].value = {password};
                     }}
                 }}
             }})();
             """
-            browser.page().runJavaScript(js_code)
+            browser.page().runJavaScript(js_code, QWebEngineScript.ScriptWorldId.ApplicationWorld)
             QMessageBox.information(self, "Info", "Zugangsdaten wurden eingefügt.")
 
+    def handle_form_submission(self, browser, host, username, password):
+        """
+        Vom Login-Skript gemeldet: ein Login wurde im Frame mit diesem Host
+        (dieselbe Site wie der Tab) abgeschickt.
+        """
+        if not host or not username or not password:
+            return
+        if self.credential_index.lookup(host) == {"username": username, "password": password}:
+            return
+        reply = QMessageBox.question(
+            self,
+            "Zugangsdaten speichern",
+            f"Möchten Sie die Zugangsdaten für {host} speichern?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.Yes
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self.store_credentials(host, username, password)
+            self.status.showMessage(f"Zugangsdaten für {host} gespeichert.", 5000)
+
     # -------------- Login-Felder-Scan -------------- #
     def scan_for_login_fields(self):
         js_code = """
@@ -927,8 +7070,7 @@ class Browser(QMainWindow):
                 current_url = self.tabs.currentWidget().url().toString()
                 domain = QUrl(current_url).host()
                 if username and password:
-                    self.data["credentials"][domain] = {"username": username, "password": password}
-                    self.save_data()
+                    self.store_credentials(domain, username, password)
                     QMessageBox.information(self, "Erfolg", f"Zugangsdaten für {domain} gespeichert.")
                 else:
                     QMessageBox.warning(
@@ -940,127 +7082,370 @@ class Browser(QMainWindow):
             QMessageBox.information(self, "Info", "Keine geeigneten Eingabefelder gefunden.")
 
     # -------------- Video-Scan (mit bester Qualität, inkl. HLS) -------------- #
+    def on_media_changed(self, view):
+        if view is self.tabs.currentWidget():
+            self.update_video_button(view)
+
+    def on_blocked_count_changed(self, view):
+        if view is self.tabs.currentWidget():
+            self.update_blocked_label(view)
+
+    def update_blocked_label(self, view):
+        count = self.blocker.count(view) if view is not None else 0
+        self.blocked_label.setText(f"🛡 {count} blockiert" if count else "")
+
+    def set_content_blocking(self, enabled):
+        self.blocker.enabled = enabled
+        self.store_write(self.store.set_setting, "content_blocking", enabled)
+
+    def add_filter_lists(self):
+        paths, _ = QFileDialog.getOpenFileNames(self, "Filterliste hinzufügen", "",
+                                                "Filterlisten (*.txt);;Alle Dateien (*)")
+        if not paths:
+            return
+        try:
+            os.makedirs(FILTER_LIST_DIR, exist_ok=True)
+            for path in paths:
+                name = os.path.basename(path)
+                if not name.lower().endswith(".txt"):
+                    name += ".txt"
+                shutil.copyfile(path, os.path.join(FILTER_LIST_DIR, name))
+        except OSError as e:
+            QMessageBox.critical(self, "Fehler", f"Filterliste konnte nicht übernommen werden:\n{e}")
+            return
+        self.blocker.load()
+
+    def update_video_button(self, view):
+        count = len(self.media.candidates(view)) if view is not None else 0
+        self.video_scan_button.setEnabled(count > 0)
+        self.video_scan_button.setText(f"🎥 {count}" if count > 1 else "🎥")
+        if count:
+            self.video_scan_button.setToolTip(
+                f"{count} Video(s) gefunden – abspielen (höchste Auflösung)")
+        elif view is not None and self.media.uses_mse(view):
+            self.video_scan_button.setToolTip(
+                "Videoplayer ohne erkennbare Quelle (MediaSource) – noch kein Manifest geladen")
+        else:
+            self.video_scan_button.setToolTip("Keine Videos auf dieser Seite gefunden")
+
     def scan_and_play_videos(self):
         """
-        1) Scannt die aktuelle Seite nach <video>-Elementen.
-        2) Für jedes <source> werten wir das 'label' oder die URL aus
-           - Bei .m3u8 parsen wir das Manifest, um die höchste Auflösung zu finden.
-           - Bei .mp4 oder Ähnlichem suchen wir per Regex nach "(\\d+)p" etc.
-        3) Wählen pro <video> die (vermeintlich) beste URL aus.
-        4) Bieten dem Nutzer an, das Video in VLC zu starten.
-        """
-        js_code = r"""
-        (function() {
-            var videos = document.getElementsByTagName('video');
-            var chosenSources = [];
-            
-            for (var i = 0; i < videos.length; i++) {
-                var bestSrc = null;
-                var bestQuality = 0;
-                
-                var sourceTags = videos[i].getElementsByTagName('source');
-                for (var j = 0; j < sourceTags.length; j++) {
-                    var src = sourceTags[j].src;
-                    
-                    // label- oder data-res-Attribute
-                    var labelAttr = sourceTags[j].getAttribute('label') ||
-                                    sourceTags[j].getAttribute('data-res') || "";
-                    
-                    var foundQuality = 0;
-                    // Versuche, z.B. "1080p" im label zu finden
-                    var matchLabel = labelAttr.match(/(\d+)p/);
-                    if (matchLabel) {
-                        foundQuality = parseInt(matchLabel[1], 10);
-                    } else {
-                        // Versuch in der URL
-                        var matchURL = src.match(/(\d+)p/);
-                        if (matchURL) {
-                            foundQuality = parseInt(matchURL[1], 10);
-                        }
-                    }
-                    
-                    if (foundQuality > bestQuality) {
-                        bestQuality = foundQuality;
-                        bestSrc = src;
-                    }
-                }
-                
-                if (bestSrc) {
-                    chosenSources.push(bestSrc);
-                } else {
-                    // Fallback: currentSrc oder videos[i].src
-                    var fallback = videos[i].currentSrc || videos[i].src;
-                    if (fallback) {
-                        chosenSources.push(fallback);
-                    }
-                }
-            }
-            
-            return chosenSources;
-        })();
+        Spielt die von MediaDiscovery gefundenen Videos des aktuellen Tabs ab.
+        Bei HLS-/DASH-Manifesten (.m3u8/.mpd) wird die Variante passend zu
+        gemessenem Durchsatz und Qualitätsgrenze gewählt; bei mehreren
+        Videos fragt ein Dialog nach.
         """
-        page = self.tabs.currentWidget().page()
-        page.runJavaScript(js_code, self.handle_video_scan_result)
+        view = self.tabs.currentWidget()
+        if not isinstance(view, QWebEngineView):
+            return
+        self.handle_video_scan_result([c.url for c in self.media.candidates(view)])
 
     def handle_video_scan_result(self, video_sources):
         if not video_sources:
             QMessageBox.information(self, "Info", "Keine Videoelemente auf dieser Seite gefunden.")
             return
 
-        # NEUER SCHRITT: .m3u8 parsen
-        final_urls = []
-        for vs in video_sources:
-            if vs.endswith('.m3u8'):
-                # Manifest parsen, um Highest Variant zu finden
-                best_variant = self.parse_m3u8_for_highest_variant(vs)
-                final_urls.append(best_variant)
-            else:
-                final_urls.append(vs)
-
-        if len(final_urls) == 1:
-            video_url = final_urls[0]
-            self.play_video_in_vlc(video_url)
-        else:
-            dlg = QDialog(self)
-            dlg.setWindowTitle("Videos auswählen (höchste Auflösung)")
-            dlg.resize(400, 300)
-            layout = QVBoxLayout()
-
-            list_widget = QListWidget()
-            for src in final_urls:
-                item = QListWidgetItem(src)
-                list_widget.addItem(item)
-            layout.addWidget(list_widget)
-
-            btn_layout = QHBoxLayout()
-            play_btn = QPushButton("Abspielen")
-            cancel_btn = QPushButton("Abbrechen")
-            btn_layout.addWidget(play_btn)
-            btn_layout.addWidget(cancel_btn)
-            layout.addLayout(btn_layout)
+        # Manifeste parallel im Hintergrund auflösen (passende Variante)
+        batch = ManifestResolveBatch(video_sources, max_height=self.video_max_height(), parent=self)
 
-            dlg.setLayout(layout)
+        if len(video_sources) == 1:
+            # Einzelnes Video: nach der Auflösung (oder dem Zeitlimit) direkt abspielen
+            if manifest_kind(video_sources[0]) is not None:
+                self.status.showMessage("Stream wird aufgelöst…")
+            batch.finished.connect(lambda: self.on_single_video_resolved(batch))
+            batch.start()
+            return
 
-            play_btn.clicked.connect(lambda: self.play_selected_video(list_widget, dlg))
-            cancel_btn.clicked.connect(dlg.reject)
+        dlg = VideoSelectionDialog(batch, self)
+        batch.finished.connect(self.show_manifest_cache_stats)
+        batch.start()
+        if dlg.exec() == QDialog.DialogCode.Accepted and dlg.selected_stream:
+            self.play_stream(dlg.selected_stream)
+        batch.deleteLater()
+
+    def on_single_video_resolved(self, batch):
+        self.show_manifest_cache_stats()
+        stream = batch.results[0]
+        batch.deleteLater()
+        self.play_stream(stream)
+
+    def video_max_height(self):
+        return self.store.get_setting("video_max_height", 0)
+
+    def set_video_max_height(self, height):
+        self.store_write(self.store.set_setting, "video_max_height", height)
+
+    def vlc_network_caching(self):
+        return self.store.get_setting("vlc_network_caching_ms", VLC_NETWORK_CACHING_MS)
+
+    def set_vlc_network_caching(self, caching):
+        get_vlc_pool().network_caching = caching
+        self.store_write(self.store.set_setting, "vlc_network_caching_ms", caching)
+
+    def show_first_frame_time(self, seconds):
+        average = get_vlc_pool().record_ttff(seconds)
+        self.status.showMessage(
+            f"Erstes Bild nach {seconds:.2f} s (Mittel: {average:.2f} s)", 10000)
+
+    def show_manifest_cache_stats(self):
+        stats = get_manifest_cache().stats()
+        self.status.showMessage(
+            f"Manifest-Cache: {stats['hits']} Treffer, {stats['revalidated']} revalidiert (304), "
+            f"{stats['misses']} geladen, {stats['errors']} Fehler", 5000)
+
+    def play_stream(self, stream):
+        if stream.label:
+            self.status.showMessage(f"Gewählte Variante: {stream.label}", 5000)
+        self.play_video_in_vlc(stream.url, stream.options)
+
+    def play_video_in_vlc(self, video_url, media_options=None):
+        try:
+            dlg = VLCPlayerDialog(video_url, self, media_options=media_options,
+                                  download_manager=self.downloads)
+        except VLC_LOAD_ERRORS as e:
+            # python-vlc bzw. libVLC wird erst hier geladen
+            QMessageBox.critical(self, "Fehler", f"VLC konnte nicht geladen werden:\n{e}")
+            return
+        dlg.first_frame.connect(self.show_first_frame_time)
+        dlg.exec()
 
-            dlg.exec()
+    def closeEvent(self, event):
+        # Ausstehende Chronik-Einträge schreiben und die SQLite-Verbindung
+        # sauber schließen (WAL-Checkpoint)
+        self.session_timer.stop()
+        self.web_profile.stop_warmup()
+        self.task_monitor.timer.stop()
+        self.task_monitor.write_peak_log()
+        self.save_session()
+        self.history.flush()
+        self.downloads.shutdown()
+        self.store.close()
+        super().closeEvent(event)
 
-    def play_selected_video(self, list_widget, dialog):
-        selected_item = list_widget.currentItem()
-        if selected_item:
-            video_url = selected_item.text()
-            self.play_video_in_vlc(video_url)
-            dialog.accept()
-        else:
-            QMessageBox.warning(self, "Warnung", "Bitte wählen Sie ein Video aus.")
+# --------------------------------------------------
+#  Stapelbetrieb: Videoerkennung ohne Fenster (--batch)
+# --------------------------------------------------
+class BatchJob:
+    __slots__ = ("index", "url", "page", "timer", "started", "loaded", "title", "error")
+
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url
+        self.page = None
+        self.timer = None
+        self.started = time.monotonic()
+        self.loaded = None
+        self.title = ""
+        self.error = None
+
+class BatchPage(QWebEnginePage):
+    """Seite ohne JavaScript-Dialoge: im Stapelbetrieb darf nichts modal warten."""
+    def javaScriptAlert(self, securityOrigin, msg):
+        pass
+
+    def javaScriptConfirm(self, securityOrigin, msg):
+        return False
+
+    def javaScriptPrompt(self, securityOrigin, msg, defaultValue):
+        return False, ""
+
+class BatchMediaScanner(QObject):
+    """
+    Lädt URLs in höchstens pool_size gleichzeitigen, unsichtbaren Seiten
+    und erkennt Videos wie in den Tabs (eingeschleustes Skript,
+    PageRequestInterceptor, MediaDiscovery); Manifeste werden wie beim
+    🎥-Knopf per ManifestResolveBatch aufgelöst. Jede URL bekommt eine
+    frische Seite, damit nichts von der vorigen übrig bleibt. Ergebnisse
+    gehen in der Reihenfolge ihrer Fertigstellung als JSON-Zeilen nach
+    output.
+
+    Das Profil ist flüchtig: Stapelläufe hinterlassen keine Cookies und
+    keinen Cache im Profil des Browsers. Die ersten Seiten werden erst
+    geladen, wenn die Filterlisten bereit sind (oder nicht geladen werden
+    konnten), damit alle Seiten gleich gefiltert und gezählt werden.
+    """
+    finished = pyqtSignal()
 
-    def play_video_in_vlc(self, video_url):
-        dlg = VLCPlayerDialog(video_url, self)
-        dlg.exec()
+    def __init__(self, urls, output, pool_size=BATCH_POOL_SIZE, page_timeout_ms=BATCH_PAGE_TIMEOUT_MS,
+                 settle_ms=BATCH_SETTLE_MS, max_height=0, parent=None):
+        super().__init__(parent)
+        self.urls = deque(enumerate(urls))
+        self.total = len(self.urls)
+        self.output = output
+        self.pool_size = max(1, pool_size)
+        self.page_timeout_ms = page_timeout_ms
+        self.settle_ms = settle_ms
+        self.max_height = max_height
+        self.active = set()
+        self.resolving = set()
+        self.written = 0
+        self.started = time.monotonic()
+        self.running = False
+
+        self.profile = QWebEngineProfile(self)
+        try:
+            self.profile.scripts().insert(page_watcher_script())
+        except OSError as e:
+            print("Videoerkennung im Dokument nicht verfügbar:", e, file=sys.stderr)
+        # PageRequestInterceptor erwartet dieselben Dienste wie im Browser
+        self.media = MediaDiscovery(self)
+        self.timing = PageTimingRecorder(self)
+        self.blocker = ContentBlocker(self)
+        self.blocker.loaded.connect(lambda _count: self._begin())
+        self.blocker.failed.connect(lambda _error: self._begin())
+
+    def start(self):
+        self.blocker.load()
+
+    def _begin(self):
+        if self.running:
+            return
+        self.running = True
+        self._fill_pool()
+        self._check_finished()
+
+    def _fill_pool(self):
+        while self.urls and len(self.active) < self.pool_size:
+            index, url = self.urls.popleft()
+            job = BatchJob(index, url)
+            page = job.page = BatchPage(self.profile, self)
+            page.setAudioMuted(True)
+            bridge = MediaChannelInterface(self.media, page)
+            channel = QWebChannel(page)
+            channel.registerObject("mediaBridge", bridge)
+            page.setWebChannel(channel, QWebEngineScript.ScriptWorldId.ApplicationWorld)
+            page.setUrlRequestInterceptor(PageRequestInterceptor(self, page))
+            page.loadStarted.connect(lambda p=page: self.media.reset(p))
+            page.loadFinished.connect(lambda ok, j=job: self._on_load_finished(j, ok))
+            job.timer = QTimer(page)
+            job.timer.setSingleShot(True)
+            job.timer.timeout.connect(lambda j=job: self._on_timer(j))
+            job.timer.start(self.page_timeout_ms)
+            self.active.add(job)
+            page.load(QUrl.fromUserInput(url))
+
+    def _on_load_finished(self, job, ok):
+        if job.loaded is not None:
+            return
+        job.loaded = ok
+        job.title = job.page.title()
+        if not ok:
+            job.error = "load_failed"
+        # Player holen ihr Manifest oft erst nach dem load-Ereignis
+        job.timer.start(self.settle_ms)
+
+    def _on_timer(self, job):
+        if job.loaded is None:
+            job.loaded = False
+            job.error = "timeout"
+            job.title = job.page.title()
+        self._harvest(job)
+
+    def _harvest(self, job):
+        page = job.page
+        candidates = self.media.candidates(page)
+        uses_mse = self.media.uses_mse(page)
+        blocked = self.blocker.count(page)
+        self.media.forget(page)
+        self.timing.forget(page)
+        self.blocker.forget(page)
+        job.timer.stop()
+        page.triggerAction(QWebEnginePage.WebAction.Stop)
+        page.deleteLater()
+        job.page = None
+        self.active.discard(job)
+        self._fill_pool()
+
+        batch = ManifestResolveBatch([c.url for c in candidates], max_height=self.max_height, parent=self)
+        self.resolving.add(batch)
+        batch.finished.connect(lambda: self._write(job, candidates, uses_mse, blocked, batch))
+        batch.start()
+
+    def _write(self, job, candidates, uses_mse, blocked, batch):
+        self.resolving.discard(batch)
+        batch.deleteLater()
+        media = []
+        for candidate, stream in zip(candidates, batch.results):
+            media.append({
+                "url": candidate.url, "kind": candidate.kind, "label": candidate.label,
+                "height": candidate.height, "origin": candidate.origin,
+                "stream": stream.url, "stream_label": stream.label, "vlc_options": stream.options,
+            })
+        record = {
+            "index": job.index, "url": job.url, "title": job.title, "ok": job.error is None,
+            "error": job.error, "seconds": round(time.monotonic() - job.started, 3),
+            "blocked": blocked, "mse": uses_mse, "media": media,
+        }
+        try:
+            self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.output.flush()
+        except OSError as e:
+            print("Fehler beim Schreiben des Ergebnisses:", e, file=sys.stderr)
+        self.written += 1
+        self._check_finished()
+
+    def _check_finished(self):
+        if self.urls or self.active or self.resolving:
+            return
+        elapsed = time.monotonic() - self.started
+        rate = self.written / elapsed * 3600 if elapsed > 0 else 0
+        print(f"{self.written} von {self.total} Seiten in {elapsed:.1f} s ({rate:.0f} pro Stunde)",
+              file=sys.stderr)
+        self.finished.emit()
+
+def read_batch_urls(path):
+    """Eine URL pro Zeile; leere Zeilen und Kommentare (#) zählen nicht."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+def run_batch(argv):
+    parser = argparse.ArgumentParser(
+        prog=os.path.basename(sys.argv[0]),
+        description="Videos vieler Seiten ohne Fenster erkennen und auflösen (Ausgabe: JSON-Zeilen).")
+    parser.add_argument("--batch", metavar="DATEI", required=True,
+                        help="Datei mit einer URL pro Zeile (- = Standardeingabe)")
+    parser.add_argument("--pool", type=int, default=BATCH_POOL_SIZE,
+                        help=f"gleichzeitig geladene Seiten (Standard: {BATCH_POOL_SIZE})")
+    parser.add_argument("--output", "-o", metavar="DATEI",
+                        help="Ergebnisse in diese Datei statt auf die Standardausgabe")
+    parser.add_argument("--timeout", type=float, default=BATCH_PAGE_TIMEOUT_MS / 1000,
+                        help="Zeitlimit pro Seite in Sekunden")
+    parser.add_argument("--settle", type=float, default=BATCH_SETTLE_MS / 1000,
+                        help="Wartezeit nach dem Laden in Sekunden (nachladende Player)")
+    parser.add_argument("--max-height", type=int, default=0,
+                        help="höchste gewünschte Auflösung, z. B. 1080 (0 = unbegrenzt)")
+    parser.add_argument("--profile-startup", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    try:
+        urls = read_batch_urls(args.batch)
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    except OSError as e:
+        print("Fehler:", e, file=sys.stderr)
+        return 2
+
+    # Kein sichtbares Fenster, auch ohne Bildschirm (Server, Cronjob)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication([sys.argv[0]])
+    scanner = BatchMediaScanner(urls, output, args.pool, int(args.timeout * 1000),
+                                int(args.settle * 1000), args.max_height)
+    scanner.finished.connect(app.quit)
+    QTimer.singleShot(0, scanner.start)
+    code = app.exec()
+    if output is not sys.stdout:
+        output.close()
+    return code
 
 if __name__ == "__main__":
+    if any(arg == "--batch" or arg.startswith("--batch=") for arg in sys.argv[1:]):
+        sys.exit(run_batch(sys.argv[1:]))
+    startup_profiler.mark("Modul geladen")
     app = QApplication(sys.argv)
+    startup_profiler.mark("QApplication erstellt")
     window = Browser()
     window.show()
+    startup_profiler.mark("Fenster angezeigt")
     sys.exit(app.exec())
@@ -0,0 +1,188 @@
+"""
+Lokaler HTTP-Ersatzserver für die Benchmarks.
+
+Liefert synthetische Inhalte, damit die Messungen ohne Internetzugang
+reproduzierbar sind:
+
+  /hls/master.m3u8?variants=N&segments=M
+                                  HLS-Master mit N Varianten zu je M Segmenten
+  /hls/<i>/index.m3u8?segments=M  Media-Playlist der Variante i
+  /hls/<i>/<k>.ts                 Segment (SEGMENT_SIZE Bytes)
+  /files/<bytes>.bin              Datei beliebiger Größe, mit HTTP-Range
+  /login                          Login-Seite (Benutzername + Passwort)
+  /page/<n>                       einfache HTML-Seite
+"""
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+SEGMENT_SIZE = 188 * 1024
+CHUNK_SIZE = 256 * 1024
+# Feste Bytefolge, aus der alle Dateien zusammengesetzt werden
+PATTERN = bytes(range(256)) * (CHUNK_SIZE // 256)
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Anmelden</title></head>
+<body>
+<form method="post" action="/login">
+  <input type="text" name="user" autocomplete="username">
+  <input type="password" name="password" autocomplete="current-password">
+  <button type="submit">Anmelden</button>
+</form>
+</body></html>
+"""
+
+def hls_master(variants, segments=10):
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for i in range(variants):
+        height = 144 + (i * 2160 // max(variants, 1)) // 2 * 2
+        width = height * 16 // 9 // 2 * 2
+        bandwidth = 150000 + i * 90000
+        lines.append(
+            f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},AVERAGE-BANDWIDTH={bandwidth * 9 // 10},'
+            f'RESOLUTION={width}x{height},CODECS="avc1.640028,mp4a.40.2",FRAME-RATE=30.000'
+        )
+        lines.append(f"{i}/index.m3u8?segments={segments}")
+    return "\n".join(lines) + "\n"
+
+def hls_media(segments):
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:6", "#EXT-X-MEDIA-SEQUENCE:0"]
+    for k in range(segments):
+        lines.append("#EXTINF:6.000,")
+        lines.append(f"{k}.ts")
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Kopfzeilen und Inhalt gehen getrennt raus; ohne TCP_NODELAY kostet
+    # jede Antwort ~40 ms (Nagle + verzögertes ACK) und verfälscht die Messung
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass  # Messungen nicht durch Konsolenausgaben verfälschen
+
+    def do_GET(self):
+        self._handle(send_body=True)
+
+    def do_HEAD(self):
+        self._handle(send_body=False)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self._send_text("<html><body>Angemeldet</body></html>", "text/html")
+
+    def _handle(self, send_body):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        path = parts.path
+        self.send_body = send_body
+        if path == "/hls/master.m3u8":
+            variants = int(query.get("variants", ["8"])[0])
+            segments = int(query.get("segments", ["10"])[0])
+            self._send_text(hls_master(variants, segments), "application/vnd.apple.mpegurl")
+        elif re.fullmatch(r"/hls/\d+/index\.m3u8", path):
+            segments = int(query.get("segments", ["10"])[0])
+            self._send_text(hls_media(segments), "application/vnd.apple.mpegurl")
+        elif re.fullmatch(r"/hls/\d+/\d+\.ts", path):
+            self._send_bytes(SEGMENT_SIZE, "video/mp2t")
+        elif re.fullmatch(r"/files/\d+\.bin", path):
+            self._send_bytes(int(path[len("/files/"):-len(".bin")]), "application/octet-stream")
+        elif path == "/login":
+            self._send_text(LOGIN_PAGE, "text/html")
+        elif path.startswith("/page/"):
+            n = path[len("/page/"):]
+            self._send_text(f"<!DOCTYPE html><html><head><title>Seite {n}</title></head>"
+                            f"<body><h1>Seite {n}</h1></body></html>", "text/html")
+        else:
+            self.send_error(404)
+
+    def _send_text(self, text, content_type):
+        body = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.send_body:
+            self.wfile.write(body)
+
+    def _send_bytes(self, size, content_type):
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        match = RANGE_RE.match(range_header or "")
+        if match and size > 0:
+            first, last = match.groups()
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            else:
+                start = max(0, size - int(last or 0))
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if not self.send_body:
+            return
+        position = start
+        try:
+            while position <= end:
+                offset = position % CHUNK_SIZE
+                count = min(CHUNK_SIZE - offset, end - position + 1)
+                self.wfile.write(PATTERN[offset:offset + count])
+                position += count
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client hat abgebrochen (Pause/Abbruch)
+
+class FixtureServer:
+    """
+    Startet den Server auf einem freien Port in einem Hintergrund-Thread.
+    """
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+if __name__ == "__main__":
+    with FixtureServer(port=8765) as server:
+        print("Fixture-Server läuft unter", server.base_url)
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
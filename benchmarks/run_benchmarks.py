@@ -0,0 +1,452 @@
+"""
+Headless-Benchmarks für TMP-Networks-Browser-Mini.
+
+Läuft unter QT_QPA_PLATFORM=offscreen gegen den lokalen Fixture-Server
+(fixture_server.py) in einem temporären Profilverzeichnis und gibt die
+Ergebnisse als JSON aus:
+
+    python benchmarks/run_benchmarks.py --output ergebnis.json
+    python benchmarks/run_benchmarks.py --quick --compare ergebnis.json
+
+Zeiten stehen in Metriken mit der Endung _ms oder in us_per_* (Mikro-
+sekunden pro Vorgang, kleiner ist besser), Raten in *_per_second (größer
+ist besser). --compare meldet Abweichungen
+gegenüber einer früheren Ausgabe jenseits von --threshold.
+"""
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from fixture_server import FixtureServer, hls_master, hls_media
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BROWSER_SCRIPT = os.path.join(HERE, os.pardir, "TMP-Networks-Browser-Mini.py")
+
+# Profilgrößen (vollständig / --quick)
+SIZES = {
+    "full": {"favorites": 10000, "credentials": 5000, "history": 50000, "visits": 5000,
+             "tabs": 20, "variants": 200, "segments": 2000, "file_mb": 256, "hls_segments": 200,
+             "lookups": 20000, "filter_rules": 50000, "repeat": 5},
+    "quick": {"favorites": 1000, "credentials": 500, "history": 5000, "visits": 500,
+              "tabs": 5, "variants": 50, "segments": 200, "file_mb": 32, "hls_segments": 30,
+              "lookups": 2000, "filter_rules": 5000, "repeat": 3},
+}
+
+def load_browser_module(path=BROWSER_SCRIPT):
+    # Der Dateiname enthält Bindestriche, daher über importlib laden
+    spec = importlib.util.spec_from_file_location("tmp_browser", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["tmp_browser"] = module
+    spec.loader.exec_module(module)
+    return module
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def summarize(samples_ms):
+    samples_ms = sorted(samples_ms)
+    return {
+        "median_ms": round(statistics.median(samples_ms), 3),
+        "min_ms": round(samples_ms[0], 3),
+        "p95_ms": round(samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))], 3),
+    }
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+class Suite:
+    def __init__(self, tb, app, server, sizes):
+        self.tb = tb
+        self.app = app
+        self.server = server
+        self.sizes = sizes
+        self.browser = None
+
+    # ---------- Hilfen ----------
+    def wait_for(self, predicate, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                raise TimeoutError("Zeitlimit überschritten")
+            self.app.processEvents()
+            time.sleep(0.001)
+
+    def seed_profile(self):
+        """
+        Legt im aktuellen Verzeichnis ein großes synthetisches Profil an.
+        """
+        tb, sizes = self.tb, self.sizes
+        store = tb.ProfileStore(tb.DB_FILE)
+        now = time.time()
+        with store.transaction():
+            store.conn.executemany(
+                "INSERT INTO favorites(title, url, parent_id, is_folder) VALUES (?, ?, NULL, 0)",
+                [(f"Favorit {i}", f"https://fav{i}.example.com/") for i in range(sizes["favorites"])]
+            )
+            store.conn.executemany(
+                "INSERT INTO credentials(domain, username, password) VALUES (?, ?, ?)",
+                [(f"login.site{i}.com", f"user{i}", f"pw{i}") for i in range(sizes["credentials"])]
+            )
+        records = []
+        for i in range(sizes["history"]):
+            record = tb.HistoryRecord(f"https://history{i}.example.org/page", f"Seite {i}")
+            record.register_visit(now - i * 60)
+            records.append(record)
+        store.upsert_history(records)
+        store.close()
+
+    def open_browser(self):
+        self.browser = self.tb.Browser()
+        self.wait_for(lambda: self.browser.profile_ready)
+        # Ein fester Tab, damit das Schließen der Messtabs nie das Fenster schließt
+        self.browser.add_new_tab(self.tb.QUrl("about:blank"), "Basis")
+        self.app.processEvents()
+
+    def reload_profile(self):
+        browser = self.browser
+        browser.history.flush()
+        browser.downloads.shutdown()
+        browser.store.close()
+        old = (browser.history, browser.downloads)
+
+        def load():
+            # Favoriten und Zugangsdaten kommen im Hintergrund nach
+            browser.load_data()
+            self.wait_for(lambda: browser.profile_ready)
+        elapsed, _ = timed(load)
+        for obj in old:
+            obj.deleteLater()
+        return elapsed
+
+    # ---------- Benchmarks ----------
+    def bench_profile_load(self):
+        samples = [self.reload_profile() for _ in range(self.sizes["repeat"])]
+        result = summarize(samples)
+        result.update(favorites=len(self.browser.favorites),
+                      credentials=len(self.browser.data["credentials"]),
+                      history_rows=self.sizes["history"])
+        return result
+
+    def bench_profile_save(self):
+        samples = [timed(self.browser.save_data)[0] for _ in range(self.sizes["repeat"])]
+        return summarize(samples)
+
+    def bench_history_append(self):
+        browser = self.browser
+        count = self.sizes["visits"]
+        start = time.perf_counter()
+        for i in range(count):
+            browser.add_to_history(f"Neue Seite {i}", f"https://append{i}.example.net/")
+        elapsed = time.perf_counter() - start
+        flush_ms, _ = timed(browser.history.flush)
+        return {"visits": count, "visits_per_second": round(count / elapsed, 1),
+                "flush_ms": round(flush_ms, 3)}
+
+    def bench_tab_open_close(self):
+        browser = self.browser
+        tb = self.tb
+        open_samples = []
+        for i in range(self.sizes["tabs"]):
+            loaded = []
+            start = time.perf_counter()
+            browser.add_new_tab(tb.QUrl(self.server.url(f"/page/{i}")), f"Seite {i}")
+            view = browser.tabs.currentWidget()
+            view.loadFinished.connect(lambda ok: loaded.append(ok))
+            self.wait_for(lambda: loaded)
+            open_samples.append((time.perf_counter() - start) * 1000)
+        close_samples = []
+        while browser.tabs.count() > 1:
+            start = time.perf_counter()
+            browser.close_current_tab(browser.tabs.count() - 1)
+            self.app.processEvents()
+            close_samples.append((time.perf_counter() - start) * 1000)
+        result = {"tabs": self.sizes["tabs"]}
+        result.update({f"open_{k}": v for k, v in summarize(open_samples).items()})
+        result.update({f"close_{k}": v for k, v in summarize(close_samples).items()})
+        return result
+
+    def bench_manifest_parse(self):
+        tb = self.tb
+        master_text = hls_master(self.sizes["variants"])
+        media_text = hls_media(self.sizes["segments"])
+        master_url = self.server.url(f"/hls/master.m3u8?variants={self.sizes['variants']}")
+        master_samples = [timed(tb.parse_manifest, master_text, master_url)[0]
+                          for _ in range(self.sizes["repeat"])]
+        media_samples = [timed(tb.parse_manifest, media_text, self.server.url("/hls/0/index.m3u8"))[0]
+                         for _ in range(self.sizes["repeat"])]
+        # Ende-zu-Ende über HTTP; eindeutige Query umgeht den Manifest-Cache
+        resolve_samples = [
+            timed(tb.resolve_stream, f"{master_url}&run={time.time_ns()}", 0)[0]
+            for _ in range(self.sizes["repeat"])
+        ]
+        warm_samples = [timed(tb.resolve_stream, master_url, 0)[0] for _ in range(self.sizes["repeat"])]
+        return {
+            "variants": self.sizes["variants"],
+            "segments": self.sizes["segments"],
+            "parse_master_median_ms": summarize(master_samples)["median_ms"],
+            "parse_media_median_ms": summarize(media_samples)["median_ms"],
+            "resolve_cold_median_ms": summarize(resolve_samples)["median_ms"],
+            "resolve_warm_median_ms": summarize(warm_samples)["median_ms"],
+        }
+
+    def _download(self, url, kind, path):
+        item = self.browser.downloads.enqueue(url, path, kind)
+        start = time.perf_counter()
+        self.wait_for(lambda: item.finished, timeout=600)
+        elapsed = time.perf_counter() - start
+        if item.state != "done":
+            raise RuntimeError(f"Download {item.state}: {item.error}")
+        size = os.path.getsize(path)
+        return {"bytes": size, "seconds": round(elapsed, 3),
+                "mib_per_second": round(size / elapsed / (1024 * 1024), 2)}
+
+    def bench_download_throughput(self):
+        self.browser.downloads.set_rate_limit(0)
+        size = self.sizes["file_mb"] * 1024 * 1024
+        ranged = self._download(self.server.url(f"/files/{size}.bin"), "http", "ranged.bin")
+        hls = self._download(
+            self.server.url(f"/hls/master.m3u8?variants=4&segments={self.sizes['hls_segments']}"),
+            "hls", "stream.ts")
+        result = {f"http_{k}": v for k, v in ranged.items()}
+        result.update({f"hls_{k}": v for k, v in hls.items()})
+        return result
+
+    def _wait_for_js(self, view, script, expected, timeout=60.0):
+        """
+        Wertet script wiederholt in der Seite aus, bis es expected liefert;
+        gibt den Zeitpunkt (perf_counter) des Treffers zurück.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            result = []
+            view.page().runJavaScript(script, result.append)
+            self.wait_for(lambda: result, timeout)
+            if result[0] == expected:
+                return time.perf_counter()
+            if time.monotonic() > deadline:
+                raise TimeoutError("Zeitlimit überschritten")
+
+    def bench_credential_autofill(self):
+        """
+        Ende zu Ende gegen /login: Passwortfeld vom Login-Skript erkannt ->
+        offer_credentials -> Felder ausgefüllt (Rückfrage automatisch mit
+        Ja beantwortet). Dazu die Dauer des Lookups allein über viele Hosts.
+        """
+        tb = self.tb
+        browser = self.browser
+        login_url = self.server.url("/login")
+        browser.store_credentials(tb.QUrl(login_url).host(), "bench-user", "bench-pw")
+
+        offered = []
+        offer_credentials = browser.offer_credentials
+
+        def offer(view):
+            offered.append(time.perf_counter())
+            offer_credentials(view)
+        browser.offer_credentials = offer
+        question, information = tb.QMessageBox.question, tb.QMessageBox.information
+        tb.QMessageBox.question = lambda *args, **kwargs: tb.QMessageBox.StandardButton.Yes
+        tb.QMessageBox.information = lambda *args, **kwargs: tb.QMessageBox.StandardButton.Ok
+        detect_samples, fill_samples, total_samples = [], [], []
+        try:
+            for i in range(self.sizes["tabs"]):
+                del offered[:]
+                start = time.perf_counter()
+                browser.add_new_tab(tb.QUrl(f"{login_url}?run={i}"), "Anmelden")
+                view = browser.tabs.currentWidget()
+                self.wait_for(lambda: offered)
+                filled = self._wait_for_js(
+                    view, "document.querySelector('input[type=password]').value", "bench-pw")
+                detect_samples.append((offered[0] - start) * 1000)
+                fill_samples.append((filled - offered[0]) * 1000)
+                total_samples.append((filled - start) * 1000)
+                browser.close_current_tab(browser.tabs.count() - 1)
+                self.app.processEvents()
+        finally:
+            del browser.offer_credentials
+            tb.QMessageBox.question, tb.QMessageBox.information = question, information
+
+        count = self.sizes["lookups"]
+        sites = self.sizes["credentials"]
+        rng = random.Random(1)
+        urls = [f"https://w{i}.site{rng.randrange(sites)}.com/login" for i in range(count)]
+        start = time.perf_counter()
+        hits = sum(1 for url in urls if browser.get_credentials_for_url(url))
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for url in urls:
+            browser.get_credentials_for_url(url)
+        warm = time.perf_counter() - start
+        result = {"fills": len(total_samples)}
+        result.update({f"detect_{k}": v for k, v in summarize(detect_samples).items()})
+        result.update({f"fill_{k}": v for k, v in summarize(fill_samples).items()})
+        result.update({f"total_{k}": v for k, v in summarize(total_samples).items()})
+        result.update({
+            "lookups": count,
+            "hits": hits,
+            "cold_us_per_lookup": round(cold / count * 1e6, 3),
+            "warm_us_per_lookup": round(warm / count * 1e6, 3),
+        })
+        return result
+
+    def bench_filter_match(self):
+        tb = self.tb
+        rng = random.Random(2)
+        count = self.sizes["filter_rules"]
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        words = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(count)]
+        # Mischung wie in EasyList: überwiegend Domainregeln, dazu Pfade,
+        # Optionen und Ausnahmen
+        rules = []
+        for i, word in enumerate(words):
+            kind = i % 10
+            if kind < 6:
+                rules.append(f"||{word}.com^")
+            elif kind < 8:
+                rules.append(f"/{word}/*-ad-")
+            elif kind == 8:
+                rules.append(f"||{word}.net/ads/$script,third-party")
+            else:
+                rules.append(f"@@||{word}.com/ok^")
+        os.makedirs("filter_bench", exist_ok=True)
+        with open(os.path.join("filter_bench", "liste.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(rules))
+        cache_file = os.path.join("filter_bench", "kompiliert.json")
+        compile_ms, engine = timed(tb.FilterEngine.load, "filter_bench", cache_file)
+        load_samples = [timed(tb.FilterEngine.load, "filter_bench", cache_file)[0]
+                        for _ in range(self.sizes["repeat"])]
+
+        hosts = [f"cdn{i}.{rng.choice(words)}.org" for i in range(50)] + [f"{w}.com" for w in words[:50:10]]
+        queries = []
+        for i in range(self.sizes["lookups"]):
+            url = f"https://{rng.choice(hosts)}/assets/{rng.choice(words)}/bundle-{i}.js?v={i}"
+            queries.append((url, url.split("/")[2], "www.seite.de", tb.FILTER_TYPE_BITS["script"]))
+        blocked = sum(1 for r in queries if engine.should_block(*r))  # kompiliert Ausdrücke
+        start = time.perf_counter()
+        for r in queries:
+            engine.should_block(*r)
+        elapsed = time.perf_counter() - start
+        return {
+            "rules": engine.rule_count,
+            "requests": len(queries),
+            "blocked": blocked,
+            "compile_ms": round(compile_ms, 3),
+            "cache_load_median_ms": summarize(load_samples)["median_ms"],
+            "us_per_request": round(elapsed / len(queries) * 1e6, 3),
+        }
+
+    BENCHMARKS = [
+        "profile_load", "profile_save", "history_append", "tab_open_close",
+        "manifest_parse", "download_throughput", "credential_autofill", "filter_match",
+    ]
+
+    def run(self, names):
+        self.seed_profile()
+        self.open_browser()
+        results = {}
+        for name in names:
+            print(f"… {name}", file=sys.stderr)
+            try:
+                results[name] = getattr(self, "bench_" + name)()
+            except Exception as e:
+                traceback.print_exc()
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+        self.browser.close()
+        return results
+
+def compare(results, baseline, threshold):
+    """
+    Liefert Textzeilen für Metriken, die sich um mehr als threshold
+    (Anteil) verschlechtert haben.
+    """
+    lines = []
+    for name, metrics in results.items():
+        old_metrics = baseline.get("results", {}).get(name, {})
+        for key, value in metrics.items():
+            old = old_metrics.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            if key.endswith("_ms") or key.startswith("us_per_") or "_us_per_" in key:
+                change = value / old - 1
+            elif key.endswith("per_second"):
+                change = old / value - 1 if value else float("inf")
+            else:
+                continue
+            if change > threshold:
+                lines.append(f"{name}.{key}: {old} -> {value} ({change:+.0%})")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="kleinere Profile und Dateien")
+    parser.add_argument("--only", action="append", choices=Suite.BENCHMARKS,
+                        help="nur diesen Benchmark (mehrfach möglich)")
+    parser.add_argument("--output", help="JSON-Datei statt Standardausgabe")
+    parser.add_argument("--compare", help="frühere JSON-Ausgabe zum Vergleich")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Verschlechterung, ab der --compare meldet (Standard 0.1 = 10 %%)")
+    args = parser.parse_args()
+
+    tb = load_browser_module()
+    from PyQt6.QtCore import QT_VERSION_STR
+    app = tb.QApplication.instance() or tb.QApplication([sys.argv[0]])
+    sizes = SIZES["quick" if args.quick else "full"]
+    names = args.only or Suite.BENCHMARKS
+
+    started = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="tmp-browser-bench-") as profile_dir, FixtureServer() as server:
+        # Profil, Manifest-Cache und Downloads landen im temporären Verzeichnis
+        os.chdir(profile_dir)
+        try:
+            results = Suite(tb, app, server, sizes).run(names)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "suite": "tmp-networks-browser-mini",
+        "format": 1,
+        "revision": git_revision(),
+        "started_at": started,
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "platform": platform.platform(),
+        "profile": "quick" if args.quick else "full",
+        "sizes": sizes,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print("Verschlechtert:", line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()